@@ -0,0 +1,222 @@
+"""Batched engine running many independent games in lockstep
+
+The memories, registers and flags of the CPUs of every game of the batch are held in NumPy arrays
+with a game dimension: memory[slot, cell, address], registers[slot, cell, register] and flags[slot, cell].
+The registers and flags hold python integers, so their values are exactly the ones of a CPU of a Game.
+
+At each cycle the CPUs executing `jmp #imm` with the timer off, which is what the empty cells of the board
+do all the game, are stepped for every game of the batch at once. The other CPUs are executed one by one
+by CPU.execute, on views of the arrays, in the row-major order of Game.cycle. When one of them writes to
+or traps a CPU stepped at once which comes later in the board, that CPU is put back to the start of the
+cycle and executed in its turn, so each game gives the same result as Game.run.
+
+Only that jump is vectorized: add, sub, move and the other instructions of the warriors go through
+CPU.execute. The gain comes from the empty cells, most of the board, which no longer cost a call each.
+
+When a game ends, by a winner, max_cycles or one of its terminations, its slot is given to the next game
+of the queue. The view, the recorder and the publisher of the games are not used.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import List, Union
+    from game import Game
+
+from collections import deque
+import heapq
+
+import numpy as np
+
+from cpu import CPU, Flags, PC
+
+MEMORY_SIZE = 256
+# first byte of jmp with an immediate value
+JUMP_IMMEDIATE = 0xd4
+TIMER_ENABLED = 0xD
+
+
+class LaneFlags(Flags):
+    """Flags of a CPU kept in the flags array of the batch, once they are computed"""
+
+    def __init__(self, flags: np.ndarray, slot: int, cell: int):
+        self.flags = flags
+        self.slot = slot
+        self.cell = cell
+        self.result = None
+        self.carry = 0
+        self.compare = False
+
+    @property
+    def stored(self) -> int:
+        return self.flags[self.slot, self.cell]
+
+    @stored.setter
+    def stored(self, value: int):
+        self.flags[self.slot, self.cell] = value
+
+
+class BatchEngine:
+    slots: int
+    queue: deque[tuple[int, Game]]
+    results: List[Union[int, None]]
+
+    def __init__(self, slots: int = 64):
+        """
+        Args:
+            slots (int, optional): number of games stepped together. Defaults to 64.
+        """
+        self.slots = slots
+        self.queue = deque()
+        self.results = []
+        self.games = [None] * slots
+        self.tickets = [None] * slots
+        self.saved = [None] * slots
+        self.cpus = [None] * slots
+        self.memory = None
+
+    def submit(self, game: Game) -> int:
+        """Queue a game, its players must already be placed
+
+        Returns:
+            int: the index of the game in the results of run
+        """
+        self.queue.append((len(self.results), game))
+        self.results.append(None)
+        return len(self.results) - 1
+
+    def run(self) -> List[int]:
+        """Run every queued game to its end
+
+        Returns:
+            List[int]: for every game submitted, 1 or 2 for the winning player, 0 for a draw
+        """
+        while True:
+            for slot in range(self.slots):
+                while self.games[slot] is None and self.queue:
+                    self.__load(slot, *self.queue.popleft())
+            active = [slot for slot in range(self.slots) if self.games[slot] is not None]
+            if not active:
+                return self.results
+            self.cycle()
+            for slot in active:
+                result = self.__result(slot)
+                if result is not None:
+                    self.__retire(slot, result)
+
+    def cycle(self):
+        """Execute one instruction on every cpu of every game of the batch"""
+        active = np.array([game is not None for game in self.games])
+        registers = self.registers
+        memory = self.memory
+        pcs = registers[:, :, PC].copy()
+        valid = ((pcs >= 0) & (pcs < MEMORY_SIZE - 1)).astype(bool)
+        index = np.where(valid, pcs, 0).astype(np.intp)[..., None]
+        opcode = np.take_along_axis(memory, index, 2)[..., 0]
+        target = np.take_along_axis(memory, index + 1, 2)[..., 0]
+        timer = memory[:, :, TIMER_ENABLED]
+        fast = active[:, None] & valid & (opcode == JUMP_IMMEDIATE) & (timer != 1) & (timer != 2)
+        registers[:, :, PC][fast] = target[fast].tolist()
+
+        self.old_pcs = pcs
+        slots, cells = np.nonzero(active[:, None] & ~fast)
+        for slot in np.flatnonzero(active):
+            self.games[slot].current_cycle += 1
+            self.slot = slot
+            self.fast = fast[slot]
+            self.pending = cells[slots == slot].tolist()
+            self.position = -1
+            cpus = self.cpus[slot]
+            while self.pending:
+                self.position = heapq.heappop(self.pending)
+                cpus[self.position].execute()
+
+    def memory_write(self, origin: CPU, target: CPU, address: int, value: int):
+        self.__demote(target)
+
+    def interruption(self, cpu: CPU, vector: int):
+        self.__demote(cpu)
+
+    def trap(self, origin: CPU, target: CPU):
+        pass
+
+    def __demote(self, cpu: CPU):
+        """Execute with CPU.execute a cpu stepped at once which is changed before its turn"""
+        cell = cpu.pos_y * self.width + cpu.pos_x
+        if cell > self.position and self.fast[cell]:
+            self.fast[cell] = False
+            self.registers[self.slot, cell, PC] = self.old_pcs[self.slot, cell]
+            heapq.heappush(self.pending, cell)
+
+    def __allocate(self, game: Game):
+        self.width = len(game.board[0])
+        cells = self.width * len(game.board)
+        self.memory = np.zeros((self.slots, cells, MEMORY_SIZE), dtype=np.uint8)
+        self.registers = np.zeros((self.slots, cells, 8), dtype=object)
+        self.flags = np.zeros((self.slots, cells), dtype=object)
+
+    def __load(self, slot: int, ticket: int, game: Game):
+        if game.current_cycle >= game.max_cycles:
+            self.results[ticket] = self.__count(game, self.__colors(game))
+            return
+        if self.memory is None:
+            self.__allocate(game)
+        cpus = [cpu for array in game.board for cpu in array]
+        saved = []
+        for cell, cpu in enumerate(cpus):
+            self.memory[slot, cell] = np.frombuffer(bytes(cpu.memory), dtype=np.uint8)
+            self.registers[slot, cell] = cpu.registers
+            self.flags[slot, cell] = cpu.flags.value
+            saved.append((cpu.flags, cpu.tracer))
+            cpu.memory = memoryview(self.memory[slot, cell])
+            cpu.registers = self.registers[slot, cell]
+            cpu.flags = LaneFlags(self.flags, slot, cell)
+            cpu.tracer = self
+        for termination in game.terminations:
+            termination.start(game)
+        self.games[slot] = game
+        self.tickets[slot] = ticket
+        self.saved[slot] = saved
+        self.cpus[slot] = cpus
+
+    def __retire(self, slot: int, result: int):
+        """Put the state of the cpus back in the game and free the slot"""
+        for cell, (cpu, (flags, tracer)) in enumerate(zip(self.cpus[slot], self.saved[slot])):
+            cpu.memory = bytearray(self.memory[slot, cell])
+            cpu.registers = self.registers[slot, cell].tolist()
+            flags.value = cpu.flags.value
+            cpu.flags = flags
+            cpu.tracer = tracer
+        self.results[self.tickets[slot]] = result
+        self.games[slot] = self.tickets[slot] = self.saved[slot] = self.cpus[slot] = None
+
+    def __result(self, slot: int) -> Union[int, None]:
+        """The result of Game.run once the game of the slot is over, None while it goes on"""
+        game = self.games[slot]
+        colors = self.memory[slot, :, 0].astype(np.int64) << 8 | self.memory[slot, :, 1]
+        first_color = colors[0]
+        if first_color and (colors == first_color).all():
+            return 1 if first_color == game.player1_color else 2
+        if game.terminations:
+            for termination in game.terminations:
+                result = termination.check(game, colors.tolist())
+                if result is not None:
+                    return result
+        if game.current_cycle >= game.max_cycles:
+            return self.__count(game, colors)
+        return None
+
+    @staticmethod
+    def __colors(game: Game) -> np.ndarray:
+        return np.array([cpu.memory[0] << 8 | cpu.memory[1] for array in game.board for cpu in array])
+
+    @staticmethod
+    def __count(game: Game, colors: np.ndarray) -> int:
+        player1_count = np.count_nonzero(colors == game.player1_color)
+        player2_count = np.count_nonzero((colors == game.player2_color) & (colors != game.player1_color))
+        if player1_count > player2_count:
+            return 1
+        elif player1_count < player2_count:
+            return 2
+        return 0
@@ -0,0 +1,118 @@
+"""Benchmarks of the simulation
+
+Measures the cycles per second of a match played with Game.cycle, without view nor termination, and the
+instructions per second of CPU.run on the first warrior alone. The best of several repeats is kept.
+--synchronous, --tiles and --speculative play the same match with an engine as well and print its gain over Game.cycle,
+the start of the engine included. With --batch, the same matches are also played one after the other and
+together with the BatchEngine.
+
+    python codewar.py bench guerrier1.bin guerrier2.bin --cycles 500 --repeat 5 --batch 32
+    python codewar.py bench guerrier1.bin guerrier2.bin --size 64 --cycles 1000 --tiles 2x2
+    python codewar.py bench guerrier1.bin guerrier2.bin --cycles 1000 --speculative 2
+"""
+from __future__ import annotations
+
+import argparse
+import pathlib
+import time
+
+from cpu import CPU
+from game import BOARD_SIZE, DEFAULT_FILE, Game
+from host import Host
+from tournament import PLAYER1_COLOR, PLAYER2_COLOR
+
+
+def bench_match(player1: bytes, player2: bytes, cycles: int, engine=None, seed: int = 0, board_size: int = BOARD_SIZE) -> float:
+    """Play the cycles of a match and return the cycles per second"""
+    game = Game(cycles, headless=True, seed=seed, engine=engine, board_size=board_size)
+    game.place_players(CPU.load_from_bytes(player1, game, PLAYER1_COLOR), CPU.load_from_bytes(player2, game, PLAYER2_COLOR))
+    start = time.perf_counter()
+    game.run()
+    return game.current_cycle / (time.perf_counter() - start)
+
+
+def bench_batch(player1: bytes, player2: bytes, cycles: int, games: int) -> tuple[float, float]:
+    """Play some matches with Game.run then with the BatchEngine and return the matches per second of each
+
+    The matches have no termination, both ways play all their cycles.
+    """
+    from batch import BatchEngine
+
+    def create_games() -> list[Game]:
+        matches = []
+        for seed in range(games):
+            game = Game(cycles, headless=True, seed=seed)
+            game.place_players(CPU.load_from_bytes(player1, game, PLAYER1_COLOR), CPU.load_from_bytes(player2, game, PLAYER2_COLOR))
+            matches.append(game)
+        return matches
+
+    matches = create_games()
+    start = time.perf_counter()
+    sequential = [game.run() for game in matches]
+    sequential_time = time.perf_counter() - start
+    engine = BatchEngine(games)
+    for game in create_games():
+        engine.submit(game)
+    start = time.perf_counter()
+    batched = engine.run()
+    batched_time = time.perf_counter() - start
+    if batched != sequential:
+        raise RuntimeError("the batch engine does not give the results of Game.run")
+    return games / sequential_time, games / batched_time
+
+
+def bench_run(program: bytes, budget: int) -> float:
+    """Execute a warrior alone with CPU.run and return the instructions per second"""
+    cpu = Host.load(program, PLAYER1_COLOR)
+    start = time.perf_counter()
+    result = cpu.run(budget)
+    return result.instructions / (time.perf_counter() - start)
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser("bench", description="Measure the speed of the simulation")
+    parser.add_argument("warriors", help="object or binary files of the two players, the default program when missing", nargs="*")
+    parser.add_argument("-c", "--cycles", help="number of cycles of the match", type=int, default=200)
+    parser.add_argument("-b", "--budget", help="instructions executed by CPU.run", type=int, default=100000)
+    parser.add_argument("-r", "--repeat", help="number of measures, the best is kept", type=int, default=3)
+    parser.add_argument("-s", "--size", help="number of cpus on a side of the board", type=int, default=BOARD_SIZE)
+    parser.add_argument("--synchronous", help="also play the match with the synchronous engine", action="store_true")
+    parser.add_argument("--tiles", help="also play the match with the tile engine, COLUMNSxROWS tiles", type=str, default=None)
+    parser.add_argument("--speculative", help="also play the match with the speculative engine and this many workers", type=int, default=None)
+    parser.add_argument("--batch", help="also play this many matches one by one and with the batch engine", type=int, default=None)
+    args = parser.parse_args(argv)
+    paths = (args.warriors + [DEFAULT_FILE, DEFAULT_FILE])[:2]
+    player1, player2 = (pathlib.Path(path).read_bytes() for path in paths)
+
+    engines = {}
+    if args.synchronous:
+        from synchronous import SynchronousEngine
+
+        engines["SynchronousEngine"] = SynchronousEngine
+    if args.tiles is not None:
+        from tiles import TileEngine
+
+        columns, rows = (int(count) for count in args.tiles.split("x"))
+        engines[f"TileEngine {columns}x{rows}"] = lambda: TileEngine(columns, rows)
+    if args.speculative is not None:
+        from speculative import SpeculativeEngine
+
+        engines[f"SpeculativeEngine {args.speculative}"] = lambda: SpeculativeEngine(args.speculative)
+
+    match = max(bench_match(player1, player2, args.cycles, board_size=args.size) for _ in range(args.repeat))
+    run = max(bench_run(player1, args.budget) for _ in range(args.repeat))
+    print(f"partie : {match:.0f} cycles/s")
+    for name, create_engine in engines.items():
+        speed = max(bench_match(player1, player2, args.cycles, create_engine(), board_size=args.size) for _ in range(args.repeat))
+        print(f"{name} : {speed:.0f} cycles/s (x{speed / match:.1f})")
+    print(f"CPU.run : {run:.0f} instructions/s")
+    if args.batch is not None:
+        measures = [bench_batch(player1, player2, args.cycles, args.batch) for _ in range(args.repeat)]
+        sequential = max(measure[0] for measure in measures)
+        batched = max(measure[1] for measure in measures)
+        print(f"parties une par une : {sequential:.2f} parties/s")
+        print(f"BatchEngine : {batched:.2f} parties/s (x{batched / sequential:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Single entry point of the tools of codeWar
+
+    python codewar.py <command> [arguments]
+
+Each command is the main function of a module, imported only when the command is run, so the help and
+the compiler start without loading the CPU, NumPy or the engines. The arguments after the command are
+given to its main, python codewar.py <command> --help shows them.
+"""
+import importlib
+import sys
+
+# module and description of each command
+COMMANDS = {
+    "compile": ("compiler", "compile an assembly file to a .bin or an object file"),
+    "play": ("game", "play a match in the terminal"),
+    "run": ("try_run", "run a warrior alone with CPU.run"),
+    "tournament": ("tournament", "play every pairing of the warriors"),
+    "replay": ("replay", "show a recorded match"),
+    "debug": ("debugger", "debug a match between two warriors"),
+    "bench": ("bench", "measure the speed of the simulation"),
+}
+
+
+def usage() -> str:
+    lines = ["usage: codewar <command> [arguments]", "", "commands:"]
+    width = max(len(command) for command in COMMANDS)
+    lines += [f"  {command:<{width}}  {description}" for command, (_, description) in COMMANDS.items()]
+    return "\n".join(lines)
+
+
+def main(argv: list[str] = None) -> int:
+    """Run the command of the arguments
+
+    Returns:
+        int: the exit status, 2 when the command is unknown
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return 0 if argv else 2
+    command = argv[0]
+    if command not in COMMANDS:
+        print(f"codewar: unknown command {command}\n{usage()}", file=sys.stderr)
+        return 2
+    module = importlib.import_module(COMMANDS[command][0])
+    module.main(argv[1:])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
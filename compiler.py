@@ -2,7 +2,6 @@ import argparse
 import pathlib
 
 from data import INSTRUCTIONS, OPERANDS, OPERAND_TYPE
-from cpu import MemoryType
 
 
 def build_bin_instruction(name: str, args: list[str]) -> int:
@@ -113,8 +112,8 @@ def build_move_istruction_bin(instruction_name: str, args: str) -> int:
     if destination_type_bin == -1:
         destination_type_bin = get_inderect_arg_type_bin(destination)
     byte |= (destination_type_bin << 19)
-    source_type = MemoryType(source_type_bin)
-    if source_type == MemoryType.immediate_value or source_type == MemoryType.address:
+    # the immediate value or the address is the second word, after the destination register
+    if source_type_bin == OPERAND_TYPE["#"] or source_type_bin == OPERAND_TYPE["@"]:
         destination_bin = get_arg_bin(destination)
         byte |= (destination_bin << 16)
         source_bin = get_arg_bin(source)
@@ -196,31 +195,47 @@ def get_arg_type_bin(first_char: str) -> int:
     return binary
 
 
-parser = argparse.ArgumentParser("compiler", description="compile an assembly file for codewar. All numbers are considered hex")
-parser.add_argument("file", help="A path to the assembly file to compile. No function authorized, only strict assembly instructions. Empty lines and comments starting with # authorized. Inline comments are not supported", type=str)
-args = parser.parse_args()
-file_path: pathlib.Path = pathlib.Path(args.file)
+def compile_file(file_path: pathlib.Path, as_object: bool = False) -> pathlib.Path:
+    """Compile an assembly file next to it, in file.asm.bin or in the object file file.asm.cwo
 
-file = open(file_path, mode="r", encoding="UTF-8")
-
-data = []
+    Returns:
+        pathlib.Path: the path of the file written
+    """
+    with open(file_path, mode="r", encoding="UTF-8") as file:
+        data = []
+        for line in file.readlines():
+            if line == "" or line.startswith("#"):
+                continue
+            instruction = line.split(" ")
+            name = instruction[0]
+            args = instruction[1:]
+            data.append(build_bin_instruction(name, args))
+
+    new_data = []
+    for byte_list in data:
+        for byte in byte_list:
+            new_data.append(byte)
+    to_write = bytes(new_data)
+
+    if as_object:
+        # the object file decodes the code with the CPU, only imported when it is needed
+        from objfile import build_object
+
+        to_write = build_object(to_write)
+        destination = pathlib.Path(f"{file_path}.cwo")
+    else:
+        destination = pathlib.Path(f"{file_path}.bin")
+    destination.write_bytes(to_write)
+    return destination
 
-for line in file.readlines():
-    if line == "" or line.startswith("#"):
-        continue
-    instruction = line.split(" ")
-    name = instruction[0]
-    args = instruction[1:]
-    data.append(build_bin_instruction(name, args))
 
-new_data = []
-for byte_list in data:
-    for byte in byte_list:
-        new_data.append(byte)
-to_write = bytes(new_data)
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser("compiler", description="compile an assembly file for codewar. All numbers are considered hex")
+    parser.add_argument("file", help="A path to the assembly file to compile. No function authorized, only strict assembly instructions. Empty lines and comments starting with # authorized. Inline comments are not supported", type=str)
+    parser.add_argument("-o", "--object", help="write a precompiled object file (.cwo) with its decode table instead of a raw .bin", action="store_true")
+    args = parser.parse_args(argv)
+    compile_file(pathlib.Path(args.file), args.object)
 
-destination = open(file.name + ".bin", mode="wb")
-destination.write(to_write)
 
-destination.close()
-file.close()
+if __name__ == "__main__":
+    main()
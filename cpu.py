@@ -6,13 +6,22 @@ if TYPE_CHECKING:
     from typing import List, Callable, Union
     from pathlib import Path
     from game import Game
+    from host import Host
+    from recorder import TraceRecorder
+    from interrupts import InterruptController
+
+from functools import partial
 
 from inspect import signature
 
 from enum import Enum
 
+from typing import NamedTuple
+
 from random import randint
 
+import sys
+
 from exception import OutOfBoundsError, Interruption
 
 PC = 6
@@ -20,6 +29,14 @@ SP = 7
 ILLEGAL = 2
 TIMER = 3
 TRAP = 4
+TIMER_ENABLED = 0xD
+# adjacent instructions executed by a single handler in CPU.run
+FUSED_PAIRS = {
+    ("cmp", "branch_not_equal"),
+    ("cmp", "branch_equal"),
+    ("move", "add"),
+    ("push", "jsr"),
+}
 
 
 class MoveType(Enum):
@@ -37,11 +54,64 @@ class MemoryType(Enum):
     address = 0b101
 
 
+# sources which do not change the registers
+READ_ONLY_SOURCES = (MemoryType.register, MemoryType.inderect_addressing, MemoryType.immediate_value, MemoryType.address)
+
+
+class RunResult(NamedTuple):
+    instructions: int
+    interruptions: int
+    fused: int
+    # why CPU.run stopped: "budget", "pc" or "interruption"
+    reason: str
+
+
 class Flags:
-    value: int
+    """The C, Z and N flags, in the bits 0, 1 and 2 of value
+
+    The arithmetic and logic instructions only record their result, the carry and the kind of result
+    with record. The flags are computed from them the first time value is read, most results are
+    overwritten by the next instruction before any branch reads them.
+    """
+    stored: int
+    result: Union[int, None]
 
     def __init__(self) -> None:
-        self.value = 0
+        self.stored = 0
+        self.result = None
+        self.carry = 0
+        self.compare = False
+
+    @property
+    def value(self) -> int:
+        result = self.result
+        if result is not None:
+            # same bits as reset then set_c, set_z and set_n
+            negative = result < 0 if self.compare else result >> 15
+            self.stored = self.carry | ((result == 0) << 1) | (negative << 2)
+            self.result = None
+        return self.stored
+
+    @value.setter
+    def value(self, value: int):
+        self.stored = value
+        self.result = None
+
+    def record(self, result: int, carry: int = 0, compare: bool = False):
+        """Set the flags from the result of an instruction, like reset then set_c, set_z and set_n
+
+        Args:
+            result (int): the result, Z is set when it is 0 and N is result >> 15
+            carry (int, optional): the C flag. Defaults to 0.
+            compare (bool, optional): N is set when the result is negative, for cmp. Defaults to False.
+        """
+        self.result = result
+        self.carry = carry
+        self.compare = compare
+
+    def accumulate(self, negative: int, zero: bool):
+        """Add N and Z to the flags without a reset, like set_c(False), set_n and set_z"""
+        self.value = self.value | (negative << 2) | (zero << 1)
 
     def reset(self):
         self.value = 0
@@ -70,16 +140,71 @@ class Flags:
         return self.value & 0xffff
 
 
+class CopyOnWriteMemory:
+    """Memory of a CPU shared with the other CPUs loaded with the same image, until it is written
+
+    Reads come from the immutable image. The first write, by the CPU itself or by another one,
+    gives the CPU a private copy of the image (see CPU.materialize) which replaces this object.
+    """
+    __slots__ = ("image", "cpu")
+
+    def __init__(self, image: bytes, cpu: CPU):
+        self.image = image
+        self.cpu = cpu
+
+    def __len__(self) -> int:
+        return len(self.image)
+
+    def __getitem__(self, key):
+        return self.image[key]
+
+    def __iter__(self):
+        return iter(self.image)
+
+    def __bytes__(self) -> bytes:
+        return self.image
+
+    def __buffer__(self, flags: int) -> memoryview:
+        # read-only view of the image, used by memoryview and bytearray from Python 3.12
+        return memoryview(self.image)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, CopyOnWriteMemory):
+            other = other.image
+        return self.image == other
+
+    def __setitem__(self, key, value):
+        self.cpu.materialize()[key] = value
+
+
 class CPU:
     memory: bytearray
     registers: List[int]
     instructions: dict[str, Callable]
     flags: Flags
-    game: Game
+    game: Union[Game, Host]
     pos_x: int
     pos_y: int
     current_cycle: int
+    decode_cache: dict[int, tuple[bytes, int, tuple]]
+    tracer: Union[TraceRecorder, None] = None
+    # interruptions received since the creation of the CPU
+    interruptions: int = 0
+    # delivers the interruptions at the start of execute instead of at once, see interrupts
+    interrupts: Union[InterruptController, None] = None
+    # vectors posted to the interrupt controller and not delivered yet
+    pending: Union[List[int], tuple] = ()
+    # ranges of the memory watched with watch, None while nothing watches the CPU
+    watchers: Union[List[tuple[int, int, Union[Callable, None]]], None] = None
+    # bit n is set when the byte n was written since the last take_dirty, kept while the CPU is watched
+    dirty: int = 0
     NON_INSTRUCTION_FUNC = ["execute", "decode", "run"]
+    # name of the specialized handler of each (MoveType, source MemoryType, destination MemoryType)
+    move_handlers: dict[tuple[MoveType, MemoryType, MemoryType], str] = {}
+    # names of the instructions and of the move handlers, the keys of instructions
+    instruction_handlers: list[str] = []
+    # (MoveType, source MemoryType, destination MemoryType) of each move handler
+    move_kinds: dict[str, tuple[MoveType, MemoryType, MemoryType]] = {}
     instruction_names = {
         0x00: "move",
         0x01: "push",
@@ -114,42 +239,259 @@ class CPU:
         0x1E: "rte",
     }
 
-    def __init__(self, game: Game, memory=bytearray(256)):
+    def __init__(self, game: Union[Game, Host] = None, memory: bytearray = None):
+        """
+        Args:
+            game (Union[Game, Host], optional): the board of the CPU, see host for a CPU outside of a Game.
+            Defaults to None.
+            memory (bytearray, optional): the memory of the CPU. Defaults to a new empty memory.
+        """
         self.game = game
-        self.memory = memory
+        self.memory = bytearray(256) if memory is None else memory
         self.registers = [0, 0, 0, 0, 0, 0, 0, 0]
         self.flags = Flags()
-        self.instructions = {name: getattr(self, name) for name in dir(self)}
+        self.instructions = {name: getattr(self, name) for name in self.instruction_handlers}
         self.current_cycle = 0
+        self.decode_cache = {}
+
+    def run(self, budget: int = None, stop_at: int = None, stop_on_interrupt: bool = False) -> RunResult:
+        """Execute the instructions of the CPU alone, without the other CPUs of the game
+
+        Nothing can see the CPU between two instructions while the timer is off and no tracer is set,
+        adjacent pairs of FUSED_PAIRS are then executed by a single handler. The state of the CPU is the
+        one given by as many calls to execute.
+
+        Args:
+            budget (int, optional): number of instructions to execute, no limit when None. Defaults to None.
+            stop_at (int, optional): stop before executing the instruction at this PC. Defaults to None.
+            stop_on_interrupt (bool, optional): stop after an instruction which interrupted the CPU, or when a pending
+            interruption is delivered with an interrupt controller. Defaults to False.
 
-    def run(self):
+        Returns:
+            RunResult: the instructions executed, the interruptions, the fused pairs executed and why the run stopped
+        """
+        memory = self.materialize()
+        registers = self.registers
+        execute = self.execute
+        timer = self.__timer
+        compile_at = self.__compile
+        fusing = self.tracer is None
+        controlled = self.interrupts is not None
+        limit = sys.maxsize if budget is None else budget
+        # handlers of the instructions by pc, checked against the memory like the decode cache
+        code = {}
+        interruptions = self.interruptions
+        executed = 0
+        fused = 0
         while True:
-            self.execute()
+            if controlled and self.pending:
+                # delivered here rather than by execute, to stop with the interruption
+                self.interrupts.drain(self)
+                if stop_on_interrupt:
+                    reason = "interruption"
+                    break
+            pc = registers[PC]
+            if pc == stop_at:
+                reason = "pc"
+                break
+            if executed >= limit:
+                reason = "budget"
+                break
+            entry = code.get(pc)
+            if entry is None or memory[pc: pc + len(entry[0])] != entry[0]:
+                entry = compile_at(pc)
+                if entry is None:
+                    execute()
+                    executed += 1
+                    if stop_on_interrupt and self.interruptions != interruptions:
+                        reason = "interruption"
+                        break
+                    continue
+                code[pc] = entry
+            instruction, next_pc, handler, superinstruction, second = entry
+            enabled = memory[TIMER_ENABLED]
+            if (
+                superinstruction is not None and enabled != 1 and enabled != 2 and fusing
+                and executed + 2 <= limit and next_pc != stop_at
+                and memory[next_pc: next_pc + len(second)] == second
+            ):
+                count = superinstruction()
+                executed += count
+                fused += count - 1
+            else:
+                registers[PC] = next_pc
+                try:
+                    handler()
+                except Exception:
+                    pass
+                executed += 1
+            enabled = memory[TIMER_ENABLED]
+            if enabled == 1 or enabled == 2:
+                timer()
+            if stop_on_interrupt and self.interruptions != interruptions:
+                reason = "interruption"
+                break
+        return RunResult(executed, self.interruptions - interruptions, fused, reason)
+
+    def __compile(self, pc: int) -> Union[tuple, None]:
+        """Bind the decoded instruction at pc to its operands for run, and fuse it with the next one if it can be
+
+        Returns:
+            Union[tuple, None]: the bytes of the instruction, the next pc, the handler, the superinstruction and
+            the bytes of the second instruction of the pair, None when the instruction is not decoded yet
+        """
+        cached = self.decode_cache.get(pc)
+        if cached is None or self.memory[pc: pc + len(cached[0])] != cached[0]:
+            return None
+        instruction, size, values = cached
+        handler = partial(self.instructions[values[0]], *values[1:])
+        second_pc = pc + size
+        second = self.decode_cache.get(second_pc)
+        if second is None or self.memory[second_pc: second_pc + len(second[0])] != second[0]:
+            second = self.__decode_at(second_pc)
+        if second is None:
+            return (instruction, second_pc, handler, None, b"")
+        return (instruction, second_pc, handler, self.__fuse(pc, cached, second), second[0])
+
+    def __fuse(self, pc: int, first: tuple, second: tuple) -> Union[Callable, None]:
+        """Build the superinstruction of a pair of instructions, see run
+
+        The first instruction of a pair never changes the PC, the second one starts right after it.
+
+        Returns:
+            Union[Callable, None]: the superinstruction, returning the number of instructions executed,
+            None when the pair can not be fused
+        """
+        _, size1, first = first
+        bytes2, size2, second = second
+        name = first[0]
+        kind = self.move_kinds.get(name)
+        if (name if kind is None else "move", second[0]) not in FUSED_PAIRS:
+            return None
+        if kind is not None:
+            _, source_type, destination_type = kind
+            direct = source_type == MemoryType.immediate_value or source_type == MemoryType.address
+            destination = first[1] if direct else first[2]
+            if source_type not in READ_ONLY_SOURCES or destination_type != MemoryType.register or destination == PC:
+                return None
+        elif name == "push":
+            if first[1] not in (MemoryType.register, MemoryType.immediate_value):
+                return None
+        elif first[1] not in READ_ONLY_SOURCES:
+            return None
+
+        registers = self.registers
+        memory = self.memory
+        flags = self.flags
+        middle = pc + size1
+        end = middle + size2
+        immediate = MemoryType.immediate_value
+        simple = (MemoryType.register, immediate)
+
+        if name == "cmp" and second[1] == immediate and first[1] in simple and PC not in first[2:]:
+            # cmp #n or Rn with a branch by an immediate offset, written out
+            source_type, source, destination = first[1:]
+            offset = second[2]
+            branch_when_zero = second[0] == "branch_equal"
+            # cmp reads the register of the source for C even with an immediate value, C stays clear without it
+            carry_register = source < len(registers)
+            if source_type == immediate or carry_register:
+                def superinstruction() -> int:
+                    left = registers[destination]
+                    result = left - (source if source_type == immediate else registers[source])
+                    flags.record(result, left < registers[source] if carry_register else 0, True)
+                    registers[PC] = end + offset if (result == 0) == branch_when_zero else end
+                    return 2
+
+                return superinstruction
+
+        if kind == (MoveType.default, immediate, MemoryType.register) and second[1] in simple and PC not in second[2:]:
+            # move #n, Rn then add #n or Rn to a register, written out
+            move_destination, move_value = first[1:]
+            source_type, source, destination = second[1:]
+            if source_type == immediate or source < len(registers):
+                def superinstruction() -> int:
+                    registers[move_destination] = move_value
+                    flags.accumulate(move_value >> 15, move_value == 0)
+                    total = registers[destination] + (source if source_type == immediate else registers[source])
+                    flags.record(total, total > 0xFFFF)
+                    registers[destination] = total & 0xFFFF
+                    registers[PC] = end
+                    return 2
+
+                return superinstruction
+
+        handler1 = partial(self.instructions[name], *first[1:])
+        handler2 = partial(self.instructions[second[0]], *second[1:])
+        # push writes the stack, which may hold the second instruction or the timer
+        writes = name == "push"
+
+        def superinstruction() -> int:
+            registers[PC] = middle
+            try:
+                handler1()
+            except Exception:
+                pass
+            if writes:
+                enabled = memory[TIMER_ENABLED]
+                if enabled == 1 or enabled == 2 or memory[middle: end] != bytes2:
+                    return 1
+            registers[PC] = end
+            try:
+                handler2()
+            except Exception:
+                pass
+            return 2
+
+        return superinstruction
 
     def execute(self):
         """
         execute the instruction at the current PC
         Because of the way the full move instruction is encoded
         we need to check if the instruction is move or not for the PC incrementation
+
+        Decoded instructions are kept in the decode cache with the bytes they were decoded from,
+        an entry is only reused while those bytes are still in memory at the same address
         """
-        instruction = self.memory[self.registers[PC]: self.registers[PC] + 2]
-        try:
-            values = self.decode(instruction)
-        except Exception:
-            self.interruption(ILLEGAL)
-            return
-        if values[0] == "move":
-            instruction = self.memory[self.registers[PC]: self.registers[PC] + 4]
-            values = self.decode(instruction)
-            self.registers[PC] += 4
-        else:
-            self.registers[PC] += 2
+        if self.pending:
+            self.interrupts.drain(self)
+        pc = self.registers[PC]
+        cached = self.decode_cache.get(pc)
+        if cached is None or self.memory[pc: pc + len(cached[0])] != cached[0]:
+            cached = self.__decode_at(pc)
+            if cached is None:
+                self.__interrupt(self, ILLEGAL)
+                return
+        _, size, values = cached
+        self.registers[PC] += size
         try:
             self.instructions[values[0]](*values[1:])
         except Exception:
             pass
         self.__timer()
 
+    def __decode_at(self, pc: int) -> Union[tuple, None]:
+        """Decode the instruction at pc and keep it in the decode cache
+
+        Returns:
+            Union[tuple, None]: the entry of the decode cache, None for an illegal instruction
+        """
+        instruction = self.memory[pc: pc + 2]
+        try:
+            values = self.decode(instruction)
+            if values[0] == "move":
+                instruction = self.memory[pc: pc + 4]
+                values = self.specialize(self.decode(instruction))
+                size = 4
+            else:
+                size = 2
+        except Exception:
+            return None
+        cached = (bytes(instruction), size, values)
+        self.decode_cache[pc] = cached
+        return cached
+
     def decode(self, instruction: bytearray) -> tuple:
         """Decode an instruction to retrieve the instruction name and operands
 
@@ -189,6 +531,9 @@ class CPU:
 
     def interruption(self, interruption_vector: int):
         """Branch to the interruption vector"""
+        self.interruptions += 1
+        if self.tracer is not None:
+            self.tracer.interruption(self, interruption_vector)
         self.push(MemoryType.register, PC)
         self.registers[PC] = self.memory[interruption_vector]
         self.push(MemoryType.immediate_value, self.flags.get())
@@ -201,10 +546,87 @@ class CPU:
             cycle_increment = self.memory[0xC]
             if self.current_cycle == cycle_increment:
                 self.current_cycle = 0
-                self.memory[0xB] += 1
+                self.__write(self, 0xB, self.memory[0xB] + 1)
                 if self.memory[0xB] == self.memory[0xA]:
-                    self.memory[0xD] = 0 if enabled == 1 else 2
-                    self.interruption(TIMER)
+                    self.__write(self, 0xD, 0 if enabled == 1 else 2)
+                    self.__interrupt(self, TIMER)
+
+    def __interrupt(self, cpu: CPU, interruption_vector: int):
+        """Interrupt a cpu, self or a cpu returned by __get_relative_cpu, at once or by the interrupt controller"""
+        if self.interrupts is None:
+            cpu.interruption(interruption_vector)
+        else:
+            self.interrupts.post(cpu, interruption_vector)
+
+    def __write(self, cpu: CPU, address: int, value: int):
+        """Write a byte in the memory of a cpu, all the writes done by the instructions go through here
+
+        Args:
+            cpu (CPU): the cpu owning the memory, self or a cpu returned by __get_relative_cpu
+            address (int): the address in the memory of the cpu
+            value (int): the byte to write
+        """
+        cpu.memory[address] = value
+        if self.tracer is not None:
+            self.tracer.memory_write(self, cpu, address, value)
+        if cpu.watchers is not None:
+            cpu.__notify(self, address, value)
+
+    def write(self, address: int, value: int, origin: CPU = None):
+        """Write a byte in the memory of the CPU from outside of its instructions, through the write barrier
+
+        The engines apply the writes of the other CPUs with it. The tracer of the origin is not called,
+        it saw the write when the instruction was executed.
+
+        Args:
+            address (int): the address in the memory
+            value (int): the byte to write
+            origin (CPU, optional): the cpu whose instruction wrote the byte, None when it is not known. Defaults to None.
+        """
+        self.memory[address] = value
+        if self.watchers is not None:
+            self.__notify(origin, address, value)
+
+    def watch(self, start: int, stop: int, callback: Callable[[Union[CPU, None], CPU, int, int], None] = None) -> tuple:
+        """Call back after every write of a byte of the memory between start and stop
+
+        The writes of the instructions and of CPU.write are seen, the writes done directly to cpu.memory are not.
+        While the CPU is watched, the written bytes are also kept in dirty.
+
+        Args:
+            start (int): the first address watched
+            stop (int): the address after the last one watched
+            callback (Callable, optional): called with the origin cpu, the cpu, the address and the value,
+            None to only keep dirty. Defaults to None.
+
+        Returns:
+            tuple: the watcher, to give to unwatch
+        """
+        watcher = (start, stop, callback)
+        if self.watchers is None:
+            self.watchers = []
+        self.watchers.append(watcher)
+        return watcher
+
+    def unwatch(self, watcher: tuple):
+        """Remove a watcher returned by watch, the writes are not checked anymore once the last one is removed"""
+        self.watchers.remove(watcher)
+        if not self.watchers:
+            self.watchers = None
+
+    def take_dirty(self) -> int:
+        """The bitmap of the bytes written since the last call, bit n for the byte n"""
+        dirty = self.dirty
+        self.dirty = 0
+        return dirty
+
+    def __notify(self, origin: Union[CPU, None], address: int, value: int):
+        # the instructions write with negative addresses below the stack
+        address %= len(self.memory)
+        self.dirty |= 1 << address
+        for start, stop, callback in self.watchers:
+            if callback is not None and start <= address < stop:
+                callback(origin, self, address, value)
 
     def __get_number_of_parameters(self, instruction_name: str) -> int:
         return len(signature(self.instructions[instruction_name]).parameters) - 1
@@ -227,170 +649,187 @@ class CPU:
 
     @classmethod
     def load_from_file(cls, file_path: Union[str, Path], game: Game, color=0x0000) -> CPU:
+        """Load a program into a new CPU
+
+        The file is either a precompiled object file (see objfile), whose decode table is mapped
+        into the decode cache of the CPU, or raw instruction bytes loaded at 0x10
+
+        Args:
+            file_path (Union[str, Path]): path of the object or raw binary file
+            game (Game): the game the CPU belongs to
+            color (int, optional): the color written in the first two bytes. Defaults to 0x0000.
+
+        Returns:
+            CPU: the loaded CPU
+        """
         file = open(file_path, "rb")
-        data = bytearray(256)
-        for i, byte in enumerate(file.read()):
-            data[i + 0x10] = byte
+        content = file.read()
         file.close()
+        return cls.load_from_bytes(content, game, color)
+
+    @classmethod
+    def from_image(cls, image: bytes, game: Game, entry: int = 0x10, decode_cache: dict = None) -> CPU:
+        """Create a CPU whose memory is a copy-on-write view of a memory image
+
+        Args:
+            image (bytes): the memory shared until the first write
+            game (Game): the game the CPU belongs to
+            entry (int, optional): the first PC. Defaults to 0x10.
+            decode_cache (dict, optional): decode cache shared by the CPUs of the image, the entries are checked
+            against the memory of the CPU using them. Defaults to a new cache.
+
+        Returns:
+            CPU: the CPU
+        """
+        cpu = cls(game, bytearray(0))
+        cpu.memory = CopyOnWriteMemory(image, cpu)
+        cpu.registers[PC] = entry
+        if decode_cache is not None:
+            cpu.decode_cache = decode_cache
+        return cpu
+
+    def materialize(self) -> bytearray:
+        """Give the CPU a private copy of its memory if it still shares an image
+
+        Returns:
+            bytearray: the memory of the CPU
+        """
+        memory = self.memory
+        if type(memory) is CopyOnWriteMemory:
+            memory = bytearray(memory.image)
+            self.memory = memory
+            self.decode_cache = dict(self.decode_cache)
+        return memory
+
+    @classmethod
+    def load_from_bytes(cls, content: bytes, game: Game, color=0x0000) -> CPU:
+        """Load a program into a new CPU from the content of an object or raw binary file
+
+        Args:
+            content (bytes): content of the object or raw binary file
+            game (Game): the game the CPU belongs to
+            color (int, optional): the color written in the first two bytes. Defaults to 0x0000.
+
+        Returns:
+            CPU: the loaded CPU
+        """
+        from objfile import is_object, read_object
+
+        data = bytearray(256)
+        if is_object(content):
+            program = read_object(content)
+            data[program.load_address: program.load_address + len(program.code)] = program.code
+            entry = program.entry
+        else:
+            program = None
+            for i, byte in enumerate(content):
+                data[i + 0x10] = byte
+            entry = 0x10
         data[0] = color >> 8
         data[1] = color & 0xff
         cpu = cls(game, data)
-        cpu.registers[PC] = 0x10
+        cpu.registers[PC] = entry
+        if program is not None:
+            for offset, (size, values) in program.decode_table.items():
+                cpu.decode_cache[offset] = (bytes(data[offset: offset + size]), size, cpu.specialize(values))
         return cpu
 
     def move(self, move_type: MoveType, source_type: MemoryType, destination_type: MemoryType, first_word_value: int, second_word_value: int):
+        self.instructions[self.move_handlers[move_type, source_type, destination_type]](first_word_value, second_word_value)
 
-        if move_type == MoveType.move_h:
-            flag_n, flag_z = self.__move_h(source_type, destination_type, first_word_value, second_word_value)
-        elif move_type == MoveType.move_l:
-            flag_n, flag_z = self.__move_l(source_type, destination_type, first_word_value, second_word_value)
-        else:
-            flag_n, flag_z = self.__move(source_type, destination_type, first_word_value, second_word_value)
-
-        self.flags.set_c(False)
-        self.flags.set_n(flag_n)
-        self.flags.set_z(flag_z)
-
-    def __move(self, source_type: MemoryType, destination_type: MemoryType, first_word_value: int, second_word_value: int):
-        if source_type == MemoryType.address or source_type == MemoryType.immediate_value:
-            if source_type == MemoryType.immediate_value:
-                value = second_word_value
-            if source_type == MemoryType.address:
-                cpu_address = second_word_value >> 8
-                cpu = self.__get_relative_cpu(cpu_address)
-                value = cpu.memory[second_word_value & 0xff]
-
-            if destination_type == MemoryType.register:
-                self.registers[first_word_value] = value
-
-            elif destination_type == MemoryType.pre_decremented_register:
-                self.registers[first_word_value] -= 2
-                self.memory[self.registers[first_word_value]] = value
-
-            elif destination_type == MemoryType.inderect_addressing:
-                self.memory[self.registers[first_word_value]] = value
-
-            elif destination_type == MemoryType.post_incremented_register:
-                self.memory[self.registers[first_word_value]] = value
-                self.registers[first_word_value] += 2
-        else:
-            value = self.__get_source_value(source_type, first_word_value)
-
-            if destination_type == MemoryType.address:
-                cpu_address = second_word_value >> 8
-                cpu = self.__get_relative_cpu(cpu_address)
-                cpu.memory[second_word_value & 0xff] = value & 0xff
-
-            elif destination_type == MemoryType.pre_decremented_register:
-                self.registers[second_word_value] -= 2
-                self.memory[self.registers[second_word_value]] = value & 0xff
-
-            elif destination_type == MemoryType.inderect_addressing:
-                self.memory[self.registers[second_word_value]] = value & 0xff
-
-            elif destination_type == MemoryType.post_incremented_register:
-                self.memory[self.registers[second_word_value]] = value & 0xff
-                self.registers[second_word_value] += 2
-
-            elif destination_type == MemoryType.register:
-                self.registers[second_word_value] = value
-        flag_n = value >> 15
-        flag_z = value == 0
-        return flag_n, flag_z
-
-    def __move_h(self, source_type: MemoryType, destination_type: MemoryType, first_word_value: int, second_word_value: int):
-        if source_type == MemoryType.address or source_type == MemoryType.immediate_value:
-            if source_type == MemoryType.immediate_value:
-                value = second_word_value >> 8
-            if source_type == MemoryType.address:
-                cpu_address = second_word_value >> 8
-                cpu = self.__get_relative_cpu(cpu_address)
-                value = cpu.memory[second_word_value & 0xff]
-
-            if destination_type == MemoryType.register:
-                self.registers[first_word_value] |= value
-
-            elif destination_type == MemoryType.pre_decremented_register:
-                self.registers[first_word_value] -= 1
-                self.memory[self.registers[first_word_value]] = value
-
-            elif destination_type == MemoryType.inderect_addressing:
-                self.memory[self.registers[first_word_value]] = value
-
-            elif destination_type == MemoryType.post_incremented_register:
-                self.memory[self.registers[first_word_value]] = value
-                self.registers[first_word_value] += 1
-        else:
-            value = self.__get_source_value(source_type, first_word_value, special_move=True) >> 8
-
-            if destination_type == MemoryType.address:
-                cpu_address = second_word_value >> 8
-                cpu = self.__get_relative_cpu(cpu_address)
-                cpu.memory[second_word_value & 0xff] = value
-
-            elif destination_type == MemoryType.pre_decremented_register:
-                self.registers[second_word_value] -= 1
-                self.memory[self.registers[second_word_value]] = value
-
-            elif destination_type == MemoryType.inderect_addressing:
-                self.memory[self.registers[second_word_value]] = value
-
-            elif destination_type == MemoryType.post_incremented_register:
-                self.memory[self.registers[second_word_value]] = value
-                self.registers[second_word_value] += 1
-
-            elif destination_type == MemoryType.register:
-                self.registers[second_word_value] |= value
-        flag_n = value >> 7
-        flag_z = value == 0
-        return flag_n, flag_z
-
-    def __move_l(self, source_type: MemoryType, destination_type: MemoryType, first_word_value: int, second_word_value: int):
-        if source_type == MemoryType.address or source_type == MemoryType.immediate_value:
-            if source_type == MemoryType.immediate_value:
-                value = second_word_value & 0xff
-            if source_type == MemoryType.address:
-                cpu_address = second_word_value >> 8
-                cpu = self.__get_relative_cpu(cpu_address)
-                value = cpu.memory[second_word_value & 0xff]
-
-            if destination_type == MemoryType.register:
-                self.registers[first_word_value] |= value
-
-            elif destination_type == MemoryType.pre_decremented_register:
-                self.registers[first_word_value] -= 1
-                self.memory[self.registers[first_word_value]] = value
-
-            elif destination_type == MemoryType.inderect_addressing:
-                self.memory[self.registers[first_word_value]] = value
-
-            elif destination_type == MemoryType.post_incremented_register:
-                self.memory[self.registers[first_word_value]] = value
-                self.registers[first_word_value] += 1
-        else:
-            value = self.__get_source_value(source_type, first_word_value, special_move=True) & 0xff
+    def specialize(self, values: tuple) -> tuple:
+        """Replace a decoded move by its specialized handler, see specialize_move
 
-            if destination_type == MemoryType.address:
-                cpu_address = second_word_value >> 8
-                cpu = self.__get_relative_cpu(cpu_address)
-                cpu.memory[second_word_value & 0xff] = value
+        Args:
+            values (tuple): instruction name and operands, as returned by decode
 
-            elif destination_type == MemoryType.pre_decremented_register:
-                self.registers[second_word_value] -= 1
-                self.memory[self.registers[second_word_value]] = value
+        Returns:
+            tuple: the handler name and operands to execute
+        """
+        if values[0] != "move":
+            return values
+        _, move_type, source_type, destination_type, first_word_value, second_word_value = values
+        return (self.move_handlers[move_type, source_type, destination_type], first_word_value, second_word_value)
 
-            elif destination_type == MemoryType.inderect_addressing:
-                self.memory[self.registers[second_word_value]] = value
+    @classmethod
+    def specialize_move(cls, move_type: MoveType, source_type: MemoryType, destination_type: MemoryType) -> Callable:
+        """Build the handler of a move for one move type and one couple of addressing modes
 
-            elif destination_type == MemoryType.post_incremented_register:
-                self.memory[self.registers[second_word_value]] = value
-                self.registers[second_word_value] += 1
+        With an immediate value or an address as source, the register of the destination is in the first word.
+        Otherwise the first word is the register of the source and the second word is the destination.
+        move.h and move.l move a byte: they step the registers by 1 and OR the byte in a register destination.
 
-            elif destination_type == MemoryType.register:
-                self.registers[second_word_value] |= value
-        flag_n = value >> 7
-        flag_z = value == 0
-        return flag_n, flag_z
+        Returns:
+            Callable: the handler, called with the cpu, the first word value and the second word value
+        """
+        special = move_type != MoveType.default
+        step = 1 if special else 2
+        shift = 7 if special else 15
+
+        if source_type == MemoryType.immediate_value:
+            if move_type == MoveType.move_h:
+                def read(self, first_word_value, second_word_value):
+                    return second_word_value >> 8
+            elif move_type == MoveType.move_l:
+                def read(self, first_word_value, second_word_value):
+                    return second_word_value & 0xff
+            else:
+                def read(self, first_word_value, second_word_value):
+                    return second_word_value
+        elif source_type == MemoryType.address:
+            def read(self, first_word_value, second_word_value):
+                return self.__get_relative_cpu(second_word_value >> 8).memory[second_word_value & 0xff]
+        else:
+            def read(self, first_word_value, second_word_value):
+                return self.__get_source_value(source_type, first_word_value, special_move=special)
+            if move_type == MoveType.move_h:
+                def read(self, first_word_value, second_word_value, read=read):
+                    return read(self, first_word_value, second_word_value) >> 8
+            elif move_type == MoveType.move_l:
+                def read(self, first_word_value, second_word_value, read=read):
+                    return read(self, first_word_value, second_word_value) & 0xff
+
+        # with a direct source the destination is the register of the first word, an address destination is not written
+        destination = 0 if source_type == MemoryType.immediate_value or source_type == MemoryType.address else 1
+        # otherwise move writes the low byte of the value in memory
+        mask = -1 if special or not destination else 0xff
+
+        if destination_type == MemoryType.register:
+            if special:
+                def write(self, words, value):
+                    self.registers[words[destination]] |= value
+            else:
+                def write(self, words, value):
+                    self.registers[words[destination]] = value
+        elif destination_type == MemoryType.pre_decremented_register:
+            def write(self, words, value):
+                register = words[destination]
+                self.registers[register] -= step
+                self.__write(self, self.registers[register], value & mask)
+        elif destination_type == MemoryType.inderect_addressing:
+            def write(self, words, value):
+                self.__write(self, self.registers[words[destination]], value & mask)
+        elif destination_type == MemoryType.post_incremented_register:
+            def write(self, words, value):
+                register = words[destination]
+                self.__write(self, self.registers[register], value & mask)
+                self.registers[register] += step
+        elif destination_type == MemoryType.address and destination:
+            def write(self, words, value):
+                address = words[1]
+                self.__write(self.__get_relative_cpu(address >> 8), address & 0xff, value & mask)
+        else:
+            def write(self, words, value):
+                pass
+
+        def handler(self, first_word_value: int, second_word_value: int):
+            value = read(self, first_word_value, second_word_value)
+            write(self, (first_word_value, second_word_value), value)
+            self.flags.accumulate(value >> shift, value == 0)
+
+        handler.__name__ = f"move_{move_type.name}_{source_type.name}_{destination_type.name}"
+        handler.__qualname__ = f"{cls.__name__}.{handler.__name__}"
+        return handler
 
     def __get_relative_cpu(self, cpu_address: int) -> CPU:
         """Get the target cpu relative to the current cpu
@@ -455,17 +894,9 @@ class CPU:
         self.registers[destination] = self.registers[destination] << source_value
         res = self.registers[destination]
 
-        self.flags.reset()
-
         # ??? FLAG C
         lastbit = self.registers[destination] & 0x8000
-        self.flags.set_c(lastbit >> 15)
-
-        # Flag N
-        self.flags.set_n(res >> 15)
-
-        # Flag Z
-        self.flags.set_z(res == 0)
+        self.flags.record(res, lastbit >> 15)
 
     def i_not(self, source_type: MemoryType, source: int):
         """Do the not operation on the source
@@ -478,9 +909,7 @@ class CPU:
         res = ''.join('1' if bit == '0' else '0' for bit in source_value)[2:]
         res = int(res, 2)
         self.registers[source] = res
-        self.flags.reset()
-        self.flags.set_n(res >> 15)
-        self.flags.set_z(res == 0)
+        self.flags.record(res)
 
     def lsr(self, source_type: MemoryType, source: int, destination: int) -> None:
         """Shift the destination with in argument source
@@ -494,17 +923,9 @@ class CPU:
         self.registers[destination] = self.registers[destination] >> source_value
         res = self.registers[destination]
 
-        self.flags.reset()
-
         # ??? FLAG C
         lastbit = res & 0b1
-        self.flags.set_c(lastbit)
-
-        # Flag N
-        self.flags.set_n(res >> 15)
-
-        # Flag Z
-        self.flags.set_z(res == 0)
+        self.flags.record(res, lastbit)
 
     def sub(self, source_type: MemoryType, source: int, destination: int) -> None:
         """Subtraction source to destination
@@ -518,17 +939,11 @@ class CPU:
         sourceValue = self.__get_source_value(source_type, source)
         self.registers[destination] = destValue - sourceValue
 
-        # Reset
-        self.flags.reset()
-
-        # Flag N
-        self.flags.set_n(self.registers[destination] >> 15)
+        # Flag N and Z from the result
+        self.flags.record(self.registers[destination])
 
-        # Flag Z
-        self.flags.set_z(self.registers[destination] == 0)
-
-        # Flag C
-        self.flags.set_c(self.registers[destination] > self.registers[source])
+        # Flag C, after N and Z as the register of the source may not exist
+        self.flags.carry = self.registers[destination] > self.registers[source]
 
     def cmp(self, source_type: MemoryType, source: int, destination: int) -> None:
         """Change flags for informations on a compare
@@ -540,13 +955,10 @@ class CPU:
 
         sourceValue = self.__get_source_value(source_type, source)
         observableResult: int = self.registers[destination] - sourceValue
-        self.flags.reset()
-        # Flag N
-        self.flags.set_n(observableResult < 0)
-        # Flag Z
-        self.flags.set_z(observableResult == 0)
-        # Flag C
-        self.flags.set_c(self.registers[destination] < self.registers[source])
+        # Flag N when negative and Z
+        self.flags.record(observableResult, compare=True)
+        # Flag C, after N and Z as the register of the source may not exist
+        self.flags.carry = self.registers[destination] < self.registers[source]
 
     def jump_carry_clear(self, source_type: MemoryType, source: int):
         """Sets PC to the value of the destination if carry flag is 0
@@ -649,15 +1061,8 @@ class CPU:
         sourceValue = self.__get_source_value(source_type, source)
         self.registers[destination] = sourceValue + destValue
 
-        self.flags.reset()
-        # Flag N
-        self.flags.set_n(self.registers[destination] >> 15)
-
-        # Flag Z
-        self.flags.set_z(self.registers[destination] == 0)
-
-        # Flag C
-        self.flags.set_c(self.registers[destination] > 0xFFFF)
+        # Flag N and Z from the result, flag C
+        self.flags.record(self.registers[destination], self.registers[destination] > 0xFFFF)
 
         self.registers[destination] &= 0xFFFF
 
@@ -698,11 +1103,9 @@ class CPU:
         value = self.__get_source_value(source_type, source)
         bit1 = value >> 8
         bit2 = value & 0xff
-        self.memory[self.registers[SP]] = bit1
-        self.memory[self.registers[SP] + 1] = bit2
-        self.flags.set_c(False)
-        self.flags.set_n(value >> 15)
-        self.flags.set_z(value == 0)
+        self.__write(self, self.registers[SP], bit1)
+        self.__write(self, self.registers[SP] + 1, bit2)
+        self.flags.accumulate(value >> 15, value == 0)
 
     def pop(self, source_type: MemoryType, source: int):
         """Pop the value of the source from de stack and increment stack by 2
@@ -719,11 +1122,9 @@ class CPU:
         if source_type == MemoryType.register:
             self.registers[source] = value
         else:
-            self.memory[destination] = bit1
-            self.memory[destination + 1] = bit2
-        self.flags.set_c(False)
-        self.flags.set_n(value >> 15)
-        self.flags.set_z(value == 0)
+            self.__write(self, destination, bit1)
+            self.__write(self, destination + 1, bit2)
+        self.flags.accumulate(value >> 15, value == 0)
 
     def branch_always(self, source_type: MemoryType, source: int):
         """Add to the PC the value of the source
@@ -820,9 +1221,7 @@ class CPU:
         source_value = self.__get_source_value(source_type, source)
         res = self.registers[destination] & source_value
         self.registers[destination] = res
-        self.flags.reset()
-        self.flags.set_z(res == 0)
-        self.flags.set_n(res >> 15)
+        self.flags.record(res)
 
     def i_or(self, source_type: MemoryType, source: int, destination: int):
         """Makes the logical or between the source and the destination and stores the result in the destination
@@ -835,9 +1234,7 @@ class CPU:
         source_value = self.__get_source_value(source_type, source)
         res = self.registers[destination] | source_value
         self.registers[destination] = res
-        self.flags.reset()
-        self.flags.set_z(res == 0)
-        self.flags.set_n(res >> 15)
+        self.flags.record(res)
 
     def xor(self, source_type: MemoryType, source: int, destination: int):
         """Makes the logical xor between the source and the destination and stores the result in the destination
@@ -850,9 +1247,7 @@ class CPU:
         source_value = self.__get_source_value(source_type, source)
         res = self.registers[destination] ^ source_value
         self.registers[destination] = res
-        self.flags.reset()
-        self.flags.set_n(res >> 15)
-        self.flags.set_z(res == 0)
+        self.flags.record(res)
 
     def rte(self):
         """Return from an interruption"""
@@ -874,7 +1269,9 @@ class CPU:
         """
         address = self.__get_source_value(source_type, source)
         cpu = self.__get_relative_cpu(address)
-        cpu.interruption(TRAP)
+        if self.tracer is not None:
+            self.tracer.trap(self, cpu)
+        self.__interrupt(cpu, TRAP)
 
     def __get_source_value(self, source_type: MemoryType, source: int, special_move=False) -> int:
         """Retrieve the value of the source acording to the momory type
@@ -910,6 +1307,16 @@ class CPU:
                 raise Exception("Invalid source type")
 
 
+for _move_type in MoveType:
+    for _source_type in MemoryType:
+        for _destination_type in MemoryType:
+            _handler = CPU.specialize_move(_move_type, _source_type, _destination_type)
+            setattr(CPU, _handler.__name__, _handler)
+            CPU.move_handlers[_move_type, _source_type, _destination_type] = _handler.__name__
+CPU.instruction_handlers = list(CPU.instruction_names.values()) + list(CPU.move_handlers.values())
+CPU.move_kinds = {name: kind for kind, name in CPU.move_handlers.items()}
+
+
 if __name__ == "__main__":
     memory = bytearray(256)
     instruction = 0x08  # and
@@ -0,0 +1,465 @@
+"""Debugger of the warriors
+
+The DebugEngine runs the cycles of Game.cycle one instruction at a time, in the row-major order of the
+board, and checks the breakpoints before each instruction and the watchpoints after it. A breakpoint
+stops before the instruction at a PC or with an opcode, on one cpu or on any of them. A watchpoint
+stops after an instruction which wrote a range of the memory of a cpu, the writes of the neighbours
+included (it uses CPU.watch).
+
+The checks are only done by this engine: a match without it does not pay for the debugger.
+It can be given to Game(engine=...), on_break is then called at each stop, or driven instruction by
+instruction with step, step_cycle and cont, as DebuggerShell does. The recorder of the game sees the cycles
+like with Game.cycle. With an UndoJournal, back undoes the cycles one by one, a recording can not be undone
+so the engine does not take both:
+
+    python debugger.py guerrier1.bin guerrier2.bin --seed 3
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Callable, List, Union
+    from game import Game
+    from journal import UndoJournal
+
+import argparse
+import cmd
+import pathlib
+from typing import NamedTuple
+
+from cpu import CPU, MemoryType, MoveType, PC
+from data import INSTRUCTIONS
+
+# name of the instruction in the compiler, by name of the method of CPU
+MNEMONICS = {name: next(key for key, value in INSTRUCTIONS.items() if value == opcode) for opcode, name in CPU.instruction_names.items()}
+REGISTER_NAMES = ["r0", "r1", "r2", "r3", "r4", "r5", "pc", "sp"]
+
+
+class Breakpoint(NamedTuple):
+    """Stop before an instruction at pc or with the mnemonic opcode, on the cpu at x, y or on any cpu when None"""
+    pc: Union[int, None] = None
+    opcode: Union[str, None] = None
+    x: Union[int, None] = None
+    y: Union[int, None] = None
+
+
+class Watchpoint(NamedTuple):
+    """Stop after a write to the memory of the cpu at x, y between start and stop"""
+    x: int
+    y: int
+    start: int
+    stop: int
+
+
+def format_operand(source_type: MemoryType, value: int) -> str:
+    """An operand in the syntax of the compiler, numbers in hexadecimal"""
+    match source_type:
+        case MemoryType.register:
+            return REGISTER_NAMES[value] if value < len(REGISTER_NAMES) else f"r{value}"
+        case MemoryType.pre_decremented_register:
+            return f"-(r{value})"
+        case MemoryType.inderect_addressing:
+            return f"(r{value})"
+        case MemoryType.post_incremented_register:
+            return f"(r{value})+"
+        case MemoryType.immediate_value:
+            return f"#{value:x}"
+        case MemoryType.address:
+            return f"@{value:x}"
+
+
+def format_instruction(values: tuple) -> str:
+    """An instruction returned by CPU.decode in the syntax of the compiler"""
+    name = values[0]
+    opcode = MNEMONICS[name]
+    if name == "move":
+        _, move_type, source_type, destination_type, first, second = values
+        mnemonic = {MoveType.default: "move", MoveType.move_h: "move.h", MoveType.move_l: "move.l"}[move_type]
+        if source_type == MemoryType.immediate_value or source_type == MemoryType.address:
+            source = f"@{second >> 8:02x}:{second & 0xff:02x}" if source_type == MemoryType.address else f"#{second:x}"
+            destination = format_operand(destination_type, first)
+        else:
+            source = format_operand(source_type, first)
+            if destination_type == MemoryType.address:
+                destination = f"@{second >> 8:02x}:{second & 0xff:02x}"
+            else:
+                destination = format_operand(destination_type, second)
+        return f"{mnemonic} {source}, {destination}"
+    if len(values) == 1:
+        return opcode
+    if len(values) == 3:
+        return f"{opcode} {format_operand(values[1], values[2])}"
+    return f"{opcode} {format_operand(values[1], values[2])}, r{values[3]}"
+
+
+def decode_at(cpu: CPU, pc: int) -> tuple[int, str]:
+    """Decode the instruction of a cpu at pc without using its decode cache
+
+    Returns:
+        tuple[int, str]: the size of the instruction and its text, ?? when it is not an instruction
+    """
+    try:
+        values = cpu.decode(cpu.memory[pc: pc + 2])
+        size = 2
+        if values[0] == "move":
+            values = cpu.decode(cpu.memory[pc: pc + 4])
+            size = 4
+        return size, format_instruction(values)
+    except Exception:
+        return 2, "??"
+
+
+def disassemble(cpu: CPU, pc: int = None, before: int = 2, after: int = 4) -> List[str]:
+    """The instructions around pc, the line of pc starts with >
+
+    The instructions before pc are found by decoding from a few bytes before, the first start
+    from which valid instructions end exactly at pc is used.
+
+    Args:
+        cpu (CPU): the cpu
+        pc (int, optional): the address, the PC of the cpu when None. Defaults to None.
+        before (int, optional): instructions shown before pc, at most. Defaults to 2.
+        after (int, optional): instructions shown from pc. Defaults to 4.
+    """
+    if pc is None:
+        pc = cpu.registers[PC]
+    start = pc
+    for candidate in range(max(0, pc - 4 * before), pc, 2):
+        address = candidate
+        count = 0
+        valid = True
+        while address < pc:
+            size, text = decode_at(cpu, address)
+            address += size
+            count += 1
+            valid = valid and text != "??"
+        if address == pc and count <= before and valid:
+            start = candidate
+            break
+    lines = []
+    address = start
+    shown = 0
+    while address < len(cpu.memory) and shown < after:
+        size, text = decode_at(cpu, address)
+        if address >= pc:
+            shown += 1
+        marker = ">" if address == pc else " "
+        lines.append(f"{marker} {address:02x}: {bytes(cpu.memory[address: address + size]).hex(' ')}  {text}")
+        address += size
+    return lines
+
+
+def dump(cpu: CPU) -> str:
+    """The registers, the flags and the instructions around the PC of a cpu"""
+    registers = " ".join(f"{name}={value:04x}" for name, value in zip(REGISTER_NAMES, cpu.registers))
+    flags = cpu.flags
+    lines = [
+        f"({cpu.pos_x}, {cpu.pos_y}) {registers}",
+        f"C={flags.get_c()} Z={flags.get_z()} N={flags.get_n()} timer={cpu.current_cycle}",
+    ]
+    return "\n".join(lines + disassemble(cpu))
+
+
+class DebugEngine:
+    game: Union[Game, None]
+    cpus: List[CPU]
+    # index of the next cpu to execute in the board, 0 between two cycles
+    index: int
+    breakpoints: List[Breakpoint]
+    watchpoints: List[Watchpoint]
+    # why the last step stopped, cleared by the next one
+    hits: List[str]
+    on_break: Union[Callable[[DebugEngine, List[str]], None], None]
+    journal: Union[UndoJournal, None]
+
+    def __init__(self, on_break: Callable[[DebugEngine, List[str]], None] = None, journal: UndoJournal = None):
+        """
+        Args:
+            on_break (Callable[[DebugEngine, List[str]], None], optional): called with the engine and the hits
+            when cycle stops on a breakpoint or a watchpoint. Defaults to None.
+            journal (UndoJournal, optional): records the cycles so back can undo them. Defaults to None.
+        """
+        self.on_break = on_break
+        self.journal = journal
+        self.game = None
+        self.cpus = []
+        self.index = 0
+        self.breakpoints = []
+        self.watchpoints = []
+        self.watchers = {}
+        self.hits = []
+        self.resumed = False
+        # PC of each cpu executed in the current cycle, for the recorder
+        self.pcs = []
+
+    def start(self, game: Game):
+        if self.journal is not None and game.recorder is not None:
+            raise ValueError("the cycles undone by back can not be removed from the recording")
+        self.game = game
+        self.cpus = [cpu for array in game.board for cpu in array]
+        self.index = 0
+        for watchpoint in self.watchpoints:
+            self.__attach(watchpoint)
+        if self.journal is not None:
+            self.journal.start(game)
+
+    def cycle(self):
+        """Run the rest of the cycle, calling on_break at each stop"""
+        while True:
+            hits = self.step()
+            if hits and self.on_break is not None:
+                self.on_break(self, hits)
+            if self.index == 0:
+                return
+
+    def stop(self):
+        for watchpoint, watcher in self.watchers.items():
+            self.cpu_at(watchpoint.x, watchpoint.y).unwatch(watcher)
+        self.watchers = {}
+        if self.journal is not None:
+            self.journal.stop()
+
+    def cpu_at(self, x: int, y: int) -> CPU:
+        return self.game.board[y][x]
+
+    def add_breakpoint(self, pc: int = None, opcode: str = None, x: int = None, y: int = None) -> Breakpoint:
+        breakpoint = Breakpoint(pc, opcode, x, y)
+        self.breakpoints.append(breakpoint)
+        return breakpoint
+
+    def add_watchpoint(self, x: int, y: int, start: int, stop: int = None) -> Watchpoint:
+        """Watch the bytes from start to stop of the cpu at x, y, only the byte start when stop is None"""
+        watchpoint = Watchpoint(x, y, start, start + 1 if stop is None else stop)
+        self.watchpoints.append(watchpoint)
+        if self.game is not None:
+            self.__attach(watchpoint)
+        return watchpoint
+
+    def remove(self, point: Union[Breakpoint, Watchpoint]):
+        if isinstance(point, Watchpoint):
+            self.watchpoints.remove(point)
+            watcher = self.watchers.pop(point, None)
+            if watcher is not None:
+                self.cpu_at(point.x, point.y).unwatch(watcher)
+        else:
+            self.breakpoints.remove(point)
+
+    def step(self, cpu: CPU = None) -> List[str]:
+        """Execute the next instruction of the board, or the instructions up to the next one of a cpu
+
+        Returns:
+            List[str]: the breakpoints and watchpoints hit, empty when the instruction was executed without any
+        """
+        self.hits = []
+        while not self.hits:
+            current = self.cpus[self.index]
+            if not self.resumed:
+                self.__check_breakpoints(current)
+                if self.hits:
+                    # the next step executes the instruction
+                    self.resumed = True
+                    break
+            self.resumed = False
+            recorder = self.game.recorder
+            if self.index == 0:
+                self.game.current_cycle += 1
+                if recorder is not None:
+                    recorder.begin_cycle(self.game.current_cycle)
+                    self.pcs = []
+            if recorder is not None:
+                self.pcs.append(current.registers[PC])
+            current.execute()
+            self.index = (self.index + 1) % len(self.cpus)
+            if self.index == 0:
+                if recorder is not None:
+                    recorder.instructions(self.pcs)
+                if self.journal is not None:
+                    self.journal.record()
+            if cpu is None or current is cpu:
+                break
+        return self.hits
+
+    def step_cycle(self) -> List[str]:
+        """Execute the instructions up to the end of the cycle, or of the next one between two cycles"""
+        self.hits = []
+        while not self.hits:
+            self.step()
+            if self.index == 0:
+                break
+        return self.hits
+
+    def cont(self, cycles: int = None) -> List[str]:
+        """Execute until a breakpoint or a watchpoint, for at most some cycles or up to max_cycles"""
+        game = self.game
+        last = game.max_cycles if cycles is None else min(game.max_cycles, game.current_cycle + cycles)
+        self.hits = []
+        while not self.hits and (self.index != 0 or game.current_cycle < last):
+            self.step()
+        return self.hits
+
+    def back(self) -> bool:
+        """Undo the last cycle with the journal, or the start of the current one in the middle of a cycle
+
+        Returns:
+            bool: False when there is no journal or no cycle left to undo
+        """
+        if self.journal is None or not self.journal.undo():
+            return False
+        self.index = 0
+        self.hits = []
+        self.resumed = False
+        return True
+
+    def __check_breakpoints(self, cpu: CPU):
+        pc = cpu.registers[PC]
+        opcode = None
+        for breakpoint in self.breakpoints:
+            if breakpoint.x is not None and (breakpoint.x, breakpoint.y) != (cpu.pos_x, cpu.pos_y):
+                continue
+            if breakpoint.pc is not None and breakpoint.pc != pc:
+                continue
+            if breakpoint.opcode is not None:
+                if opcode is None:
+                    opcode = decode_at(cpu, pc)[1].split(" ")[0].split(".")[0]
+                if opcode != breakpoint.opcode:
+                    continue
+            self.hits.append(f"point d'arrêt {breakpoint} sur ({cpu.pos_x}, {cpu.pos_y}) a {pc:02x}")
+
+    def __attach(self, watchpoint: Watchpoint):
+        def hit(origin: Union[CPU, None], cpu: CPU, address: int, value: int):
+            sender = "un moteur" if origin is None else f"({origin.pos_x}, {origin.pos_y})"
+            self.hits.append(f"écriture de {value:02x} a {address:02x} de ({cpu.pos_x}, {cpu.pos_y}) par {sender}")
+
+        self.watchers[watchpoint] = self.cpu_at(watchpoint.x, watchpoint.y).watch(watchpoint.start, watchpoint.stop, hit)
+
+
+class DebuggerShell(cmd.Cmd):
+    """Commands of the debugger, numbers in hexadecimal like the compiler"""
+    intro = "Débogueur codeWar, help pour la liste des commandes"
+    prompt = "(cw) "
+
+    def __init__(self, engine: DebugEngine, **kwargs):
+        super().__init__(**kwargs)
+        self.engine = engine
+
+    def report(self, hits: List[str]):
+        game = self.engine.game
+        for hit in hits:
+            self.stdout.write(hit + "\n")
+        self.stdout.write(f"cycle {game.current_cycle}, processeur {self.engine.index}\n")
+
+    def parse_cpu(self, arg: str) -> Union[CPU, None]:
+        values = arg.split()
+        if len(values) < 2:
+            return None
+        return self.engine.cpu_at(int(values[0]), int(values[1]))
+
+    def do_step(self, arg: str):
+        """step [x y] : exécute l'instruction suivante du plateau, ou jusqu'a la prochaine du processeur x y"""
+        self.report(self.engine.step(self.parse_cpu(arg)))
+
+    def do_cycle(self, arg: str):
+        """cycle : exécute la fin du cycle"""
+        self.report(self.engine.step_cycle())
+
+    def do_continue(self, arg: str):
+        """continue [n] : exécute jusqu'a un point d'arrêt, pendant au plus n cycles"""
+        self.report(self.engine.cont(int(arg) if arg else None))
+
+    def do_back(self, arg: str):
+        """back [n] : revient n cycles en arrière, 1 par défaut"""
+        for _ in range(int(arg) if arg else 1):
+            if not self.engine.back():
+                self.stdout.write("Plus aucun cycle a défaire\n")
+                break
+        self.report([])
+
+    def do_break(self, arg: str):
+        """break pc [x y] : s'arrête avant l'instruction a pc, du processeur x y ou de tous"""
+        values = arg.split()
+        x, y = (int(values[1]), int(values[2])) if len(values) > 2 else (None, None)
+        self.stdout.write(f"{self.engine.add_breakpoint(pc=int(values[0], 16), x=x, y=y)}\n")
+
+    def do_breakop(self, arg: str):
+        """breakop nom [x y] : s'arrête avant chaque instruction nom (trap, move...)"""
+        values = arg.split()
+        x, y = (int(values[1]), int(values[2])) if len(values) > 2 else (None, None)
+        self.stdout.write(f"{self.engine.add_breakpoint(opcode=values[0], x=x, y=y)}\n")
+
+    def do_watch(self, arg: str):
+        """watch x y debut [fin] : s'arrête après une écriture dans la mémoire du processeur x y entre debut et fin"""
+        values = arg.split()
+        stop = int(values[3], 16) if len(values) > 3 else None
+        self.stdout.write(f"{self.engine.add_watchpoint(int(values[0]), int(values[1]), int(values[2], 16), stop)}\n")
+
+    def do_info(self, arg: str):
+        """info : liste les points d'arrêt et de surveillance"""
+        for number, point in enumerate(self.engine.breakpoints + self.engine.watchpoints):
+            self.stdout.write(f"{number} {point}\n")
+
+    def do_delete(self, arg: str):
+        """delete n : supprime le point numéro n de info"""
+        self.engine.remove((self.engine.breakpoints + self.engine.watchpoints)[int(arg)])
+
+    def do_regs(self, arg: str):
+        """regs x y : registres, flags et instructions autour du PC du processeur x y"""
+        self.stdout.write(dump(self.parse_cpu(arg)) + "\n")
+
+    def do_dis(self, arg: str):
+        """dis x y [adresse] : instructions du processeur x y autour de l'adresse ou du PC"""
+        values = arg.split()
+        pc = int(values[2], 16) if len(values) > 2 else None
+        self.stdout.write("\n".join(disassemble(self.parse_cpu(arg), pc)) + "\n")
+
+    def do_mem(self, arg: str):
+        """mem x y [debut [longueur]] : octets de la mémoire du processeur x y"""
+        values = arg.split()
+        start = int(values[2], 16) if len(values) > 2 else 0
+        length = int(values[3], 16) if len(values) > 3 else 0x100 - start
+        memory = bytes(self.parse_cpu(arg).memory)
+        for address in range(start, min(start + length, len(memory)), 16):
+            row = memory[address: min(address + 16, start + length)]
+            self.stdout.write(f"{address:02x}: {row.hex(' ')}\n")
+
+    def do_quit(self, arg: str) -> bool:
+        """quit : quitte le débogueur"""
+        return True
+
+    def default(self, line: str):
+        self.stdout.write(f"Commande inconnue : {line}\n")
+
+    def emptyline(self):
+        pass
+
+    def do_EOF(self, arg: str) -> bool:
+        return True
+
+
+def main(argv: list[str] = None):
+    from game import Game
+    from journal import UndoJournal
+    from tournament import PLAYER1_COLOR, PLAYER2_COLOR
+
+    parser = argparse.ArgumentParser("debugger", description="Debug a match between two warriors")
+    parser.add_argument("player1", help="object or binary file of the first player")
+    parser.add_argument("player2", help="object or binary file of the second player")
+    parser.add_argument("-s", "--seed", help="seed of the placement of the players", type=int, default=0)
+    parser.add_argument("-c", "--cycles", help="number of cycles of the match", type=int, default=1000)
+    parser.add_argument("-u", "--undo", help="number of cycles which can be undone with back", type=int, default=100)
+    args = parser.parse_args(argv)
+    engine = DebugEngine(journal=UndoJournal(args.undo))
+    game = Game(args.cycles, headless=True, engine=engine, seed=args.seed)
+    player1 = CPU.load_from_bytes(pathlib.Path(args.player1).read_bytes(), game, PLAYER1_COLOR)
+    player2 = CPU.load_from_bytes(pathlib.Path(args.player2).read_bytes(), game, PLAYER2_COLOR)
+    game.place_players(player1, player2)
+    print(f"Joueur 1 en ({player1.pos_x}, {player1.pos_y}), joueur 2 en ({player2.pos_x}, {player2.pos_y})")
+    engine.start(game)
+    try:
+        DebuggerShell(engine).cmdloop()
+    finally:
+        engine.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,4 +4,24 @@ class Interruption(Exception):
 
 class OutOfBoundsError(IndexError, Interruption):
     def __init__(self, message):
-        super().__init__(message)
\ No newline at end of file
+        super().__init__(message)
+
+
+class ObjectFormatError(ValueError):
+    def __init__(self, message):
+        super().__init__(message)
+
+
+class TraceFormatError(ValueError):
+    def __init__(self, message):
+        super().__init__(message)
+
+
+class ReplayFormatError(ValueError):
+    def __init__(self, message):
+        super().__init__(message)
+
+
+class TimeSeriesFormatError(ValueError):
+    def __init__(self, message):
+        super().__init__(message)
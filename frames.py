@@ -0,0 +1,90 @@
+"""Export of the board as images, to make videos of the matches
+
+FrameExporter is a publisher of a Game: after every few cycles it turns the colors of the board into an RGB
+image, each cell being a square of scale pixels, and writes it in one go. The 15 bit colors are converted
+with PALETTE, computed once with View.convert_5bit_to_8bit for the 32768 colors.
+
+The frames are written as PPM images in a directory (frame_000010.ppm for the cycle 10) or one after the other
+in a raw RGB file, which ffmpeg turns into a video:
+
+    python game.py --frames match.rgb --every 2
+    ffmpeg -f rawvideo -pix_fmt rgb24 -s 128x128 -r 30 -i match.rgb match.mp4
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import List, Union
+    from game import Game
+
+import pathlib
+
+from view import View
+
+# the RGB bytes of each 15 bit color
+PALETTE: List[bytes] = [bytes(View(None).convert_5bit_to_8bit(color)) for color in range(1 << 15)]
+
+
+class FrameExporter:
+    every: int
+    scale: int
+    stream: bool
+    frames: int
+
+    def __init__(self, path: Union[str, pathlib.Path], every: int = 1, scale: int = 8, stream: bool = None):
+        """
+        Args:
+            path (Union[str, pathlib.Path]): the directory of the PPM frames, or the raw RGB file
+            every (int, optional): a frame is written every that many cycles. Defaults to 1.
+            scale (int, optional): size in pixels of a cell. Defaults to 8.
+            stream (bool, optional): write a raw RGB file instead of PPM frames, when the path ends with .rgb
+            if None. Defaults to None.
+        """
+        self.path = pathlib.Path(path)
+        self.every = every
+        self.scale = scale
+        self.stream = self.path.suffix == ".rgb" if stream is None else stream
+        self.frames = 0
+        # the pixels of a cell of each color, on one line of the image
+        self.cells = [rgb * scale for rgb in PALETTE]
+        self.file = None
+        if self.stream:
+            self.file = open(self.path, "wb")
+        else:
+            self.path.mkdir(parents=True, exist_ok=True)
+
+    def __enter__(self) -> FrameExporter:
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def publish(self, game: Game):
+        """Write a frame when the cycle is a multiple of every, called by the game after each cycle"""
+        if game.current_cycle % self.every == 0:
+            self.write(game)
+
+    def render(self, game: Game) -> bytes:
+        """The RGB pixels of the board, line by line"""
+        cells = self.cells
+        scale = self.scale
+        lines = []
+        for array in game.board:
+            line = b"".join([cells[(cpu.memory[0] << 8 | cpu.memory[1]) & 0x7fff] for cpu in array])
+            lines.append(line * scale)
+        return b"".join(lines)
+
+    def write(self, game: Game):
+        pixels = self.render(game)
+        if self.stream:
+            self.file.write(pixels)
+        else:
+            header = f"P6\n{len(game.board[0]) * self.scale} {len(game.board) * self.scale}\n255\n".encode()
+            with open(self.path / f"frame_{game.current_cycle:06d}.ppm", "wb") as file:
+                file.write(header + pixels)
+        self.frames += 1
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
@@ -3,17 +3,30 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from typing import List
+    from typing import List, Union
+    from recorder import TraceRecorder, RecorderGroup
+    from replay import ReplayWriter
+    from heatmap import HeatmapRecorder
+    from timeseries import StatisticsCollector
+    from spectator import SpectatorServer
+    from frames import FrameExporter
+    from tiles import TileEngine
+    from synchronous import SynchronousEngine
+    from speculative import SpeculativeEngine
+    from termination import Termination
+    from interrupts import InterruptController
 
+import contextlib
 import random
 import pathlib
 import sys
 import argparse
 
-from cpu import CPU
-from view import View
+from cpu import CPU, PC
+from view import View, ThreadedView
 
 DEFAULT_FILE = pathlib.Path(__file__).parent / "res" / "default.bin"
+BOARD_SIZE = 16
 
 """
 used for the test of the view
@@ -45,20 +58,82 @@ MEMORY[1] = COLOR & 0xFF
 
 class Game:
     board: List[List[CPU]]
-    view: View
+    view: Union[View, ThreadedView, None]
     player1_color: int
     player2_color: int
     max_cycles: int
+    current_cycle: int
+    recorder: Union[TraceRecorder, ReplayWriter, HeatmapRecorder, StatisticsCollector, RecorderGroup, None]
+    publisher: Union[SpectatorServer, FrameExporter, None]
+    engine: Union[TileEngine, SynchronousEngine, SpeculativeEngine, None]
+    random: random.Random
+    terminations: List[Termination]
+    interrupts: Union[InterruptController, None]
 
-    def __init__(self, max_cycles: int) -> None:
+    def __init__(
+        self,
+        max_cycles: int = 1000,
+        headless: bool = False,
+        recorder: Union[TraceRecorder, ReplayWriter, HeatmapRecorder, StatisticsCollector, list] = None,
+        publisher: Union[SpectatorServer, FrameExporter] = None,
+        engine: Union[TileEngine, SynchronousEngine, SpeculativeEngine] = None,
+        seed: int = None,
+        terminations: List[Termination] = None,
+        interrupts: InterruptController = None,
+        frame_rate: float = None,
+        board_size: int = BOARD_SIZE,
+    ) -> None:
+        """
+        Args:
+            max_cycles (int, optional): number of cycles before counting the cells of each player. Defaults to 1000.
+            headless (bool, optional): run without the terminal view. Defaults to False.
+            recorder (Union[TraceRecorder, ReplayWriter, HeatmapRecorder, StatisticsCollector, list], optional): where
+            to record the match, a list of recorders is given to a RecorderGroup. Defaults to None.
+            publisher (Union[SpectatorServer, FrameExporter], optional): where to publish the board after each cycle. Defaults to None.
+            engine (Union[TileEngine, SynchronousEngine, SpeculativeEngine], optional): runs the cycles instead of Game.cycle.
+            Defaults to None.
+            seed (int, optional): seed of the placement of the players, random when None. Defaults to None.
+            terminations (List[Termination], optional): rules which can end the match before max_cycles.
+            Defaults to None.
+            interrupts (InterruptController, optional): delivers the interruptions at the start of the next instruction
+            of their cpu, immediately when None. Not used by the engines. Defaults to None.
+            frame_rate (float, optional): print the board from a thread at most that many times per second,
+            after each cycle when None. Defaults to None.
+            board_size (int, optional): number of cpus on a side of the square board. Defaults to BOARD_SIZE.
+        """
+        if engine is not None and interrupts is not None:
+            raise ValueError("the engines deliver the interruptions themselves")
+        if isinstance(recorder, list):
+            from recorder import RecorderGroup
+
+            recorder = RecorderGroup(recorder) if recorder else None
+        if engine is not None and recorder is not None:
+            from tiles import TileEngine
+
+            if isinstance(engine, TileEngine):
+                raise ValueError("the tiles run in other processes, their cycles can not be recorded")
         self.max_cycles = max_cycles
-        self.view = View(self)
+        self.current_cycle = 0
+        self.recorder = recorder
+        self.publisher = publisher
+        self.engine = engine
+        self.random = random.Random(seed)
+        self.terminations = [] if terminations is None else terminations
+        self.interrupts = interrupts
+        if headless:
+            self.view = None
+        else:
+            self.view = View(self) if frame_rate is None else ThreadedView(self, frame_rate)
         # self.board = [[CPU(self, MEMORY.copy()) for _ in range(16)] for _ in range(16)] used for the test of the view
+        # the empty cells share the memory of the default program until they are written
+        default = CPU.load_from_file(DEFAULT_FILE.resolve(), self)
+        image = bytes(default.memory)
+        decode_cache = {}
         board = []
-        for y in range(16):
+        for y in range(board_size):
             array = []
-            for x in range(16):
-                cpu = CPU.load_from_file(DEFAULT_FILE.resolve(), self)
+            for x in range(board_size):
+                cpu = CPU.from_image(image, self, default.registers[PC], decode_cache)
                 cpu.pos_x = x
                 cpu.pos_y = y
                 array.append(cpu)
@@ -84,17 +159,23 @@ class Game:
         except EOFError:
             print("A une prochaine fois !")
             return
-        player1_x = random.randint(0, 15)
-        player1_y = random.randint(0, 15)
+        self.place_players(player1_cpu, player2_cpu)
+
+    def place_players(self, player1_cpu: CPU, player2_cpu: CPU):
+        """Put the players at random positions of the board, drawn from the seed of the game"""
+        height = len(self.board)
+        width = len(self.board[0])
+        player1_x = self.random.randint(0, width - 1)
+        player1_y = self.random.randint(0, height - 1)
         player1_cpu.pos_x = player1_x
         player1_cpu.pos_y = player1_y
-        player2_x = random.randint(0, 15)
-        player2_y = random.randint(0, 15)
+        player2_x = self.random.randint(0, width - 1)
+        player2_y = self.random.randint(0, height - 1)
         player2_cpu.pos_x = player2_x
         player2_cpu.pos_y = player2_y
-        self.board[player1_x][player1_y] = player1_cpu
+        self.board[player1_y][player1_x] = player1_cpu
         self.player1_color = player1_cpu.memory[0] << 8 | player1_cpu.memory[1]
-        self.board[player2_x][player2_y] = player2_cpu
+        self.board[player2_y][player2_x] = player2_cpu
         self.player2_color = player2_cpu.memory[0] << 8 | player2_cpu.memory[1]
 
     def game(self):
@@ -102,26 +183,80 @@ class Game:
             self.start()
             self.view.initialize()
             input("Adaptez la taille de la fenêtre et appuyez sur entrée pour commencer")
-            current_cycle = 0
-            while current_cycle < self.max_cycles:
-                current_cycle += 1
-                for array in self.board:
-                    for cpu in array:
-                        cpu.execute()
-                self.view.update()
-                winner = self.__check_if_winner_exists()
-                if winner:
-                    if winner == self.player1_color:
-                        print("Le gagnant est le joueur 1")
-                    else:
-                        print("Le gagnant est le joueur 2")
-                    return
-            self.__show_winner()
+            winner = self.run()
+            if winner == 0:
+                print("Égalité")
+            else:
+                print(f"Le gagnant est le joueur {winner}")
         except KeyboardInterrupt:
             print("A une prochaine fois !")
             sys.exit(1)
 
-    def __show_winner(self):
+    def run(self) -> int:
+        """Run the cycles of the match, with the engine of the game if it has one
+
+        Returns:
+            int: 1 or 2 for the winning player, 0 for a draw
+        """
+        if self.recorder is not None:
+            self.recorder.start(self)
+            for array in self.board:
+                for cpu in array:
+                    cpu.tracer = self.recorder
+        if self.interrupts is not None:
+            for array in self.board:
+                for cpu in array:
+                    cpu.interrupts = self.interrupts
+        if self.publisher is not None:
+            self.publisher.publish(self)
+        terminations = self.terminations
+        for termination in terminations:
+            termination.start(self)
+        engine = self.engine
+        if engine is not None:
+            engine.start(self)
+        cycle = self.cycle if engine is None else engine.cycle
+        try:
+            while self.current_cycle < self.max_cycles:
+                cycle()
+                if self.view is not None:
+                    self.view.update()
+                if self.publisher is not None:
+                    self.publisher.publish(self)
+                winner = self.__check_if_winner_exists()
+                if winner:
+                    return 1 if winner == self.player1_color else 2
+                if terminations:
+                    colors = [cpu.memory[0] << 8 | cpu.memory[1] for array in self.board for cpu in array]
+                    for termination in terminations:
+                        result = termination.check(self, colors)
+                        if result is not None:
+                            return result
+        finally:
+            if engine is not None:
+                engine.stop()
+            if self.view is not None:
+                self.view.stop()
+        return self.__count_winner()
+
+    def cycle(self):
+        """Execute one instruction on every cpu of the board"""
+        self.current_cycle += 1
+        recorder = self.recorder
+        if recorder is None:
+            for array in self.board:
+                for cpu in array:
+                    cpu.execute()
+        else:
+            recorder.begin_cycle(self.current_cycle)
+            pcs = []
+            for array in self.board:
+                for cpu in array:
+                    pcs.append(cpu.registers[PC])
+                    cpu.execute()
+            recorder.instructions(pcs)
+
+    def __count_winner(self) -> int:
         player1_count = 0
         player2_count = 0
         for array in self.board:
@@ -131,11 +266,10 @@ class Game:
                 elif (cpu.memory[0] << 8 | cpu.memory[1]) == self.player2_color:
                     player2_count += 1
         if player1_count > player2_count:
-            print("Le gagnant est le joueur 1")
+            return 1
         elif player1_count < player2_count:
-            print("Le gagnant est le joueur 2")
-        else:
-            print("Égalité")
+            return 2
+        return 0
 
     def __check_if_winner_exists(self):
         first_color = self.board[0][0].memory[0] << 8 | self.board[0][0].memory[1]
@@ -146,7 +280,7 @@ class Game:
         return first_color
 
 
-if __name__ == "__main__":
+def main(argv: list[str] = None):
     parser = argparse.ArgumentParser("codeWar", description="Start a game of codeWar")
     parser.add_argument(
         "-c"
@@ -156,6 +290,67 @@ if __name__ == "__main__":
         default=1000,
         required=False,
     )
-    args = parser.parse_args()
+    parser.add_argument("-t", "--trace", help="record a binary trace of the match in this file", type=str, default=None)
+    parser.add_argument("-z", "--compress", help="compress the trace with zlib", action="store_true")
+    parser.add_argument("-r", "--replay", help="record a seekable replay of the match in this file", type=str, default=None)
+    parser.add_argument("--heatmap", help="export the heatmaps of the match in this directory", type=str, default=None)
+    parser.add_argument("--stats", help="record the statistics of every cycle in this file, CSV when it ends with .csv", type=str, default=None)
+    parser.add_argument("-f", "--frames", help="export the board as PPM frames in this directory, or as raw RGB in a .rgb file", type=str, default=None)
+    parser.add_argument("--every", help="cycles between two exported frames, 1 by default", type=int, default=None)
+    parser.add_argument("-s", "--serve", help="stream the board to spectators on this TCP port", type=int, default=None)
+    parser.add_argument("--host", help="address the spectator server listens on, 127.0.0.1 by default", type=str, default=None)
+    parser.add_argument("--fps", help="print the board at most this many times per second, from a thread", type=float, default=None)
+    parser.add_argument("--synchronous", help="every cpu sees the board as it was at the start of the cycle", action="store_true")
+    parser.add_argument("--size", help="number of cpus on a side of the board", type=int, default=BOARD_SIZE)
+    args = parser.parse_args(argv)
+    if args.compress and args.trace is None:
+        parser.error("--compress ne compresse que la trace de --trace")
+    if args.every is not None and args.frames is None:
+        parser.error("--every ne règle que les images de --frames")
+    if args.host is not None and args.serve is None:
+        parser.error("--host ne règle que le serveur de --serve")
+    if args.serve is not None and args.frames is not None:
+        parser.error("--serve et --frames ne peuvent pas être utilisés ensemble")
     cycles = args.c__cycles
-    Game(cycles).game()
+    if args.synchronous:
+        from synchronous import SynchronousEngine
+
+        engine = SynchronousEngine()
+    else:
+        engine = None
+    with contextlib.ExitStack() as stack:
+        # the recorders all see the match, they are closed at the end
+        recorders = []
+        if args.trace is not None:
+            from recorder import TraceRecorder
+
+            recorders.append(stack.enter_context(TraceRecorder(args.trace, compress=args.compress, width=args.size)))
+        if args.replay is not None:
+            from replay import ReplayWriter
+
+            recorders.append(stack.enter_context(ReplayWriter(args.replay)))
+        if args.stats is not None:
+            from timeseries import StatisticsCollector
+
+            recorders.append(stack.enter_context(StatisticsCollector(args.stats)))
+        if args.heatmap is not None:
+            from heatmap import HeatmapRecorder
+
+            recorders.append(stack.enter_context(HeatmapRecorder(args.heatmap)))
+        publisher = None
+        if args.serve is not None:
+            from spectator import SpectatorServer
+
+            publisher = stack.enter_context(SpectatorServer("127.0.0.1" if args.host is None else args.host, args.serve))
+        elif args.frames is not None:
+            from frames import FrameExporter
+
+            every = 1 if args.every is None else args.every
+            publisher = stack.enter_context(FrameExporter(args.frames, every=every))
+        Game(
+            cycles, recorder=recorders, publisher=publisher, engine=engine, frame_rate=args.fps, board_size=args.size
+        ).game()
+
+
+if __name__ == "__main__":
+    main()
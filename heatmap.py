@@ -0,0 +1,129 @@
+"""Heatmaps of the activity of the cells during a match
+
+HeatmapRecorder is a recorder of a Game which counts, in NumPy arrays allocated by start:
+
+- executed[cell, pc]: the instructions executed by each cell at each address
+- written[cell, address]: the bytes written in the memory of each cell, by itself or another cell
+- writes[source, target]: the writes of a cell to the memory of another cell
+- traps[source, target]: the traps sent by a cell to another cell, itself included
+
+The cells are numbered in the row-major order of the board. Each write and trap adds one to a counter through
+a memoryview of the array, without creating a NumPy scalar, the instructions are added once per cycle.
+At the end of the match, export writes the counters as CSV files and the maps as PGM images, which any image
+viewer opens without a PNG library:
+
+    python game.py --heatmap heatmaps
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Union
+    from cpu import CPU
+    from game import Game
+
+import pathlib
+
+import numpy as np
+
+MEMORY_SIZE = 256
+
+
+class HeatmapRecorder:
+    width: int
+    height: int
+    # number of cells of the board
+    count: int
+    executed: np.ndarray
+    written: np.ndarray
+    writes: np.ndarray
+    traps: np.ndarray
+
+    def __init__(self, directory: Union[str, pathlib.Path] = None, scale: int = 16):
+        """
+        Args:
+            directory (Union[str, pathlib.Path], optional): where close exports the heatmaps, nothing is exported
+            when None. Defaults to None.
+            scale (int, optional): size in pixels of a cell in the images of the board. Defaults to 16.
+        """
+        self.directory = directory
+        self.scale = scale
+        self.width = 0
+        self.height = 0
+
+    def __enter__(self) -> HeatmapRecorder:
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def start(self, game: Game):
+        """Allocate the counters for the board of the game"""
+        self.height = len(game.board)
+        self.width = len(game.board[0])
+        cells = self.count = self.width * self.height
+        self.cells = np.arange(cells)
+        self.executed = np.zeros((cells, MEMORY_SIZE), dtype=np.uint32)
+        self.written = np.zeros((cells, MEMORY_SIZE), dtype=np.uint32)
+        self.writes = np.zeros((cells, cells), dtype=np.uint32)
+        self.traps = np.zeros((cells, cells), dtype=np.uint32)
+        # flat views of the counters, an item of a memoryview is a python int
+        self.flat_written = memoryview(self.written.reshape(-1))
+        self.flat_writes = memoryview(self.writes.reshape(-1))
+        self.flat_traps = memoryview(self.traps.reshape(-1))
+
+    def begin_cycle(self, cycle: int):
+        pass
+
+    def instructions(self, pcs: list[int]):
+        """Count the instruction of each cell at its PC, every cell executes once per cycle"""
+        self.executed[self.cells, np.asarray(pcs) & 0xff] += 1
+
+    def memory_write(self, origin: CPU, target: CPU, address: int, value: int):
+        width = self.width
+        target_index = target.pos_y * width + target.pos_x
+        self.flat_written[target_index * MEMORY_SIZE + (address & 0xff)] += 1
+        if origin is not target:
+            self.flat_writes[(origin.pos_y * width + origin.pos_x) * self.count + target_index] += 1
+
+    def interruption(self, cpu: CPU, vector: int):
+        pass
+
+    def trap(self, origin: CPU, target: CPU):
+        width = self.width
+        self.flat_traps[(origin.pos_y * width + origin.pos_x) * self.count + target.pos_y * width + target.pos_x] += 1
+
+    def cell_instructions(self) -> np.ndarray:
+        """The instructions executed by each cell, shaped like the board"""
+        return self.executed.sum(axis=1).reshape(self.height, self.width)
+
+    def cell_writes(self) -> np.ndarray:
+        """The bytes written in each cell, shaped like the board"""
+        return self.written.sum(axis=1).reshape(self.height, self.width)
+
+    def export(self, directory: Union[str, pathlib.Path]):
+        """Write the counters as CSV files and the maps of the board and the matrices as PGM images"""
+        directory = pathlib.Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        outgoing = self.writes.sum(axis=1).reshape(self.height, self.width)
+        for name, values in [("instructions", self.cell_instructions()), ("written", self.cell_writes()),
+                             ("outgoing_writes", outgoing)]:
+            np.savetxt(directory / f"{name}.csv", values, fmt="%d", delimiter=",")
+            write_pgm(directory / f"{name}.pgm", values.repeat(self.scale, axis=0).repeat(self.scale, axis=1))
+        for name, values in [("executed", self.executed), ("writes", self.writes), ("traps", self.traps)]:
+            np.savetxt(directory / f"{name}.csv", values, fmt="%d", delimiter=",")
+            write_pgm(directory / f"{name}.pgm", values)
+
+    def close(self):
+        if self.directory is not None and self.width:
+            self.export(self.directory)
+
+
+def write_pgm(file_path: Union[str, pathlib.Path], values: np.ndarray):
+    """Write a 2D array as a binary greyscale PGM image, the highest value in white"""
+    highest = int(values.max()) if values.size else 0
+    pixels = (values.astype(np.float64) * (255 / highest) if highest else np.zeros(values.shape)).astype(np.uint8)
+    with open(file_path, "wb") as file:
+        file.write(f"P5\n{values.shape[1]} {values.shape[0]}\n255\n".encode())
+        file.write(pixels.tobytes())
@@ -0,0 +1,82 @@
+"""A board for CPUs outside of a Game
+
+A CPU only uses its game to find the other CPUs in game.board, with its own pos_x and pos_y. Host is the
+smallest such board: width x height blank CPUs created without reading any file, for the unit tests,
+the fuzzers and the screening of warriors, which need many CPUs and not a match:
+
+    cpu = Host.load(program)
+    cpu.run(budget=10000)
+
+The blank CPUs hold zeros, which is not an instruction. A host made with IDLE_IMAGE, as the one of Host.load,
+is filled with CPUs looping on jmp #10 like the empty cells of a Game. Host.cycle executes every CPU once in the
+order of the board, like Game.cycle without the recorder.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import List
+
+from cpu import CPU
+
+# the memory of the empty cells of a Game (res/default.bin loaded at 0x10): jmp #10
+IDLE_IMAGE = bytes(0x10) + bytes([0xd4, 0x10]) + bytes(0xee)
+
+
+class Host:
+    board: List[List[CPU]]
+    current_cycle: int
+
+    def __init__(self, width: int = 1, height: int = 1, image: bytes = None, entry: int = 0x10):
+        """
+        Args:
+            width (int, optional): number of CPUs on a line. Defaults to 1.
+            height (int, optional): number of lines. Defaults to 1.
+            image (bytes, optional): memory shared by the CPUs until they write it, with its decode cache.
+            The CPUs start with an empty memory and a PC of 0 when None. Defaults to None.
+            entry (int, optional): the first PC of the CPUs of the image. Defaults to 0x10.
+        """
+        self.current_cycle = 0
+        decode_cache = {}
+        self.board = []
+        for y in range(height):
+            array = []
+            for x in range(width):
+                cpu = CPU(self) if image is None else CPU.from_image(image, self, entry, decode_cache)
+                cpu.pos_x = x
+                cpu.pos_y = y
+                array.append(cpu)
+            self.board.append(array)
+
+    @property
+    def cpu(self) -> CPU:
+        """The CPU at 0, 0"""
+        return self.board[0][0]
+
+    @classmethod
+    def load(cls, content: bytes, color: int = 0x0000, width: int = 1, height: int = 1, x: int = 0, y: int = 0) -> CPU:
+        """Load a program, from the content of an object or raw binary file, in a CPU of a new host
+
+        The other CPUs of the host run IDLE_IMAGE.
+
+        Returns:
+            CPU: the loaded CPU, at x, y in the board of the host
+        """
+        host = cls(width, height, IDLE_IMAGE)
+        return host.place(CPU.load_from_bytes(content, host, color), x, y)
+
+    def place(self, cpu: CPU, x: int, y: int) -> CPU:
+        """Put a cpu at x, y in the board, in place of the one there"""
+        cpu.game = self
+        cpu.pos_x = x
+        cpu.pos_y = y
+        self.board[y][x] = cpu
+        return cpu
+
+    def cycle(self):
+        """Execute one instruction on every cpu of the board"""
+        self.current_cycle += 1
+        for array in self.board:
+            for cpu in array:
+                cpu.execute()
@@ -0,0 +1,73 @@
+"""Deferred delivery of the interruptions
+
+Without a controller, CPU.trap interrupts the target CPU in the middle of the instruction of the sender:
+the PC and the flags of the target are pushed on its stack and its PC is changed before the sender ends
+its instruction. With an InterruptController given to Game(interrupts=...), the interruptions (TRAP from
+any CPU, TIMER and ILLEGAL from the CPU itself) are posted to a queue of the target and delivered with
+CPU.interruption at the start of its next execute, before its instruction.
+
+A CPU executes the first instruction of the handler at the same cycle as with an immediate delivery,
+whether the sender comes before or after it in the board. The differences are:
+
+- the stack and the PC of the target are only changed when it executes, a CPU reading them in between
+  sees them as they were before the interruption
+- when several vectors are pending, they are delivered by PRIORITY: the handler of the highest runs
+  first and the others run after its rte. With an immediate delivery the last interruption runs first
+- with coalesce, an interruption posted while the same vector is pending is counted in coalesced
+  and dropped, its handler runs once
+- the interruptions still pending at the end of the match are never delivered
+
+The controller is used by Game.cycle, the engines deliver the traps themselves.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Iterable
+    from cpu import CPU
+
+from cpu import ILLEGAL, TIMER, TRAP
+
+# the vectors from the highest priority to the lowest
+PRIORITY = (ILLEGAL, TIMER, TRAP)
+
+
+class InterruptController:
+    delivered: int
+    coalesced: int
+    posted: int
+
+    def __init__(self, priority: Iterable[int] = PRIORITY, coalesce: bool = True):
+        """
+        Args:
+            priority (Iterable[int], optional): the vectors from the highest priority to the lowest.
+            Defaults to PRIORITY.
+            coalesce (bool, optional): drop an interruption whose vector is already pending. Defaults to True.
+        """
+        priority = list(priority)
+        self.rank: Dict[int, int] = {vector: len(priority) - index for index, vector in enumerate(priority)}
+        self.coalesce = coalesce
+        self.delivered = 0
+        self.coalesced = 0
+        self.posted = 0
+
+    def post(self, cpu: CPU, vector: int):
+        """Queue an interruption of a cpu, delivered at the start of its next execute"""
+        self.posted += 1
+        pending = cpu.pending
+        if not pending:
+            cpu.pending = [vector]
+        elif self.coalesce and vector in pending:
+            self.coalesced += 1
+        else:
+            pending.append(vector)
+
+    def drain(self, cpu: CPU):
+        """Deliver the pending interruptions of a cpu, the one of the highest priority last so its handler runs first"""
+        pending = cpu.pending
+        cpu.pending = ()
+        # sorted is stable, the vectors of the same priority are delivered in the order they were posted
+        for vector in sorted(pending, key=lambda vector: self.rank.get(vector, 0)):
+            cpu.interruption(vector)
+            self.delivered += 1
@@ -0,0 +1,129 @@
+"""Undo journal of the cycles of a match
+
+The journal keeps, for each of the last cycles, the old value of what the cycle changed: the registers,
+the flags and the timer counter of the cpus which changed them, and the bytes of memory written by the
+instructions or the engines. Undoing a cycle puts them back, so a match can be stepped backwards cycle by
+cycle without a snapshot of the board at every cycle. The cycles are kept in a ring buffer, the memory used
+is bounded by the number of cycles given to the journal.
+
+The written bytes are found with the dirty bitmap of CPU.watch and compared with a copy of the memories
+made by start, the journal uses take_dirty of every cpu. The writes done directly to cpu.memory are not
+seen, the interruptions still pending in an interrupt controller are not undone.
+
+DebugEngine(journal=UndoJournal(100)) records the cycles it runs and undoes them with back.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import List
+    from cpu import CPU
+    from game import Game
+
+from collections import deque
+from typing import NamedTuple
+
+
+class CpuChange(NamedTuple):
+    """The state of a cpu before a cycle, only the bytes of memory written during the cycle"""
+    cpu: CPU
+    registers: tuple
+    flags: int
+    timer: int
+    memory: List[tuple[int, int]]
+
+
+class UndoJournal:
+    cycles: int
+    # for each cycle recorded, the cycle of the game before it and the changes of the cpus
+    entries: deque[tuple[int, List[CpuChange]]]
+
+    def __init__(self, cycles: int = 100):
+        """
+        Args:
+            cycles (int, optional): number of cycles which can be undone, the oldest ones are dropped. Defaults to 100.
+        """
+        self.cycles = cycles
+        self.entries = deque(maxlen=cycles)
+        self.game = None
+        self.cpus = []
+        self.watchers = []
+        self.memories = []
+        self.states = []
+        self.cycle = 0
+
+    def start(self, game: Game):
+        """Watch the cpus of the board and copy their state, the cycles are recorded from here"""
+        self.game = game
+        self.cpus = [cpu for array in game.board for cpu in array]
+        self.watchers = [cpu.watch(0, len(cpu.memory)) for cpu in self.cpus]
+        for cpu in self.cpus:
+            cpu.take_dirty()
+        self.memories = [bytearray(bytes(cpu.memory)) for cpu in self.cpus]
+        self.states = [self.__state(cpu) for cpu in self.cpus]
+        self.entries.clear()
+        self.cycle = game.current_cycle
+
+    def stop(self):
+        for cpu, watcher in zip(self.cpus, self.watchers):
+            cpu.unwatch(watcher)
+        self.watchers = []
+
+    def record(self):
+        """Keep what changed since the last record as one cycle, nothing when nothing changed"""
+        changes = []
+        for index, cpu in enumerate(self.cpus):
+            dirty = cpu.take_dirty()
+            state = self.__state(cpu)
+            old = self.states[index]
+            if not dirty and state == old:
+                continue
+            memory = cpu.memory
+            copy = self.memories[index]
+            written = []
+            address = 0
+            while dirty:
+                if dirty & 1 and copy[address] != memory[address]:
+                    written.append((address, copy[address]))
+                    copy[address] = memory[address]
+                dirty >>= 1
+                address += 1
+            self.states[index] = state
+            if written or state != old:
+                changes.append(CpuChange(cpu, *old, written))
+        if changes or self.game.current_cycle != self.cycle:
+            self.entries.append((self.cycle, changes))
+        self.cycle = self.game.current_cycle
+
+    def undo(self) -> bool:
+        """Put back the state before the last cycle recorded
+
+        The changes since the last record are recorded first, in the middle of a cycle
+        the state goes back to the start of that cycle.
+
+        Returns:
+            bool: False when there is no cycle left to undo
+        """
+        self.record()
+        if not self.entries:
+            return False
+        cycle, changes = self.entries.pop()
+        for change in changes:
+            cpu = change.cpu
+            cpu.registers[:] = change.registers
+            cpu.flags.value = change.flags
+            cpu.current_cycle = change.timer
+            index = self.cpus.index(cpu)
+            copy = self.memories[index]
+            for address, value in change.memory:
+                cpu.memory[address] = value
+                copy[address] = value
+            self.states[index] = (change.registers, change.flags, change.timer)
+        self.game.current_cycle = cycle
+        self.cycle = cycle
+        return True
+
+    @staticmethod
+    def __state(cpu: CPU) -> tuple:
+        return tuple(cpu.registers), cpu.flags.value, cpu.current_cycle
@@ -0,0 +1,171 @@
+"""Precompiled object format for codewar programs
+
+An object file holds the code of a program together with a pre-decoded instruction table,
+so a CPU can start executing without decoding anything until its code is overwritten.
+
+Layout (big endian, like the instructions):
+    header: magic, version, reserved, load address, entry point, code length, table entries, crc32
+    code: the instruction bytes, loaded at the load address
+    table: one record per decodable offset of the code (offset, size, opcode, number of operands, operands)
+
+The crc32 covers the header (with a zeroed checksum), the code and the table.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Union
+    from pathlib import Path
+
+import struct
+import zlib
+from dataclasses import dataclass, field
+
+from cpu import CPU, MemoryType, MoveType
+from exception import ObjectFormatError
+
+MAGIC = b"CWOB"
+VERSION = 1
+HEADER = struct.Struct(">4sBBHHHHI")
+RECORD = struct.Struct(">BBBBBBBBH")
+MEMORY_SIZE = 256
+OPCODES = {name: opcode for opcode, name in CPU.instruction_names.items()}
+
+
+@dataclass
+class ObjectProgram:
+    code: bytes
+    load_address: int = 0x10
+    entry: int = 0x10
+    decode_table: dict[int, tuple[int, tuple]] = field(default_factory=dict)
+
+
+def is_object(content: bytes) -> bool:
+    """Whenever the content of a file is an object file or a raw binary"""
+    return content[:len(MAGIC)] == MAGIC
+
+
+def build_object(code: bytes, load_address: int = 0x10, entry: int = None) -> bytes:
+    """Build an object file from raw instruction bytes
+
+    Every offset of the code is decoded as the CPU would do it once the code is loaded,
+    offsets that do not hold a valid instruction are left out of the table
+
+    Args:
+        code (bytes): the raw instruction bytes, as written by the compiler
+        load_address (int, optional): where the code is loaded in memory. Defaults to 0x10.
+        entry (int, optional): the initial PC. Defaults to the load address.
+
+    Raises:
+        ObjectFormatError: if the code does not fit in the memory of a CPU
+
+    Returns:
+        bytes: the content of the object file
+    """
+    if entry is None:
+        entry = load_address
+    if load_address + len(code) > MEMORY_SIZE:
+        raise ObjectFormatError("the code does not fit in the memory of a CPU")
+    memory = bytearray(MEMORY_SIZE)
+    memory[load_address: load_address + len(code)] = code
+    cpu = CPU(None, memory)
+
+    records = []
+    for offset in range(load_address, load_address + len(code)):
+        try:
+            values = cpu.decode(memory[offset: offset + 2])
+            if values[0] == "move":
+                values = cpu.decode(memory[offset: offset + 4])
+        except Exception:
+            continue
+        if len(values) == 1 and values[0] == "move":
+            # move truncated by the end of the memory, decoded at runtime
+            continue
+        records.append(_pack_record(offset, values))
+
+    table = b"".join(records)
+    header = HEADER.pack(MAGIC, VERSION, 0, load_address, entry, len(code), len(records), 0)
+    checksum = zlib.crc32(header + code + table)
+    header = HEADER.pack(MAGIC, VERSION, 0, load_address, entry, len(code), len(records), checksum)
+    return header + code + table
+
+
+def read_object(content: bytes) -> ObjectProgram:
+    """Parse and check the content of an object file
+
+    Args:
+        content (bytes): the content of the object file
+
+    Raises:
+        ObjectFormatError: if the file is truncated, corrupted or from an unsupported version
+
+    Returns:
+        ObjectProgram: the code, addresses and decode table of the program
+    """
+    if len(content) < HEADER.size:
+        raise ObjectFormatError("truncated object header")
+    magic, version, reserved, load_address, entry, code_length, entries, checksum = HEADER.unpack_from(content)
+    if magic != MAGIC:
+        raise ObjectFormatError("not an object file")
+    if version != VERSION:
+        raise ObjectFormatError(f"unsupported object version {version}")
+    end = HEADER.size + code_length + entries * RECORD.size
+    if len(content) != end:
+        raise ObjectFormatError("object size does not match its header")
+    header = HEADER.pack(magic, version, reserved, load_address, entry, code_length, entries, 0)
+    if zlib.crc32(header + content[HEADER.size:]) != checksum:
+        raise ObjectFormatError("object checksum mismatch")
+    if load_address + code_length > MEMORY_SIZE:
+        raise ObjectFormatError("the code does not fit in the memory of a CPU")
+
+    code = content[HEADER.size: HEADER.size + code_length]
+    decode_table = {}
+    for position in range(HEADER.size + code_length, end, RECORD.size):
+        offset, size, values = _unpack_record(content, position)
+        decode_table[offset] = (size, values)
+    return ObjectProgram(code, load_address, entry, decode_table)
+
+
+def load_object(file_path: Union[str, Path]) -> ObjectProgram:
+    file = open(file_path, "rb")
+    content = file.read()
+    file.close()
+    return read_object(content)
+
+
+def write_object(file_path: Union[str, Path], code: bytes, load_address: int = 0x10, entry: int = None):
+    file = open(file_path, "wb")
+    file.write(build_object(code, load_address, entry))
+    file.close()
+
+
+def _pack_record(offset: int, values: tuple) -> bytes:
+    name = values[0]
+    operands = [0, 0, 0, 0, 0]
+    if name == "move":
+        _, move_type, source_type, destination_type, source, destination = values
+        operands = [move_type.value, source_type.value, destination_type.value, source, destination]
+        size = 4
+    else:
+        for i, operand in enumerate(values[1:]):
+            operands[i] = operand.value if isinstance(operand, MemoryType) else operand
+        size = 2
+    return RECORD.pack(offset, size, OPCODES[name], len(values) - 1, *operands)
+
+
+def _unpack_record(content: bytes, position: int) -> tuple[int, int, tuple]:
+    offset, size, opcode, count, first, second, third, fourth, fifth = RECORD.unpack_from(content, position)
+    try:
+        name = CPU.instruction_names[opcode]
+        if name == "move":
+            values = (name, MoveType(first), MemoryType(second), MemoryType(third), fourth, fifth)
+        elif count == 0:
+            values = (name,)
+        elif count == 2:
+            values = (name, MemoryType(first), second)
+        else:
+            values = (name, MemoryType(first), second, third)
+    except (KeyError, ValueError):
+        raise ObjectFormatError(f"invalid decode table record at offset {offset:#x}")
+    return offset, size, values
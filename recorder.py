@@ -0,0 +1,346 @@
+"""Compact binary trace of a match
+
+The recorder streams the events of every cycle (instruction executed by each CPU, memory writes
+with the CPU which did them, interruptions and color changes) into a bounded buffer which is written
+in bulk, optionally through zlib.
+
+Every event starts with its kind, followed by varints. Cycles and CPU indexes are delta encoded
+(the cycle against the previous cycle, the CPU against the CPU of the previous event) and signed
+values are zigzag encoded. Within a cycle, writes, interruptions and color changes come in execution
+order, followed by one block with the PC of every CPU, encoded against the PCs of the previous cycle.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from typing import Iterator, Union
+    from pathlib import Path
+    from cpu import CPU
+    from game import Game
+
+import struct
+import zlib
+
+from exception import TraceFormatError
+
+MAGIC = b"CWTR"
+VERSION = 1
+HEADER = struct.Struct(">4sBBBB")
+COMPRESSED = 0b1
+
+CYCLE = 0
+INSTRUCTION = 1
+WRITE = 2
+INTERRUPTION = 3
+COLOR = 4
+# block of the instructions of a cycle, read back as INSTRUCTION events
+INSTRUCTIONS = 5
+SAME_INSTRUCTIONS = 6
+
+
+class TraceEvent(NamedTuple):
+    """An event of the trace
+
+    cpu is the index (y * width + x) of the cpu the event happened on, or the origin of a write.
+    For a write, target is the cpu whose memory was written, address and value the written byte.
+    For an instruction, address is the PC the instruction was executed at.
+    For an interruption value is the vector, for a color change the new color.
+    """
+    cycle: int
+    kind: int
+    cpu: int
+    target: int
+    address: int
+    value: int
+
+
+class TraceRecorder:
+    buffer: bytearray
+    buffer_size: int
+    width: int
+    cycle: int
+    last_cpu: int
+    last_pcs: list[int]
+
+    def __init__(self, file_path: Union[str, Path], compress: bool = False, width: int = 16, buffer_size: int = 1 << 16):
+        """
+        Args:
+            file_path (Union[str, Path]): where the trace is written
+            compress (bool, optional): compress the trace with zlib. Defaults to False.
+            width (int, optional): width of the game board, used to index the CPUs. Defaults to 16.
+            buffer_size (int, optional): the buffer is written once it holds that many bytes,
+            checked at each cycle. Defaults to 64KiB.
+        """
+        self.file = open(file_path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, COMPRESSED if compress else 0, width, 0))
+        self.compressor = zlib.compressobj() if compress else None
+        self.buffer = bytearray()
+        self.buffer_size = buffer_size
+        self.width = width
+        self.cycle = 0
+        self.last_cpu = 0
+        self.last_pcs = []
+
+    def __enter__(self) -> TraceRecorder:
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def start(self, game: Game):
+        """Called by the game before its first cycle"""
+        self.cycle = game.current_cycle
+
+    def begin_cycle(self, cycle: int):
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+        self.buffer.append(CYCLE)
+        write_varint(self.buffer, cycle - self.cycle)
+        self.cycle = cycle
+
+    def instructions(self, pcs: list[int]):
+        """Record the PC each cpu executed its instruction at, in board order, at the end of a cycle
+
+        Each PC is encoded against the PC of the same cpu at the previous cycle,
+        a cycle where every cpu executed at the same PCs as the previous one costs one byte
+        """
+        if pcs == self.last_pcs:
+            self.buffer.append(SAME_INSTRUCTIONS)
+            return
+        buffer = self.buffer
+        buffer.append(INSTRUCTIONS)
+        write_varint(buffer, len(pcs))
+        last_pcs = self.last_pcs
+        if len(last_pcs) != len(pcs):
+            last_pcs = [0] * len(pcs)
+        for pc, last_pc in zip(pcs, last_pcs):
+            delta = pc - last_pc
+            if 0 <= delta < 64:
+                buffer.append(delta << 1)
+            else:
+                write_varint(buffer, zigzag(delta))
+        self.last_pcs = pcs
+
+    def memory_write(self, origin: CPU, target: CPU, address: int, value: int):
+        index = origin.pos_y * self.width + origin.pos_x
+        target_index = target.pos_y * self.width + target.pos_x
+        address &= 0xff
+        buffer = self.buffer
+        buffer.append(WRITE)
+        write_varint(buffer, zigzag(index - self.last_cpu))
+        write_varint(buffer, zigzag(target_index - index))
+        buffer.append(address)
+        buffer.append(value)
+        self.last_cpu = index
+        if address < 2:
+            buffer.append(COLOR)
+            write_varint(buffer, zigzag(target_index - index))
+            write_varint(buffer, target.memory[0] << 8 | target.memory[1])
+            self.last_cpu = target_index
+
+    def interruption(self, cpu: CPU, vector: int):
+        index = cpu.pos_y * self.width + cpu.pos_x
+        self.buffer.append(INTERRUPTION)
+        write_varint(self.buffer, zigzag(index - self.last_cpu))
+        self.buffer.append(vector)
+        self.last_cpu = index
+
+    def trap(self, origin: CPU, target: CPU):
+        """The interruption of the target is recorded by interruption"""
+
+    def flush(self):
+        """Write the buffered events in one go"""
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        if self.compressor is not None:
+            data = self.compressor.compress(data)
+        if data:
+            self.file.write(data)
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        if self.compressor is not None:
+            self.file.write(self.compressor.flush())
+        self.file.close()
+
+
+class RecorderGroup:
+    """Several recorders of the same game, which all see every event in the same order
+
+    Game(recorder=[...]) wraps its list of recorders in a group.
+    """
+    recorders: list
+
+    def __init__(self, recorders: list):
+        self.recorders = list(recorders)
+
+    def __enter__(self) -> RecorderGroup:
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def start(self, game: Game):
+        for recorder in self.recorders:
+            recorder.start(game)
+
+    def begin_cycle(self, cycle: int):
+        for recorder in self.recorders:
+            recorder.begin_cycle(cycle)
+
+    def instructions(self, pcs: list[int]):
+        for recorder in self.recorders:
+            recorder.instructions(pcs)
+
+    def memory_write(self, origin: CPU, target: CPU, address: int, value: int):
+        for recorder in self.recorders:
+            recorder.memory_write(origin, target, address, value)
+
+    def interruption(self, cpu: CPU, vector: int):
+        for recorder in self.recorders:
+            recorder.interruption(cpu, vector)
+
+    def trap(self, origin: CPU, target: CPU):
+        for recorder in self.recorders:
+            recorder.trap(origin, target)
+
+    def close(self):
+        for recorder in self.recorders:
+            recorder.close()
+
+
+def read_trace(file_path: Union[str, Path], chunk_size: int = 1 << 16) -> Iterator[TraceEvent]:
+    """Iterate over the events of a trace without loading the whole file
+
+    Args:
+        file_path (Union[str, Path]): the trace file
+        chunk_size (int, optional): how many bytes are read at once. Defaults to 64KiB.
+
+    Raises:
+        TraceFormatError: if the file is not a trace or ends in the middle of an event
+
+    Yields:
+        TraceEvent: the events, in the order they were recorded
+    """
+    with open(file_path, "rb") as file:
+        header = file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise TraceFormatError("truncated trace header")
+        magic, version, flags, width, _ = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise TraceFormatError("not a trace file")
+        if version != VERSION:
+            raise TraceFormatError(f"unsupported trace version {version}")
+        decompressor = zlib.decompressobj() if flags & COMPRESSED else None
+
+        state = [0, 0, []]  # cycle, last cpu, last pcs
+        pending = b""
+        while True:
+            chunk = file.read(chunk_size)
+            end = not chunk
+            if decompressor is not None:
+                # the decompressor may return nothing for a small chunk, only the file tells the end
+                try:
+                    chunk = decompressor.flush() if end else decompressor.decompress(chunk)
+                except zlib.error as error:
+                    raise TraceFormatError(f"corrupted compressed trace: {error}") from None
+                if end and (not decompressor.eof or decompressor.unused_data):
+                    raise TraceFormatError("corrupted compressed trace")
+            if chunk:
+                pending += chunk
+                consumed = 0
+                for event, consumed in _parse(pending, state):
+                    if event is not None:
+                        yield event
+                pending = pending[consumed:]
+            if end:
+                break
+        if pending:
+            raise TraceFormatError("trace ends in the middle of an event")
+
+
+def _parse(data: bytes, state: list) -> Iterator[tuple[Union[TraceEvent, None], int]]:
+    """Parse the complete events of data, yield each event with the position after it
+
+    Markers which only update the state are yielded as None
+    """
+    position = 0
+    size = len(data)
+    while position < size:
+        try:
+            cycle, last_cpu, _ = state
+            kind = data[position]
+            cursor = position + 1
+            if kind == CYCLE:
+                delta, cursor = read_varint(data, cursor)
+                state[0] = cycle + delta
+                position = cursor
+                yield None, position
+                continue
+            if kind == SAME_INSTRUCTIONS or kind == INSTRUCTIONS:
+                pcs = state[2]
+                if kind == INSTRUCTIONS:
+                    count, cursor = read_varint(data, cursor)
+                    if len(pcs) != count:
+                        pcs = [0] * count
+                    new_pcs = []
+                    for last_pc in pcs:
+                        delta, cursor = read_varint(data, cursor)
+                        new_pcs.append(last_pc + unzigzag(delta))
+                    pcs = new_pcs
+                state[2] = pcs
+                position = cursor
+                yield None, position
+                for cpu, pc in enumerate(pcs):
+                    yield TraceEvent(cycle, INSTRUCTION, cpu, cpu, pc, 0), position
+                continue
+            delta, cursor = read_varint(data, cursor)
+            cpu = last_cpu + unzigzag(delta)
+            if kind == WRITE:
+                delta, cursor = read_varint(data, cursor)
+                event = TraceEvent(cycle, kind, cpu, cpu + unzigzag(delta), data[cursor], data[cursor + 1])
+                cursor += 2
+            elif kind == INTERRUPTION:
+                event = TraceEvent(cycle, kind, cpu, cpu, 0, data[cursor])
+                cursor += 1
+            elif kind == COLOR:
+                color, cursor = read_varint(data, cursor)
+                event = TraceEvent(cycle, kind, cpu, cpu, 0, color)
+            else:
+                raise TraceFormatError(f"unknown trace event {kind}")
+        except IndexError:
+            # the end of the event is in the next chunk
+            return
+        state[1] = cpu
+        position = cursor
+        yield event, position
+
+
+def zigzag(value: int) -> int:
+    return value << 1 if value >= 0 else ((-value) << 1) - 1
+
+
+def unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+def write_varint(buffer: bytearray, value: int):
+    while value > 0x7f:
+        buffer.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data: bytes, position: int) -> tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
@@ -0,0 +1,260 @@
+"""Seekable replay of a match
+
+A replay holds a full copy of the memory of the board (keyframe) every few cycles and, for every cycle,
+the bytes written during that cycle (delta frame). Seeking to a cycle loads the nearest keyframe before it
+and applies the following delta frames, so any cycle can be shown without simulating the match again.
+
+Layout:
+    header: magic, version, width, height, keyframe interval, player 1 color, player 2 color
+    frames: keyframes (cycle, zlib compressed memories) and delta frames (cycle, written bytes)
+    index: cycle and file offset of every keyframe, followed by the footer (offset of the index, last cycle, magic)
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Iterator, List, Union
+    from pathlib import Path
+    from cpu import CPU
+    from game import Game
+
+import bisect
+import struct
+import zlib
+
+from exception import ReplayFormatError
+from recorder import zigzag, unzigzag, write_varint, read_varint
+from view import View
+
+MAGIC = b"CWRP"
+VERSION = 1
+HEADER = struct.Struct(">4sBBBHHH")
+FRAME = struct.Struct(">BII")
+INDEX_ENTRY = struct.Struct(">II")
+FOOTER = struct.Struct(">QI4s")
+KEYFRAME = 0
+DELTA = 1
+MEMORY_SIZE = 256
+
+
+class ReplayWriter:
+    """Record a replay of a match, used as the recorder of a Game"""
+    keyframe_interval: int
+    writes: dict[tuple[int, int], int]
+    keyframes: list[tuple[int, int]]
+
+    def __init__(self, file_path: Union[str, Path], keyframe_interval: int = 50):
+        """
+        Args:
+            file_path (Union[str, Path]): where the replay is written
+            keyframe_interval (int, optional): number of cycles between two keyframes. Defaults to 50.
+        """
+        self.file = open(file_path, "wb")
+        self.keyframe_interval = keyframe_interval
+        self.writes = {}
+        self.keyframes = []
+        self.board = None
+        self.width = 0
+        self.cycle = 0
+
+    def __enter__(self) -> ReplayWriter:
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def start(self, game: Game):
+        """Write the header and the keyframe of the initial board"""
+        self.board = game.board
+        self.width = len(game.board[0])
+        self.cycle = game.current_cycle
+        self.file.write(HEADER.pack(
+            MAGIC, VERSION, self.width, len(game.board), self.keyframe_interval,
+            getattr(game, "player1_color", 0), getattr(game, "player2_color", 0),
+        ))
+        self.__write_keyframe()
+
+    def begin_cycle(self, cycle: int):
+        self.__end_cycle()
+        self.cycle = cycle
+
+    def instructions(self, pcs: list[int]):
+        pass
+
+    def interruption(self, cpu: CPU, vector: int):
+        pass
+
+    def trap(self, origin: CPU, target: CPU):
+        pass
+
+    def memory_write(self, origin: CPU, target: CPU, address: int, value: int):
+        self.writes[(target.pos_y * self.width + target.pos_x, address & 0xff)] = value
+
+    def close(self):
+        if self.file.closed:
+            return
+        if self.board is not None:
+            self.__end_cycle()
+        index_offset = self.file.tell()
+        self.file.write(struct.pack(">I", len(self.keyframes)))
+        for cycle, offset in self.keyframes:
+            self.file.write(INDEX_ENTRY.pack(cycle, offset))
+        self.file.write(FOOTER.pack(index_offset, self.cycle, MAGIC))
+        self.file.close()
+
+    def __end_cycle(self):
+        """Write the delta frame of the current cycle, and a keyframe if it is time for one"""
+        if self.writes:
+            data = bytearray()
+            last_cpu = 0
+            for (cpu, address), value in self.writes.items():
+                write_varint(data, zigzag(cpu - last_cpu))
+                data.append(address)
+                data.append(value)
+                last_cpu = cpu
+            self.file.write(FRAME.pack(DELTA, self.cycle, len(data)))
+            self.file.write(data)
+            self.writes = {}
+        if self.cycle > 0 and self.cycle % self.keyframe_interval == 0:
+            self.__write_keyframe()
+
+    def __write_keyframe(self):
+        memories = b"".join(bytes(cpu.memory) for array in self.board for cpu in array)
+        data = zlib.compress(memories)
+        self.keyframes.append((self.cycle, self.file.tell()))
+        self.file.write(FRAME.pack(KEYFRAME, self.cycle, len(data)))
+        self.file.write(data)
+
+
+class ReplayCell:
+    """Stand-in for a CPU of the board, the view only needs its memory"""
+    memory: bytearray
+
+    def __init__(self, memory: bytearray):
+        self.memory = memory
+
+
+class ReplayPlayer:
+    """Show any cycle of a replay, without a Game engine
+
+    It has the board and player colors of a Game, so it can be given to a View
+    """
+    board: List[List[ReplayCell]]
+    player1_color: int
+    player2_color: int
+    cycle: int
+    last_cycle: int
+
+    def __init__(self, file_path: Union[str, Path], view: bool = True):
+        self.file = open(file_path, "rb")
+        header = self.file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ReplayFormatError("truncated replay header")
+        magic, version, self.width, self.height, self.keyframe_interval, self.player1_color, self.player2_color = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ReplayFormatError("not a replay file")
+        if version != VERSION:
+            raise ReplayFormatError(f"unsupported replay version {version}")
+
+        self.file.seek(-FOOTER.size, 2)
+        index_offset, self.last_cycle, magic = FOOTER.unpack(self.file.read(FOOTER.size))
+        if magic != MAGIC:
+            raise ReplayFormatError("replay has no index, it was not closed")
+        self.frames_end = index_offset
+        self.file.seek(index_offset)
+        count, = struct.unpack(">I", self.file.read(4))
+        self.keyframes = [INDEX_ENTRY.unpack(self.file.read(INDEX_ENTRY.size)) for _ in range(count)]
+        self.keyframe_cycles = [cycle for cycle, _ in self.keyframes]
+        if not self.keyframes:
+            raise ReplayFormatError("replay has no keyframe")
+
+        self.board = [[ReplayCell(bytearray(MEMORY_SIZE)) for _ in range(self.width)] for _ in range(self.height)]
+        self.view = View(self) if view else None
+        self.seek(0)
+
+    def __enter__(self) -> ReplayPlayer:
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+    def seek(self, cycle: int):
+        """Put the board in the state it had at the end of the cycle (0 being the initial board)"""
+        cycle = max(0, min(cycle, self.last_cycle))
+        position = bisect.bisect_right(self.keyframe_cycles, cycle) - 1
+        _, offset = self.keyframes[position]
+        self.file.seek(offset)
+        self.__apply_frames(cycle)
+        self.cycle = cycle
+
+    def step(self):
+        """Go to the next cycle"""
+        if self.cycle < self.last_cycle:
+            self.cycle += 1
+            self.__apply_frames(self.cycle)
+
+    def play(self, first: int = 0, last: int = None) -> Iterator[int]:
+        """Show the cycles from first to last in the view, yield each cycle once shown"""
+        last = self.last_cycle if last is None else min(last, self.last_cycle)
+        self.seek(first)
+        while True:
+            if self.view is not None:
+                self.view.update()
+            yield self.cycle
+            if self.cycle >= last:
+                return
+            self.step()
+
+    def __apply_frames(self, cycle: int):
+        """Read frames from the current file position and apply them until the given cycle,
+        the file is left at the first frame after that cycle
+        """
+        while self.file.tell() < self.frames_end:
+            offset = self.file.tell()
+            kind, frame_cycle, size = FRAME.unpack(self.file.read(FRAME.size))
+            if frame_cycle > cycle:
+                self.file.seek(offset)
+                return
+            data = self.file.read(size)
+            if kind == KEYFRAME:
+                self.__apply_keyframe(data)
+            else:
+                self.__apply_delta(data)
+
+    def __apply_keyframe(self, data: bytes):
+        memories = zlib.decompress(data)
+        position = 0
+        for array in self.board:
+            for cell in array:
+                cell.memory[:] = memories[position: position + MEMORY_SIZE]
+                position += MEMORY_SIZE
+
+    def __apply_delta(self, data: bytes):
+        cpu = 0
+        position = 0
+        while position < len(data):
+            delta, position = read_varint(data, position)
+            cpu += unzigzag(delta)
+            self.board[cpu // self.width][cpu % self.width].memory[data[position]] = data[position + 1]
+            position += 2
+
+
+def main(argv: list[str] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser("replay", description="Show a recorded match of codeWar")
+    parser.add_argument("file", help="the replay file, recorded with game.py --replay", type=str)
+    parser.add_argument("-f", "--first", help="first cycle to show", type=int, default=0)
+    parser.add_argument("-l", "--last", help="last cycle to show, default goes to the end of the match", type=int, default=None)
+    args = parser.parse_args(argv)
+    with ReplayPlayer(args.file) as player:
+        for _ in player.play(args.first, args.last):
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Spectator server streaming the colors of the board over TCP
+
+The server runs an asyncio loop in its own thread. The game publishes the board after each cycle,
+only the cells whose color changed are sent, so the simulation never waits for the spectators.
+The loop is woken at most once until it has sent the board: when the game publishes faster than the loop
+runs, the boards in between are merged and only the latest colors are sent.
+
+Line protocol (text, numbers in hexadecimal):
+    H <width> <height> <player 1 color> <player 2 color>    sent before every full board
+    F <cycle> <color> <color> ...                           full board, in board order
+    D <cycle> <cell>:<color> <cell>:<color> ...            cells which changed during the cycle
+
+Every spectator has a bounded queue. When a spectator is too slow and its queue is full,
+the queued diffs are dropped and it receives a full board instead.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import AsyncIterator, Union
+    from game import Game
+
+import asyncio
+import threading
+
+# queued to a spectator when the server stops
+_CLOSE = object()
+
+
+class SpectatorServer:
+    host: str
+    port: int
+    queue_size: int
+    clients: set[asyncio.Queue]
+    colors: list[int]
+    cycle: int
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, queue_size: int = 16):
+        """
+        Args:
+            host (str, optional): address to listen on. Defaults to "127.0.0.1".
+            port (int, optional): port to listen on, 0 picks a free port. Defaults to 0.
+            queue_size (int, optional): frames queued per spectator before dropping. Defaults to 16.
+        """
+        self.host = host
+        self.port = port
+        self.queue_size = queue_size
+        self.clients = set()
+        self.colors = []
+        self.cycle = 0
+        self.header = "H 0 0 0 0"
+        # the last board published by the game, sent by the loop in __flush
+        self.latest = None
+        self.scheduled = False
+        self.lock = threading.Lock()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="spectator-server", daemon=True)
+        self.server = None
+
+    def __enter__(self) -> SpectatorServer:
+        self.start()
+        return self
+
+    def __exit__(self, *_):
+        self.stop()
+
+    def start(self):
+        """Start listening, the port is known once this returns"""
+        self.thread.start()
+        self.server = asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(self.__handle, self.host, self.port), self.loop
+        ).result()
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    def stop(self):
+        if self.server is None:
+            return
+
+        async def close():
+            self.server.close()
+            await self.server.wait_closed()
+            for queue in self.clients:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(_CLOSE)
+
+        asyncio.run_coroutine_threadsafe(close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.server = None
+
+    @property
+    def client_count(self) -> int:
+        return len(self.clients)
+
+    def publish(self, game: Game):
+        """Send the cells which changed since the last sent cycle, called by the game after each cycle"""
+        colors = [cpu.memory[0] << 8 | cpu.memory[1] for array in game.board for cpu in array]
+        header = f"H {len(game.board[0]):x} {len(game.board):x} {getattr(game, 'player1_color', 0):x} {getattr(game, 'player2_color', 0):x}"
+        with self.lock:
+            self.latest = (header, game.current_cycle, colors)
+            if self.scheduled:
+                return
+            self.scheduled = True
+        self.loop.call_soon_threadsafe(self.__flush)
+
+    def __flush(self):
+        """Send the latest published board to the spectators"""
+        with self.lock:
+            header, cycle, colors = self.latest
+            self.scheduled = False
+        if header != self.header or len(colors) != len(self.colors):
+            self.__reset(header, cycle, colors)
+        else:
+            changes = [(cell, color) for cell, (color, last) in enumerate(zip(colors, self.colors)) if color != last]
+            self.__broadcast(cycle, changes)
+
+    def __reset(self, header: str, cycle: int, colors: list[int]):
+        self.header = header
+        self.cycle = cycle
+        self.colors = colors
+        for queue in self.clients:
+            self.__put(queue, None)
+
+    def __broadcast(self, cycle: int, changes: list[tuple[int, int]]):
+        self.cycle = cycle
+        for cell, color in changes:
+            self.colors[cell] = color
+        line = f"D {cycle:x} " + " ".join(f"{cell:x}:{color:x}" for cell, color in changes)
+        for queue in self.clients:
+            self.__put(queue, line)
+
+    def __put(self, queue: asyncio.Queue, line: Union[str, None]):
+        """Queue a line for a spectator, None asks for a full board"""
+        if queue.full():
+            while not queue.empty():
+                queue.get_nowait()
+            line = None
+        queue.put_nowait(line)
+
+    def __full_frame(self) -> str:
+        return f"F {self.cycle:x} " + " ".join(f"{color:x}" for color in self.colors)
+
+    async def __handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        queue = asyncio.Queue(self.queue_size)
+        self.clients.add(queue)
+        try:
+            writer.write(f"{self.header}\n{self.__full_frame()}\n".encode())
+            await writer.drain()
+            while True:
+                line = await queue.get()
+                if line is _CLOSE:
+                    break
+                if line is None:
+                    # the full board already holds every queued diff
+                    while not queue.empty():
+                        queue.get_nowait()
+                    line = f"{self.header}\n{self.__full_frame()}"
+                writer.write(line.encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.clients.discard(queue)
+            writer.close()
+
+
+async def spectate(host: str, port: int) -> AsyncIterator[tuple[int, list[int]]]:
+    """Connect to a spectator server and follow the board
+
+    Args:
+        host (str): address of the server
+        port (int): port of the server
+
+    Yields:
+        tuple[int, list[int]]: the cycle and the colors of the board in board order, after each frame
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    colors = []
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            kind, *fields = line.decode().split()
+            if kind == "H":
+                continue
+            cycle = int(fields[0], 16)
+            if kind == "F":
+                colors = [int(color, 16) for color in fields[1:]]
+            else:
+                for change in fields[1:]:
+                    cell, color = change.split(":")
+                    colors[int(cell, 16)] = int(color, 16)
+            yield cycle, colors
+    finally:
+        writer.close()
@@ -0,0 +1,402 @@
+"""Speculative parallel engine keeping the row-major order of Game.cycle
+
+Worker processes execute the instruction of every CPU of a cycle at the same time, against the memories
+of the start of the cycle (in a shared memory arena). Each CPU records the bytes it reads (its own memory,
+the memory of other CPUs through __get_relative_cpu, including the bytes of the instruction) and keeps
+its writes and traps instead of doing them.
+
+The main process then goes through the CPUs in row-major order. A CPU whose reads do not meet a byte
+written earlier in the cycle, and which was not trapped earlier in the cycle, had the same inputs as in
+Game.cycle: its registers, writes and traps are committed as they are. The others are executed again,
+in order, on the real board. The result is the same as Game.cycle, bit for bit.
+
+Only the CPUs which are not idle (see termination.is_idle) are executed by the workers: the instruction of an
+idle CPU changes nothing. An idle CPU written or interrupted before its turn is executed by the main process
+in its turn, and by the workers again from the next cycle. A worker sends for each CPU its state, its events
+and the bytes it read as a bitmask per CPU read (an int when it only read its own memory), so the main
+process mostly copies states.
+
+The engine uses the tracer of the CPUs to find the conflicts. The workers also keep the interruptions and
+the traps of the CPUs, so the recorder of the game sees the events of the committed CPUs in the order of
+Game.cycle, and the interruptions counted by a CPU are the same as with Game.cycle.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import List, Union
+    from game import Game
+
+import heapq
+import multiprocessing
+from multiprocessing.shared_memory import SharedMemory
+
+from cpu import CPU, PC
+from termination import is_idle
+
+MEMORY_SIZE = 256
+WRITE = 0
+INTERRUPTION = 1
+# events of the cpu itself, only given to the recorder when the speculation is committed
+INTERRUPTED = 2
+TRAP = 3
+
+
+class SpeculativeEngine:
+    workers: int
+    committed: int
+    executed_again: int
+
+    def __init__(self, workers: int = 2):
+        """
+        Args:
+            workers (int, optional): number of processes executing the CPUs. Defaults to 2.
+        """
+        self.workers = workers
+        self.committed = 0
+        self.executed_again = 0
+        self.game = None
+
+    def start(self, game: Game):
+        self.game = game
+        self.recorder = game.recorder
+        height = len(game.board)
+        self.width = len(game.board[0])
+        self.cpus = [cpu for array in game.board for cpu in array]
+        self.arena = SharedMemory(create=True, size=len(self.cpus) * MEMORY_SIZE)
+        self.views = []
+        self.tracers = []
+        for index, cpu in enumerate(self.cpus):
+            start = index * MEMORY_SIZE
+            self.arena.buf[start: start + MEMORY_SIZE] = bytes(cpu.memory)
+            view = self.arena.buf[start: start + MEMORY_SIZE]
+            self.views.append(view)
+            cpu.memory = view
+            # the writes and interruptions of the CPUs executed again are recorded as conflicts
+            self.tracers.append(cpu.tracer)
+            cpu.tracer = self
+
+        chunk = -(-len(self.cpus) // self.workers)
+        self.worker_of = [index // chunk for index in range(len(self.cpus))]
+        self.corrections = [[] for _ in range(self.workers)]
+        self.awake = {index for index, cpu in enumerate(self.cpus) if not is_idle(cpu)}
+        self.dirty = {}
+        self.disturbed = set()
+        self.corrected = set()
+        self.woken = []
+        self.position = -1
+
+        context = multiprocessing.get_context()
+        self.results = context.Queue()
+        self.inboxes = [context.Queue() for _ in range(self.workers)]
+        self.processes = []
+        for worker in range(self.workers):
+            states = [
+                (index, self.__state(cpu), cpu.decode_cache, index in self.awake)
+                for index, cpu in enumerate(self.cpus) if self.worker_of[index] == worker
+            ]
+            process = context.Process(
+                target=_speculate,
+                args=(self.arena.name, self.width, height, states, self.inboxes[worker], self.results),
+                daemon=True,
+            )
+            process.start()
+            self.processes.append(process)
+
+    def cycle(self):
+        game = self.game
+        game.current_cycle += 1
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.begin_cycle(game.current_cycle)
+            pcs = [cpu.registers[PC] for cpu in self.cpus]
+        for inbox, corrections in zip(self.inboxes, self.corrections):
+            inbox.put(corrections)
+        results = []
+        for _ in self.processes:
+            batch = self.results.get()
+            if isinstance(batch, BaseException):
+                raise batch
+            results.extend(batch)
+        results.sort(key=lambda result: result[0])
+
+        cpus = self.cpus
+        awake = self.awake
+        dirty = self.dirty = {}
+        disturbed = self.disturbed = set()
+        corrected = self.corrected = set()
+        woken = self.woken = []
+        committed = 0
+        executed_again = 0
+        for index, state, events, reads, failed in results:
+            while woken and woken[0] < index:
+                self.__execute(heapq.heappop(woken))
+                executed_again += 1
+            if failed or index in disturbed or dirty and self.__conflict(index, reads):
+                self.__execute(index)
+                executed_again += 1
+                continue
+            self.position = index
+            committed += 1
+            cpu = cpus[index]
+            pc = cpu.registers[PC]
+            cpu.registers, cpu.flags.value, cpu.current_cycle, cpu.interruptions, cpu.pending = state
+            for kind, target, first, second in events:
+                if kind == WRITE:
+                    target_cpu = cpus[target]
+                    target_cpu.write(first, second, cpu)
+                    dirty[target] = dirty.get(target, 0) | 1 << first
+                    self.__wake(target)
+                    if recorder is not None:
+                        recorder.memory_write(cpu, target_cpu, first, second)
+                elif kind == INTERRUPTION:
+                    cpus[target].interruption(first)
+                elif recorder is None:
+                    continue
+                elif kind == INTERRUPTED:
+                    recorder.interruption(cpu, first)
+                else:
+                    recorder.trap(cpu, cpus[target])
+            if cpu.registers[PC] == pc and is_idle(cpu):
+                awake.discard(index)
+                corrected.add(index)
+        while woken:
+            self.__execute(heapq.heappop(woken))
+            executed_again += 1
+        self.position = -1
+        self.committed += committed
+        self.executed_again += executed_again
+        if recorder is not None:
+            recorder.instructions(pcs)
+
+        # the workers continue from the real state of the CPUs they could not guess
+        self.corrections = [[] for _ in self.processes]
+        for index in sorted(corrected):
+            self.corrections[self.worker_of[index]].append((index, self.__state(cpus[index]), index in awake))
+
+    def stop(self):
+        for inbox in self.inboxes:
+            inbox.put(None)
+        for process in self.processes:
+            process.join()
+        self.processes = []
+        for cpu, view, tracer in zip(self.cpus, self.views, self.tracers):
+            cpu.memory = bytearray(view)
+            cpu.tracer = tracer
+        for view in self.views:
+            view.release()
+        self.views = []
+        self.arena.close()
+        self.arena.unlink()
+
+    def memory_write(self, origin: CPU, target: CPU, address: int, value: int):
+        index = target.pos_y * self.width + target.pos_x
+        self.dirty[index] = self.dirty.get(index, 0) | 1 << address % MEMORY_SIZE
+        self.__wake(index)
+        if self.recorder is not None:
+            self.recorder.memory_write(origin, target, address, value)
+
+    def interruption(self, cpu: CPU, vector: int):
+        index = cpu.pos_y * self.width + cpu.pos_x
+        self.disturbed.add(index)
+        self.corrected.add(index)
+        self.__wake(index)
+        if self.recorder is not None:
+            self.recorder.interruption(cpu, vector)
+
+    def trap(self, origin: CPU, target: CPU):
+        if self.recorder is not None:
+            self.recorder.trap(origin, target)
+
+    def __conflict(self, index: int, reads) -> bool:
+        """Whenever a cpu read a byte written earlier in the cycle"""
+        dirty = self.dirty
+        if isinstance(reads, int):
+            return bool(dirty.get(index, 0) & reads)
+        return any(dirty.get(cpu, 0) & mask for cpu, mask in reads.items())
+
+    def __execute(self, index: int):
+        """Execute a cpu on the real board, in its turn"""
+        self.position = index
+        cpu = self.cpus[index]
+        pc = cpu.registers[PC]
+        cpu.execute()
+        if cpu.registers[PC] == pc and is_idle(cpu):
+            self.awake.discard(index)
+        self.corrected.add(index)
+
+    def __wake(self, index: int):
+        """Execute again an idle cpu which is written or interrupted, in this cycle when its turn has not passed"""
+        if index not in self.awake:
+            self.awake.add(index)
+            self.corrected.add(index)
+            if index > self.position:
+                heapq.heappush(self.woken, index)
+
+    @staticmethod
+    def __state(cpu: CPU) -> tuple:
+        """The state of a cpu copied between the board and the workers, its memory is in the arena"""
+        return cpu.registers, cpu.flags.value, cpu.current_cycle, cpu.interruptions, cpu.pending
+
+
+class SpeculativeMemory:
+    """Memory of a CPU during a speculation: the CPUs read are recorded, writes are kept aside"""
+
+    def __init__(self, host: SpeculativeHost, index: int, view: memoryview):
+        self.host = host
+        self.index = index
+        self.base = index * MEMORY_SIZE
+        self.view = view
+
+    def __len__(self) -> int:
+        return MEMORY_SIZE
+
+    def __getitem__(self, key):
+        host = self.host
+        reads = host.reads
+        if isinstance(key, slice):
+            start, stop, step = key.indices(MEMORY_SIZE)
+            if step == 1:
+                mask = ((1 << max(stop - start, 0)) - 1) << start
+            else:
+                mask = sum(1 << address for address in range(start, stop, step))
+            reads[self.index] = reads.get(self.index, 0) | mask
+            data = bytearray(self.view[key])
+            if host.overlay:
+                for position, address in enumerate(range(start, stop, step)):
+                    if self.base + address in host.overlay:
+                        data[position] = host.overlay[self.base + address]
+            return data
+        address = _address(key)
+        reads[self.index] = reads.get(self.index, 0) | 1 << address
+        value = host.overlay.get(self.base + address)
+        return self.view[address] if value is None else value
+
+    def __setitem__(self, address: int, value: int):
+        if not 0 <= value <= 0xff:
+            raise ValueError("byte must be in range(0, 256)")
+        address = _address(address)
+        self.host.overlay[self.base + address] = value
+        self.host.events.append((WRITE, self.index, address, value))
+
+
+class SpeculativeCell:
+    """Stand-in for the CPUs of the board during a speculation"""
+    # the writes are applied to the CPU when they are committed, through its write barrier
+    watchers = None
+
+    def __init__(self, host: SpeculativeHost, index: int, memory: SpeculativeMemory, width: int):
+        self.index = index
+        self.pos_x = index % width
+        self.pos_y = index // width
+        self.memory = memory
+        self.host = host
+
+    def interruption(self, interruption_vector: int):
+        self.host.events.append((INTERRUPTION, self.index, interruption_vector, 0))
+
+
+class SpeculativeHost:
+    """The game as seen by the CPUs of a worker"""
+    board: List[List[SpeculativeCell]]
+    memories: List[SpeculativeMemory]
+
+    def __init__(self, width: int, height: int, buffer: memoryview):
+        self.width = width
+        self.views = [buffer[index * MEMORY_SIZE: (index + 1) * MEMORY_SIZE] for index in range(width * height)]
+        self.memories = [SpeculativeMemory(self, index, view) for index, view in enumerate(self.views)]
+        self.board = [
+            [SpeculativeCell(self, y * width + x, self.memories[y * width + x], width) for x in range(width)]
+            for y in range(height)
+        ]
+        self.reads = {}
+        self.overlay = {}
+        self.events = []
+
+    def speculate(self, index: int, cpu: CPU) -> tuple:
+        """Execute the instruction of a cpu without changing the board
+
+        Returns:
+            tuple: index, state of the cpu (registers, flags, cycle of the timer, interruptions and pending vectors),
+            writes, traps and interruptions, the bytes read (bitmask of the memory of the cpu alone, or bitmask by cpu),
+            and whenever
+            the instruction raised an error
+        """
+        self.reads = {}
+        self.overlay = {}
+        self.events = []
+        array = self.board[cpu.pos_y]
+        cell = array[cpu.pos_x]
+        array[cpu.pos_x] = cpu
+        failed = False
+        try:
+            cpu.execute()
+        except Exception:
+            # may come from a stale read, the main process executes it again
+            failed = True
+        finally:
+            array[cpu.pos_x] = cell
+        state = (list(cpu.registers), cpu.flags.value, cpu.current_cycle, cpu.interruptions, cpu.pending)
+        reads = self.reads
+        if len(reads) == 1 and index in reads:
+            reads = reads[index]
+        return index, state, self.events, reads, failed
+
+    # the tracer of the cpus of the worker, the writes are already events
+
+    def memory_write(self, origin: CPU, target: Union[CPU, SpeculativeCell], address: int, value: int):
+        pass
+
+    def interruption(self, cpu: CPU, vector: int):
+        self.events.append((INTERRUPTED, cpu.pos_y * self.width + cpu.pos_x, vector, 0))
+
+    def trap(self, origin: CPU, target: Union[CPU, SpeculativeCell]):
+        self.events.append((TRAP, target.pos_y * self.width + target.pos_x, 0, 0))
+
+    def release(self):
+        for view in self.views:
+            view.release()
+
+
+def _address(address: int) -> int:
+    if not -MEMORY_SIZE <= address < MEMORY_SIZE:
+        raise IndexError("index out of range")
+    return address % MEMORY_SIZE
+
+
+def _speculate(name: str, width: int, height: int, states: list, inbox, results):
+    arena = SharedMemory(name)
+    host: Union[SpeculativeHost, None] = None
+    try:
+        host = SpeculativeHost(width, height, arena.buf)
+        cpus = {}
+        awake = set()
+        for index, state, cache, is_awake in states:
+            cpu = CPU(host, host.memories[index])
+            cpu.pos_x = index % width
+            cpu.pos_y = index // width
+            cpu.registers, cpu.flags.value, cpu.current_cycle, cpu.interruptions, cpu.pending = state
+            cpu.decode_cache = cache
+            cpu.tracer = host
+            cpus[index] = cpu
+            if is_awake:
+                awake.add(index)
+        while True:
+            corrections = inbox.get()
+            if corrections is None:
+                break
+            for index, state, is_awake in corrections:
+                cpu = cpus[index]
+                cpu.registers, cpu.flags.value, cpu.current_cycle, cpu.interruptions, cpu.pending = state
+                if is_awake:
+                    awake.add(index)
+                else:
+                    awake.discard(index)
+            results.put([host.speculate(index, cpus[index]) for index in sorted(awake)])
+    except BaseException as error:
+        results.put(error)
+    finally:
+        if host is not None:
+            host.release()
+        arena.close()
@@ -0,0 +1,97 @@
+"""Synchronous cycles: every CPU sees the board as it was at the start of the cycle
+
+With Game.cycle a CPU sees the writes of every CPU executed before it in the same cycle.
+With this engine a CPU reads the memory of the other CPUs from a copy taken at the start of the cycle,
+and its writes to other CPUs (move to an address, trap) are kept until every CPU has executed its
+instruction. They are then committed together by TileHost.deliver: by index of the CPU which sent them,
+then in the order they were sent, so the highest index wins when several CPUs write the same byte.
+
+A CPU still sees its own writes, and its memory is only changed by the others at the commit,
+so the CPUs of a cycle can be executed in any order, or in parallel (TileEngine(synchronous=True)).
+
+The recorder of the game sees the cycles like with Game.cycle, but the writes to other CPUs and the traps
+are recorded when they are applied at the end of the cycle.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import List, Union
+    from cpu import CPU
+    from game import Game
+
+from cpu import PC
+from tiles import RemoteCell, TileHost
+
+
+class SynchronousEngine:
+    cpus: List[CPU]
+    snapshots: List[bytearray]
+    order: List[int]
+
+    def __init__(self, order: List[int] = None):
+        """
+        Args:
+            order (List[int], optional): indexes of the CPUs in the order they are executed.
+            Defaults to the order of the board, the result is the same in any order.
+        """
+        self.order = order
+        self.game = None
+        self.recorder = None
+
+    def start(self, game: Game):
+        self.game = game
+        width = len(game.board[0])
+        self.cpus = [cpu for array in game.board for cpu in array]
+        self.snapshots = [bytearray(bytes(cpu.memory)) for cpu in self.cpus]
+        self.host = TileHost([0] * len(self.cpus))
+        self.host.board = [
+            [RemoteCell(self.host, y * width + x, self.snapshots[y * width + x], width) for x in range(width)]
+            for y in range(len(game.board))
+        ]
+        for cpu in self.cpus:
+            cpu.game = self.host
+        # the writes to other CPUs reach the recorder when they are applied, see memory_write
+        self.recorder = game.recorder
+        if self.recorder is not None:
+            for cpu in self.cpus:
+                cpu.tracer = self
+        if self.order is None:
+            self.order = list(range(len(self.cpus)))
+
+    def cycle(self):
+        game = self.game
+        game.current_cycle += 1
+        host = self.host
+        cpus = self.cpus
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.begin_cycle(game.current_cycle)
+            pcs = [cpu.registers[PC] for cpu in cpus]
+        for index in self.order:
+            host.execute(index, cpus[index], True)
+        received = host.outbox
+        host.outbox = []
+        TileHost.deliver(received, cpus, recorder)
+        for snapshot, cpu in zip(self.snapshots, cpus):
+            snapshot[:] = bytes(cpu.memory)
+        if recorder is not None:
+            # the PCs in the order of the board, whatever the order of execution
+            recorder.instructions(pcs)
+
+    def stop(self):
+        for cpu in self.cpus:
+            cpu.game = self.game
+            if self.recorder is not None:
+                cpu.tracer = self.recorder
+
+    def memory_write(self, origin: CPU, target: Union[CPU, RemoteCell], address: int, value: int):
+        if not isinstance(target, RemoteCell):
+            self.recorder.memory_write(origin, target, address, value)
+
+    def interruption(self, cpu: CPU, vector: int):
+        self.recorder.interruption(cpu, vector)
+
+    def trap(self, origin: CPU, target: Union[CPU, RemoteCell]):
+        self.recorder.trap(origin, self.cpus[target.index] if isinstance(target, RemoteCell) else target)
@@ -0,0 +1,178 @@
+"""Rules ending a match before max_cycles
+
+A rule is given to Game(terminations=[...]). It is started with the game, then checked after every cycle
+with the colors of the board (computed once per cycle for every rule). It returns the result of the match,
+1 or 2 for the winning player and 0 for a draw, or None while the match goes on.
+
+IdleLoops and UnassailableLead only end a match whose result can not change anymore, the result is the one
+of the full match. Elimination and StableTerritory are rules of the match: they decide before the end a
+match which could still turn around.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import List, Union
+    from cpu import CPU
+    from game import Game
+
+from cpu import PC
+
+# first byte of jmp with an immediate value
+JUMP_IMMEDIATE = 0xd4
+TIMER_ENABLED = 0xD
+
+
+def count_winner(colors: List[int], player1_color: int, player2_color: int) -> int:
+    """Result of the match counting the cells of each player, as at the end of Game.run"""
+    player1_count = 0
+    player2_count = 0
+    for color in colors:
+        if color == player1_color:
+            player1_count += 1
+        elif color == player2_color:
+            player2_count += 1
+    if player1_count > player2_count:
+        return 1
+    elif player1_count < player2_count:
+        return 2
+    return 0
+
+
+def is_idle(cpu: CPU) -> bool:
+    """Whenever the cpu jumps to its own instruction with the timer off and no interruption pending
+
+    An idle cpu writes nothing, it only runs something else once another cpu writes its memory or traps it.
+    """
+    pc = cpu.registers[PC]
+    memory = cpu.memory
+    if not 0 <= pc < len(memory) - 1 or memory[pc] != JUMP_IMMEDIATE or memory[pc + 1] != pc:
+        return False
+    return memory[TIMER_ENABLED] != 1 and memory[TIMER_ENABLED] != 2 and not cpu.pending
+
+
+def active_cycles(active: int, total: int, cycles: int) -> int:
+    """The most instructions the cpus which are not idle can execute in some cycles
+
+    Args:
+        active (int): the cpus which are not idle now
+        total (int): the cpus of the board
+        cycles (int): the cycles left
+    """
+    executed = 0
+    while cycles > 0 and active < total:
+        executed += active
+        # each of them can wake up its target
+        active = min(total, 2 * active)
+        cycles -= 1
+    return executed + cycles * active
+
+
+class Termination:
+    """Base of the rules, never ends the match"""
+
+    def start(self, game: Game):
+        pass
+
+    def check(self, game: Game, colors: List[int]) -> Union[int, None]:
+        return None
+
+
+class IdleLoops(Termination):
+    """End the match when every cpu is idle
+
+    Nothing can change the board anymore, the result is the one of the last cycle.
+    """
+
+    def check(self, game: Game, colors: List[int]) -> Union[int, None]:
+        for array in game.board:
+            for cpu in array:
+                if not is_idle(cpu):
+                    return None
+        return count_winner(colors, game.player1_color, game.player2_color)
+
+
+class UnassailableLead(Termination):
+    """End the match when the player behind can not catch up before max_cycles
+
+    Each changed cell moves the difference of the counts by at most 2. Only the cpus which are not idle
+    change colors: each changes at most its own cell and the one of its target in a cycle, and can wake up
+    that target, so the cpus which are not idle at most double at each cycle.
+    """
+    changes_per_cycle: Union[int, None]
+
+    def __init__(self, changes_per_cycle: int = None):
+        """
+        Args:
+            changes_per_cycle (int, optional): the most cells whose color can change in a cycle.
+            Defaults to None, the bound is then computed from the cpus which are not idle.
+        """
+        self.changes_per_cycle = changes_per_cycle
+
+    def check(self, game: Game, colors: List[int]) -> Union[int, None]:
+        remaining = game.max_cycles - game.current_cycle
+        if self.changes_per_cycle is None:
+            active = sum(not is_idle(cpu) for array in game.board for cpu in array)
+            swing = 4 * active_cycles(active, len(colors), remaining)
+        else:
+            swing = 2 * self.changes_per_cycle * remaining
+        player1_count = 0
+        player2_count = 0
+        for color in colors:
+            if color == game.player1_color:
+                player1_count += 1
+            elif color == game.player2_color:
+                player2_count += 1
+        lead = abs(player1_count - player2_count)
+        if lead > swing:
+            return 1 if player1_count > player2_count else 2
+        return None
+
+
+class Elimination(Termination):
+    """A player without any cell of its color loses the match"""
+
+    def check(self, game: Game, colors: List[int]) -> Union[int, None]:
+        player1_alive = game.player1_color in colors
+        player2_alive = game.player2_color in colors
+        if player1_alive and not player2_alive:
+            return 1
+        if player2_alive and not player1_alive:
+            return 2
+        if not player1_alive and not player2_alive:
+            return 0
+        return None
+
+
+class StableTerritory(Termination):
+    """End the match when no cell changed of color for some cycles, the cells are then counted"""
+    cycles: int
+
+    def __init__(self, cycles: int = 100):
+        """
+        Args:
+            cycles (int, optional): number of cycles without any change. Defaults to 100.
+        """
+        self.cycles = cycles
+        self.last_colors = None
+        self.stable = 0
+
+    def start(self, game: Game):
+        self.last_colors = None
+        self.stable = 0
+
+    def check(self, game: Game, colors: List[int]) -> Union[int, None]:
+        if colors == self.last_colors:
+            self.stable += 1
+        else:
+            self.stable = 0
+            self.last_colors = colors
+        if self.stable >= self.cycles:
+            return count_winner(colors, game.player1_color, game.player2_color)
+        return None
+
+
+def settled() -> List[Termination]:
+    """The rules which do not change the result of a match"""
+    return [IdleLoops(), UnassailableLead()]
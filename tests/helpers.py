@@ -0,0 +1,57 @@
+"""Warriors and boards shared by the tests of the engines, the recorders and the tournament"""
+from __future__ import annotations
+
+from cpu import SP
+from game import Game
+
+# add #1, r0 / move r0, @10:00 (color of the cpu on the right) / jmp #10
+WRITER = bytes([0x18, 0x81, 0x06, 0x28, 0x10, 0x00, 0xd4, 0x10])
+# add #1, r0 / push r0 / jmp #10
+PUSHER = bytes([0x18, 0x81, 0x08, 0x00, 0xd4, 0x10])
+# move #ab, r0 / move r0, @10:05 (byte 5 of the cpu on the right) / jmp #10
+WRITE_RIGHT = bytes([0x07, 0x00, 0x00, 0xab, 0x06, 0x28, 0x10, 0x05, 0xd4, 0x10])
+# move #cd, r0 / move r0, @80:05 (byte 5 of the cpu on the left) / jmp #10
+WRITE_LEFT = bytes([0x07, 0x00, 0x00, 0xcd, 0x06, 0x28, 0x80, 0x05, 0xd4, 0x10])
+# move @00:05, r1 (byte 5 of the cpu itself) / jmp #10
+READER = bytes([0x07, 0x41, 0x00, 0x05, 0xd4, 0x10])
+# trap #10 (the cpu on the right) / jmp #10
+TRAP_RIGHT = bytes([0xec, 0x10, 0xd4, 0x10])
+# trap #80 (the cpu on the left) / jmp #10
+TRAP_LEFT = bytes([0xec, 0x80, 0xd4, 0x10])
+# trap #00 (the cpu itself) / jmp #10
+TRAP_SELF = bytes([0xec, 0x00, 0xd4, 0x10])
+# copies its color in the cpu on the right
+PAINTER = bytes([
+    0x07, 0x40, 0x00, 0x00, 0x06, 0x28, 0x10, 0x00,
+    0x07, 0x40, 0x00, 0x01, 0x06, 0x28, 0x10, 0x01,
+    0xd4, 0x10,
+])
+
+
+def create_game(engine=None) -> Game:
+    """A match of 20 cycles with two writers and two pushers"""
+    game = Game(20, headless=True, engine=engine)
+    game.player1_color = 0x7c00
+    game.player2_color = 0x001f
+    for x, y, program in [(7, 0, WRITER), (3, 3, PUSHER), (12, 9, WRITER), (15, 15, PUSHER)]:
+        cpu = game.board[y][x]
+        cpu.memory[0x10:0x10 + len(program)] = program
+        cpu.registers[SP] = 0x80
+    return game
+
+
+def create_conflicts(engine=None) -> Game:
+    """The game of create_game with cpus reading, writing and trapping their neighbours in the same cycle"""
+    game = create_game(engine)
+    for x, y, program in [(3, 4, WRITE_RIGHT), (4, 4, READER), (3, 5, TRAP_RIGHT), (10, 6, TRAP_LEFT)]:
+        game.board[y][x].memory[0x10:0x10 + len(program)] = program
+    for x, y in [(4, 5), (9, 6)]:
+        # the trap handler is the loop at 0x10
+        game.board[y][x].memory[4] = 0x10
+        game.board[y][x].registers[SP] = 0x80
+    return game
+
+
+def state(game: Game) -> list:
+    """The memory, registers and flags of every cpu of the board"""
+    return [(bytes(cpu.memory), cpu.registers, cpu.flags.value) for array in game.board for cpu in array]
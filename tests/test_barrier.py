@@ -0,0 +1,48 @@
+from unittest import TestCase
+
+from cpu import CPU
+from game import Game
+from synchronous import SynchronousEngine
+from tests.helpers import WRITE_RIGHT
+
+
+class TestWriteBarrier(TestCase):
+
+    def create_writer(self, engine=None) -> Game:
+        game = Game(3, headless=True, engine=engine)
+        game.player1_color = game.player2_color = 0
+        game.board[4][3].memory[0x10:0x10 + len(WRITE_RIGHT)] = WRITE_RIGHT
+        return game
+
+    def test_watch(self):
+        game = self.create_writer()
+        target = game.board[4][4]
+        writes = []
+        watcher = target.watch(4, 8, lambda *write: writes.append(write))
+        colors = target.watch(0, 2, lambda *write: self.fail("the color is not written"))
+        game.run()
+        # move r0, @10:05 at the second cycle
+        self.assertEqual(writes, [(game.board[4][3], target, 5, 0xab)])
+        self.assertEqual(target.take_dirty(), 1 << 5)
+        self.assertEqual(target.dirty, 0)
+        target.unwatch(watcher)
+        target.unwatch(colors)
+        self.assertIsNone(target.watchers)
+
+    def test_dirty_without_callback(self):
+        cpu = CPU.load_from_bytes(bytes([0x08, 0x01, 0xd4, 0x10]), Game(headless=True), 1)
+        cpu.watch(0, 256)
+        cpu.registers[1] = 0x1234
+        # push r1 below an empty stack, at -2 and -1
+        cpu.execute()
+        self.assertEqual(cpu.take_dirty(), 0b11 << 254)
+        cpu.write(0x20, 1)
+        self.assertEqual(cpu.take_dirty(), 1 << 0x20)
+
+    def test_engine_writes(self):
+        game = self.create_writer(SynchronousEngine())
+        writes = []
+        game.board[4][4].watch(0, 256, lambda *write: writes.append(write))
+        game.run()
+        # applied at the end of the cycle, the sender is not known
+        self.assertEqual(writes, [(None, game.board[4][4], 5, 0xab)])
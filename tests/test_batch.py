@@ -0,0 +1,44 @@
+from unittest import TestCase
+
+from batch import BatchEngine
+from tests.helpers import create_conflicts, create_game, state
+
+
+class TestBatchEngine(TestCase):
+
+    def test_matches_sequential(self):
+        sequential = create_game()
+        result = sequential.run()
+        engine = BatchEngine(4)
+        batched = create_game()
+        engine.submit(batched)
+        self.assertEqual(engine.run(), [result])
+        self.assertEqual(batched.current_cycle, 20)
+        self.assertEqual(state(batched), state(sequential))
+
+    def test_refill_slots(self):
+        factories = [create_game, create_conflicts, create_conflicts, create_game, create_conflicts]
+        sequential = [factory() for factory in factories]
+        batched = [factory() for factory in factories]
+        for index, (first, second) in enumerate(zip(sequential, batched)):
+            first.max_cycles = second.max_cycles = 5 + index * 7
+        expected = [game.run() for game in sequential]
+        engine = BatchEngine(2)
+        for game in batched:
+            engine.submit(game)
+        self.assertEqual(engine.run(), expected)
+        for first, second in zip(sequential, batched):
+            self.assertEqual(second.current_cycle, first.current_cycle)
+            self.assertEqual(state(second), state(first))
+
+    def test_traps_to_empty_cells(self):
+        sequential = create_conflicts()
+        sequential.run()
+        engine = BatchEngine(1)
+        batched = create_conflicts()
+        engine.submit(batched)
+        engine.run()
+        # (4, 5) is trapped by (3, 5) before its turn and (9, 6) after it
+        self.assertEqual(batched.board[5][4].registers, sequential.board[5][4].registers)
+        self.assertEqual(batched.board[6][9].registers, sequential.board[6][9].registers)
+        self.assertEqual(bytes(batched.board[5][4].memory), bytes(sequential.board[5][4].memory))
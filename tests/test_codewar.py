@@ -0,0 +1,41 @@
+import contextlib
+import io
+import subprocess
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import codewar
+
+ROOT = Path(__file__).parent.parent
+
+
+class TestCodewar(TestCase):
+
+    def test_help(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(codewar.main(["--help"]), 0)
+        for command in codewar.COMMANDS:
+            self.assertIn(command, output.getvalue())
+
+    def test_unknown_command(self):
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(codewar.main(["nope"]), 2)
+
+    def test_compile_imports_only_the_compiler(self):
+        with TemporaryDirectory() as directory:
+            source = Path(directory) / "warrior.asm"
+            # add #1, r0 / jmp #10
+            source.write_text("add #1 r0\njmp #10\n")
+            script = f"import codewar, sys; codewar.main(['compile', {str(source)!r}]); print(sorted({{'cpu', 'numpy', 'game'}} & set(sys.modules)))"
+            result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True)
+            self.assertEqual(result.stdout.strip(), "[]")
+            self.assertEqual(Path(f"{source}.bin").read_bytes(), bytes([0x18, 0x81, 0xd4, 0x10]))
+
+    def test_run(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            codewar.main(["run", "--budget", "100"])
+        self.assertIn("instructions=100,", output.getvalue())
@@ -1,12 +1,12 @@
 from unittest import TestCase
 
-from cpu import CPU, MemoryType, PC
-from game import Game
+from cpu import MemoryType, PC
+from host import Host
 
 
 class TestJxx(TestCase):
     def setUp(self) -> None:
-        self.cpu = CPU(Game())
+        self.cpu = Host().cpu
 
     def create_instruction(self, instruction: int) -> bytearray:
         memory_type = MemoryType.register.value  # Rn
@@ -95,7 +95,7 @@ class TestJxx(TestCase):
 class TestBxx(TestCase):
 
     def setUp(self) -> None:
-        self.cpu = CPU(Game())
+        self.cpu = Host().cpu
 
     def create_instruction(self, instruction: int) -> bytearray:
         memory_type = MemoryType.register.value  # Rn
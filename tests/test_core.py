@@ -1,14 +1,14 @@
 from unittest import TestCase
 
 from cpu import CPU, PC
-from game import Game
+from host import Host
 
 
 class TestCPU(TestCase):
     cpu: CPU
 
     def setUp(self) -> None:
-        self.cpu = CPU(Game())
+        self.cpu = Host().cpu
 
     def test_timer(self):
         self.cpu.memory[0xd] = 1
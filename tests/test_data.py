@@ -1,13 +1,13 @@
 from unittest import TestCase
 
-from cpu import CPU, MemoryType, SP
-from game import Game
+from cpu import MemoryType, SP
+from host import Host
 
 
 class TestData(TestCase):
 
     def setUp(self) -> None:
-        self.cpu = CPU(Game())
+        self.cpu = Host().cpu
 
     def create_instruction(self, instruction: int) -> bytearray:
         memory_type = MemoryType.register.value  # Rn
@@ -49,22 +49,14 @@ class TestData(TestCase):
         word1 = instruction << 11 | h << 10 | l << 9 | source.value << 6 | destination.value << 3 | registre_source
         byte1 = word1 >> 8
         byte2 = word1 & 0xff
-        word2 = 0x0100
+        word2 = 0x1000
         byte3 = word2 >> 8
         byte4 = word2 & 0xff
-        self.cpu.memory[0] = byte1
-        self.cpu.memory[1] = byte2
-        self.cpu.memory[2] = byte3
-        self.cpu.memory[3] = byte4
-        self.cpu.registers[registre_source] = 0xffff
-        self.cpu.pos_x = 0
-        self.cpu.pos_y = 0
-        game = Game()
-        other = CPU(game)
+        # the cpu on the right of the host is the target of the move
+        cpu = Host.load(bytes([byte1, byte2, byte3, byte4]), width=2)
+        other = cpu.game.board[0][1]
         original = other.memory[1]
-        other.pos_x = 1
-        other.pos_y = 0
-        game.board = [[self.cpu, other]]
-        self.cpu.execute()
+        cpu.registers[registre_source] = 0xffff
+        cpu.execute()
         self.assertEqual(other.memory[0], 0xff)
         self.assertEqual(other.memory[1], original)
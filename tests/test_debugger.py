@@ -0,0 +1,119 @@
+import io
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+from pathlib import Path
+
+from cpu import PC
+from debugger import DebugEngine, DebuggerShell, disassemble, dump
+from heatmap import HeatmapRecorder
+from journal import UndoJournal
+from recorder import TraceRecorder, read_trace
+from tests.helpers import create_conflicts, create_game, state
+
+
+class TestDisassemble(TestCase):
+
+    def test_write_right(self):
+        game = create_conflicts()
+        cpu = game.board[4][3]
+        cpu.registers[PC] = 0x14
+        self.assertEqual(disassemble(cpu, after=2), [
+            "  10: 07 00 00 ab  move #ab, r0",
+            "> 14: 06 28 10 05  move r0, @10:05",
+            "  18: d4 10  jmp #10",
+        ])
+        self.assertIn("(3, 4) r0=0000", dump(cpu))
+
+
+class TestDebugEngine(TestCase):
+
+    def test_same_state_as_game_cycle(self):
+        sequential = create_game()
+        sequential.run()
+        debugged = create_game(DebugEngine())
+        debugged.run()
+        self.assertEqual(debugged.current_cycle, 20)
+        self.assertEqual(state(debugged), state(sequential))
+
+    def test_recorded_like_game_cycle(self):
+        traces = []
+        with TemporaryDirectory() as directory:
+            for name, engine in [("sequential", None), ("debugged", DebugEngine())]:
+                path = Path(directory) / name
+                with TraceRecorder(path) as recorder:
+                    game = create_conflicts(engine)
+                    game.recorder = recorder
+                    game.run()
+                traces.append(list(read_trace(path)))
+        self.assertEqual(traces[1], traces[0])
+
+    def test_no_recorder_with_a_journal(self):
+        game = create_game(DebugEngine(journal=UndoJournal()))
+        game.recorder = HeatmapRecorder()
+        with self.assertRaises(ValueError):
+            game.run()
+
+    def test_breakpoint_stops_before_the_instruction(self):
+        engine = DebugEngine()
+        game = create_conflicts(engine)
+        engine.start(game)
+        engine.add_breakpoint(pc=0x14, x=3, y=4)
+        hits = engine.cont()
+        self.assertEqual(len(hits), 1)
+        cpu = game.board[4][3]
+        self.assertEqual(game.current_cycle, 2)
+        self.assertEqual(cpu.registers[PC], 0x14)
+        self.assertEqual(game.board[4][4].memory[5], 0)
+        # continue executes the instruction of the breakpoint before the next stop
+        self.assertEqual(engine.step(cpu), [])
+        self.assertEqual(game.board[4][4].memory[5], 0xab)
+        self.assertEqual(len(engine.cont()), 1)
+        self.assertEqual(game.current_cycle, 5)
+        engine.stop()
+
+    def test_watchpoint_stops_after_the_write(self):
+        engine = DebugEngine()
+        game = create_conflicts(engine)
+        engine.start(game)
+        engine.add_watchpoint(4, 4, 5)
+        hits = engine.cont()
+        self.assertEqual(hits, ["écriture de ab a 05 de (4, 4) par (3, 4)"])
+        self.assertEqual(game.current_cycle, 2)
+        self.assertEqual(engine.index, 4 * 16 + 4)
+        engine.stop()
+        self.assertIsNone(game.board[4][4].watchers)
+
+    def test_opcode_breakpoint(self):
+        engine = DebugEngine()
+        game = create_conflicts(engine)
+        engine.start(game)
+        engine.add_breakpoint(opcode="trap")
+        engine.cont()
+        self.assertEqual(engine.cpus[engine.index], game.board[5][3])
+        self.assertEqual(game.current_cycle, 1)
+
+    def test_on_break(self):
+        stops = []
+        engine = DebugEngine(lambda engine, hits: stops.append(engine.game.current_cycle))
+        game = create_conflicts(engine)
+        engine.add_watchpoint(4, 4, 0, 0x100)
+        game.run()
+        self.assertEqual(stops, [2, 5, 8, 11, 14, 17, 20])
+        self.assertIsNone(game.board[4][4].watchers)
+
+
+class TestDebuggerShell(TestCase):
+
+    def test_commands(self):
+        engine = DebugEngine()
+        game = create_conflicts(engine)
+        engine.start(game)
+        output = io.StringIO()
+        shell = DebuggerShell(engine, stdin=io.StringIO("watch 4 4 5\ncontinue\nmem 4 4 0 8\ninfo\ndelete 0\nquit\n"),
+                              stdout=output)
+        shell.use_rawinput = False
+        shell.cmdloop("")
+        text = output.getvalue()
+        self.assertIn("écriture de ab a 05 de (4, 4) par (3, 4)\ncycle 2, processeur 68\n", text)
+        self.assertIn("00: 00 00 00 00 00 ab 00 00\n", text)
+        self.assertEqual(engine.watchpoints, [])
@@ -0,0 +1,26 @@
+from unittest import TestCase
+
+from cpu import Flags
+
+
+class TestFlags(TestCase):
+
+    def test_record_matches_set(self):
+        for result, carry, compare in [(0, 0, False), (0x8000, 1, False), (0x1fffe, True, False), (-3, 0, True), (-3, 0, False)]:
+            eager = Flags()
+            eager.set_c(True)
+            eager.reset()
+            eager.set_c(carry)
+            eager.set_z(result == 0)
+            eager.set_n(result < 0 if compare else result >> 15)
+            lazy = Flags()
+            lazy.set_c(True)
+            lazy.record(result, carry, compare)
+            self.assertEqual(lazy.value, eager.value)
+
+    def test_accumulate(self):
+        flags = Flags()
+        flags.record(0x8000, 1)
+        flags.accumulate(0, True)
+        self.assertEqual(flags.value, 0b111)
+        self.assertEqual(flags.get_z(), 1)
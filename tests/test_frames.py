@@ -0,0 +1,53 @@
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+from pathlib import Path
+
+from frames import FrameExporter, PALETTE
+from game import Game
+from tests.helpers import WRITER
+from view import View
+
+
+def play(exporter: FrameExporter) -> Game:
+    game = Game(6, headless=True, publisher=exporter)
+    game.player1_color = 0x7c00
+    game.player2_color = 0x001f
+    game.board[0][7].memory[0x10:0x10 + len(WRITER)] = WRITER
+    game.run()
+    return game
+
+
+class TestFrameExporter(TestCase):
+
+    def test_palette_matches_view(self):
+        view = View(None)
+        self.assertEqual(len(PALETTE), 32768)
+        for color in [0, 0x7fff, 0x7c00, 0x03e0, 0x001f, 0x1234]:
+            self.assertEqual(tuple(PALETTE[color]), view.convert_5bit_to_8bit(color))
+
+    def test_ppm_frames(self):
+        with TemporaryDirectory() as directory:
+            with FrameExporter(directory, every=2, scale=2) as exporter:
+                game = play(exporter)
+            names = sorted(path.name for path in Path(directory).iterdir())
+            # the board is published before the first cycle too
+            self.assertEqual(names, ["frame_000000.ppm", "frame_000002.ppm", "frame_000004.ppm", "frame_000006.ppm"])
+            image = (Path(directory) / "frame_000006.ppm").read_bytes()
+            header = b"P6\n32 32\n255\n"
+            self.assertTrue(image.startswith(header))
+            pixels = image[len(header):]
+            self.assertEqual(len(pixels), 32 * 32 * 3)
+            # add #1, r0 / move r0, @10:00 writes its counter as the color of the cell on the right
+            color = game.board[0][8].memory[0] << 8 | game.board[0][8].memory[1]
+            self.assertNotEqual(color, 0)
+            for x, y in [(16, 0), (17, 1)]:
+                offset = (y * 32 + x) * 3
+                self.assertEqual(pixels[offset: offset + 3], PALETTE[color])
+
+    def test_raw_stream(self):
+        with TemporaryDirectory() as directory:
+            path = Path(directory) / "match.rgb"
+            with FrameExporter(path, scale=1) as exporter:
+                play(exporter)
+            self.assertEqual(exporter.frames, 7)
+            self.assertEqual(path.stat().st_size, 7 * 16 * 16 * 3)
@@ -0,0 +1,56 @@
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+from pathlib import Path
+
+import numpy as np
+
+from cpu import SP
+from game import Game
+from heatmap import HeatmapRecorder
+from tests.helpers import TRAP_RIGHT, WRITE_RIGHT
+
+
+def play(recorder: HeatmapRecorder) -> Game:
+    game = Game(10, headless=True, recorder=recorder)
+    game.player1_color = game.player2_color = 0
+    game.board[4][3].memory[0x10:0x10 + len(WRITE_RIGHT)] = WRITE_RIGHT
+    game.board[5][3].memory[0x10:0x10 + len(TRAP_RIGHT)] = TRAP_RIGHT
+    # the trap handler is the loop at 0x10
+    game.board[5][4].memory[4] = 0x10
+    game.board[5][4].registers[SP] = 0x80
+    game.run()
+    return game
+
+
+class TestHeatmapRecorder(TestCase):
+
+    def test_counters(self):
+        recorder = HeatmapRecorder()
+        play(recorder)
+        self.assertTrue((recorder.cell_instructions() == 10).all())
+        writer = 4 * 16 + 3
+        # move #ab, r0 / move r0, @10:05 / jmp #10, the second move at cycles 2, 5 and 8
+        self.assertEqual(list(recorder.executed[writer, [0x10, 0x14, 0x18]]), [4, 3, 3])
+        self.assertEqual(recorder.writes[writer, writer + 1], 3)
+        self.assertEqual(recorder.writes.sum(), 3)
+        self.assertEqual(recorder.written[writer + 1, 5], 3)
+        sender = 5 * 16 + 3
+        # trap #10 / jmp #10, the trap at cycles 1, 3, 5, 7 and 9
+        self.assertEqual(recorder.traps[sender, sender + 1], 5)
+        self.assertEqual(recorder.traps.sum(), 5)
+        # the target pushes its PC and flags at each interruption
+        self.assertEqual(recorder.cell_writes()[5, 4], 5 * 4)
+
+    def test_export(self):
+        with TemporaryDirectory() as directory:
+            with HeatmapRecorder(directory, scale=2) as recorder:
+                play(recorder)
+            path = Path(directory)
+            traps = np.loadtxt(path / "traps.csv", delimiter=",")
+            self.assertEqual(traps.shape, (256, 256))
+            self.assertEqual(traps[5 * 16 + 3, 5 * 16 + 4], 5)
+            image = (path / "written.pgm").read_bytes()
+            self.assertTrue(image.startswith(b"P5\n32 32\n255\n"))
+            self.assertEqual(len(image), len(b"P5\n32 32\n255\n") + 32 * 32)
+            # the cell written the most is white
+            self.assertEqual(max(image[len(b"P5\n32 32\n255\n"):]), 255)
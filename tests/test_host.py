@@ -0,0 +1,49 @@
+from unittest import TestCase
+
+from cpu import CPU, CopyOnWriteMemory, PC
+from game import DEFAULT_FILE
+from host import Host, IDLE_IMAGE
+from tests.helpers import WRITE_RIGHT
+
+
+class TestHost(TestCase):
+
+    def test_blank_cpus(self):
+        host = Host(3, 2)
+        self.assertEqual(len(host.board), 2)
+        self.assertEqual([(cpu.pos_x, cpu.pos_y) for cpu in host.board[1]], [(0, 1), (1, 1), (2, 1)])
+        self.assertIs(host.cpu, host.board[0][0])
+        self.assertEqual(host.cpu.registers[PC], 0)
+        host.cpu.memory[5] = 1
+        self.assertEqual(host.board[0][1].memory[5], 0)
+
+    def test_memory_is_not_shared_between_cpus(self):
+        first = CPU()
+        second = CPU()
+        first.memory[0] = 0xab
+        self.assertEqual(len(second.memory), 256)
+        self.assertEqual(second.memory[0], 0)
+
+    def test_cycle_with_neighbours(self):
+        writer = Host.load(WRITE_RIGHT, 0x7c00, width=2)
+        host = writer.game
+        self.assertIs(host.board[0][0], writer)
+        for _ in range(2):
+            host.cycle()
+        self.assertEqual(host.current_cycle, 2)
+        self.assertEqual(host.board[0][1].memory[5], 0xab)
+
+    def test_image(self):
+        host = Host(4, 4, IDLE_IMAGE)
+        first = host.board[0][0]
+        self.assertIsInstance(first.memory, CopyOnWriteMemory)
+        self.assertIs(first.decode_cache, host.board[3][3].decode_cache)
+        host.cycle()
+        self.assertEqual(first.registers[PC], 0x10)
+
+    def test_idle_image_is_the_default_program(self):
+        self.assertEqual(IDLE_IMAGE, bytes(CPU.load_from_file(DEFAULT_FILE, Host()).memory))
+
+    def test_run(self):
+        result = Host.load(WRITE_RIGHT).run(budget=30)
+        self.assertEqual(result.instructions, 30)
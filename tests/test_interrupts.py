@@ -0,0 +1,79 @@
+from unittest import TestCase
+
+from cpu import CPU, ILLEGAL, PC, SP, TIMER, TRAP
+from game import Game
+from interrupts import InterruptController
+from synchronous import SynchronousEngine
+from tests.helpers import TRAP_RIGHT, create_conflicts, state
+
+# trap #01 (the cpu below) / jmp #10
+TRAP_DOWN = bytes([0xec, 0x01, 0xd4, 0x10])
+
+
+def create_double_trap(interrupts: InterruptController = None) -> Game:
+    """Two cpus before (4, 5) in the board trap it at the same cycles"""
+    game = create_conflicts()
+    game.interrupts = interrupts
+    game.board[4][4].memory[0x10:0x10 + len(TRAP_DOWN)] = TRAP_DOWN
+    return game
+
+
+class TestInterruptController(TestCase):
+
+    def test_same_result_as_immediate_delivery(self):
+        immediate = create_conflicts()
+        immediate.run()
+        controller = InterruptController()
+        deferred = create_conflicts()
+        deferred.interrupts = controller
+        deferred.run()
+        self.assertEqual(state(deferred), state(immediate))
+        self.assertGreater(controller.delivered, 0)
+        self.assertEqual(controller.coalesced, 0)
+
+    def test_coalesce(self):
+        immediate = create_double_trap()
+        immediate.run()
+        controller = InterruptController()
+        coalesced = create_double_trap(controller)
+        coalesced.run()
+        # 10 cycles with a trap from both cpus, one delivery each time
+        self.assertEqual(controller.posted, 20 + 10)
+        self.assertEqual(controller.coalesced, 10)
+        self.assertEqual(controller.delivered, 20)
+        target = coalesced.board[5][4]
+        self.assertEqual(target.registers[SP], 0x80 - 10 * 4)
+        self.assertEqual(immediate.board[5][4].registers[SP], 0x80 - 20 * 4)
+
+    def test_without_coalesce(self):
+        immediate = create_double_trap()
+        immediate.run()
+        controller = InterruptController(coalesce=False)
+        deferred = create_double_trap(controller)
+        deferred.run()
+        self.assertEqual(state(deferred), state(immediate))
+        self.assertEqual(controller.coalesced, 0)
+
+    def test_priority(self):
+        game = Game(headless=True)
+        cpu = CPU.load_from_bytes(TRAP_RIGHT, game, 1)
+        cpu.registers[SP] = 0x80
+        cpu.memory[ILLEGAL] = 0x20
+        cpu.memory[TIMER] = 0x30
+        cpu.memory[TRAP] = 0x40
+        controller = InterruptController()
+        for vector in (TRAP, TIMER, ILLEGAL):
+            controller.post(cpu, vector)
+        controller.drain(cpu)
+        self.assertEqual(controller.delivered, 3)
+        self.assertEqual(cpu.pending, ())
+        # the handler of ILLEGAL runs first, then the one of TIMER, then the one of TRAP
+        self.assertEqual(cpu.registers[PC], 0x20)
+        # the PC pushed by each delivery, below the flags pushed by the previous one
+        self.assertEqual(cpu.memory[0x7f], 0x10)
+        self.assertEqual(cpu.memory[0x7b], 0x40)
+        self.assertEqual(cpu.memory[0x77], 0x30)
+
+    def test_engines_are_refused(self):
+        with self.assertRaises(ValueError):
+            Game(headless=True, engine=SynchronousEngine(), interrupts=InterruptController())
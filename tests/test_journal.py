@@ -0,0 +1,67 @@
+from unittest import TestCase
+
+from debugger import DebugEngine
+from journal import UndoJournal
+from tests.helpers import create_conflicts, state
+
+
+class TestUndoJournal(TestCase):
+
+    def test_back_restores_every_cycle(self):
+        engine = DebugEngine(journal=UndoJournal(20))
+        game = create_conflicts(engine)
+        # a timer interrupting every 3 cycles
+        timer = game.board[0][0]
+        timer.memory[0xA:0xE] = bytes([2, 0, 3, 2])
+        timer.memory[3] = 0x10
+        timer.registers[7] = 0x80
+        engine.start(game)
+        states = [state(game)]
+        timers = []
+        for _ in range(12):
+            engine.step_cycle()
+            states.append(state(game))
+            timers.append(timer.current_cycle)
+        forward = list(states)
+        while len(states) > 1:
+            states.pop()
+            self.assertTrue(engine.back())
+            self.assertEqual(game.current_cycle, len(states) - 1)
+            self.assertEqual(state(game), states[-1])
+            self.assertEqual(timer.current_cycle, ([0] + timers)[len(states) - 1])
+        self.assertGreater(timer.interruptions, 0)
+        self.assertFalse(engine.back())
+        # the cycles executed again after back give the same states
+        for _ in range(3):
+            engine.step_cycle()
+        self.assertEqual(game.current_cycle, 3)
+        self.assertEqual(state(game), forward[3])
+        engine.stop()
+        self.assertIsNone(game.board[4][4].watchers)
+
+    def test_back_in_the_middle_of_a_cycle(self):
+        engine = DebugEngine(journal=UndoJournal())
+        game = create_conflicts(engine)
+        engine.start(game)
+        engine.step_cycle()
+        before = state(game)
+        engine.step(game.board[4][3])
+        engine.step(game.board[4][4])
+        self.assertNotEqual(state(game), before)
+        self.assertTrue(engine.back())
+        self.assertEqual(engine.index, 0)
+        self.assertEqual(game.current_cycle, 1)
+        self.assertEqual(state(game), before)
+
+    def test_bounded_by_the_number_of_cycles(self):
+        journal = UndoJournal(5)
+        engine = DebugEngine(journal=journal)
+        game = create_conflicts(engine)
+        engine.start(game)
+        for _ in range(10):
+            engine.step_cycle()
+        self.assertEqual(len(journal.entries), 5)
+        for _ in range(5):
+            self.assertTrue(engine.back())
+        self.assertFalse(engine.back())
+        self.assertEqual(game.current_cycle, 5)
@@ -1,13 +1,13 @@
 from unittest import TestCase
 
-from cpu import CPU, MemoryType, PC
-from game import Game
+from cpu import MemoryType, PC
+from host import Host
 
 
 class TestCPU(TestCase):
 
     def setUp(self) -> None:
-        self.cpu = CPU(Game())
+        self.cpu = Host().cpu
 
     def test_add(self):
         instruction = 0x03
@@ -0,0 +1,45 @@
+from unittest import TestCase
+
+from cpu import CopyOnWriteMemory, PC
+from game import Game
+
+
+class TestCopyOnWriteMemory(TestCase):
+
+    def test_empty_cells_share_their_memory(self):
+        game = Game(headless=True)
+        first = game.board[0][0]
+        second = game.board[0][1]
+        self.assertIsInstance(first.memory, CopyOnWriteMemory)
+        self.assertIs(bytes(first.memory), bytes(second.memory))
+        self.assertIs(first.decode_cache, second.decode_cache)
+        first.execute()
+        self.assertEqual(first.registers[PC], 0x10)
+        self.assertIsInstance(first.memory, CopyOnWriteMemory)
+
+    def test_first_write_copies(self):
+        game = Game(headless=True)
+        first = game.board[0][0]
+        second = game.board[0][1]
+        # move #ab, r0 / move r0, @10:05 (byte 5 of the cpu on the right)
+        program = bytes([0x07, 0x00, 0x00, 0xab, 0x06, 0x28, 0x10, 0x05])
+        first.memory[0x10:0x10 + len(program)] = program
+        self.assertIsInstance(first.memory, bytearray)
+        self.assertIsNot(first.decode_cache, second.decode_cache)
+        first.execute()
+        self.assertIsInstance(second.memory, CopyOnWriteMemory)
+        first.execute()
+        self.assertIsInstance(second.memory, bytearray)
+        self.assertEqual(second.memory[5], 0xab)
+        self.assertEqual(game.board[0][2].memory[5], 0)
+        self.assertEqual(bytes(game.board[0][2].memory)[0x10:0x12], bytes([0xd4, 0x10]))
+
+    def test_compares_as_bytes(self):
+        game = Game(headless=True)
+        first = game.board[0][0]
+        image = bytes(first.memory)
+        self.assertEqual(first.memory, image)
+        self.assertEqual(first.memory, bytearray(image))
+        self.assertEqual(first.memory, game.board[0][1].memory)
+        self.assertNotEqual(first.memory, bytes(len(image)))
+        self.assertEqual(bytearray(bytes(first.memory)), image)
@@ -0,0 +1,29 @@
+from unittest import TestCase
+
+from cpu import CPU, MemoryType, MoveType
+from host import Host
+
+
+class TestMoveHandlers(TestCase):
+
+    def test_every_addressing_has_a_handler(self):
+        self.assertEqual(len(CPU.move_handlers), len(MoveType) * len(MemoryType) ** 2)
+        cpu = Host().cpu
+        for name in CPU.move_handlers.values():
+            self.assertIn(name, cpu.instructions)
+
+    def test_decode_selects_the_handler(self):
+        # move (r2), r3 ; move.l #5, r4 ; move.h r0, @10:04 ; jmp #10
+        program = bytes([0x06, 0x82, 0x00, 0x03, 0x03, 0x04, 0x00, 0x05, 0x04, 0x28, 0x10, 0x04, 0xd4, 0x10])
+        cpu = Host.load(program, 1, width=2)
+        game = cpu.game
+        cpu.registers[0] = 0xabcd
+        cpu.registers[2] = 0x10
+        cpu.registers[4] = 0x30
+        for _ in range(3):
+            cpu.execute()
+        self.assertEqual(cpu.decode_cache[0x10][2], ("move_default_inderect_addressing_register", 2, 3))
+        self.assertEqual(cpu.registers[3], 0x06)
+        self.assertEqual(cpu.registers[4], 0x35)
+        self.assertEqual(game.board[0][1].memory[4], 0xab)
+        self.assertEqual(cpu.flags.get_n(), 1)
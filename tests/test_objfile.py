@@ -0,0 +1,57 @@
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+from pathlib import Path
+
+from cpu import CPU, MemoryType, PC
+from exception import ObjectFormatError
+from game import Game, DEFAULT_FILE
+from host import Host
+from objfile import build_object, read_object, write_object
+
+
+class TestObjectFile(TestCase):
+
+    def setUp(self) -> None:
+        self.code = DEFAULT_FILE.read_bytes()
+
+    def test_round_trip(self):
+        program = read_object(build_object(self.code))
+        self.assertEqual(program.code, self.code)
+        self.assertEqual(program.entry, 0x10)
+        self.assertEqual(program.decode_table[0x10], (2, ("jump_always", MemoryType.immediate_value, 0x10)))
+
+    def test_corrupted(self):
+        content = bytearray(build_object(self.code))
+        content[-1] ^= 0xff
+        with self.assertRaises(ObjectFormatError):
+            read_object(bytes(content))
+
+    def test_load_maps_decode_cache(self):
+        with TemporaryDirectory() as directory:
+            path = Path(directory) / "default.cwo"
+            write_object(path, self.code)
+            cpu = CPU.load_from_file(path, Game(), 0x1234)
+        raw = CPU.load_from_file(DEFAULT_FILE, Game(), 0x1234)
+        self.assertEqual(cpu.memory, raw.memory)
+        self.assertIn(0x10, cpu.decode_cache)
+        self.assertEqual(raw.decode_cache, {})
+        cpu.execute()
+        raw.execute()
+        self.assertEqual(cpu.registers, raw.registers)
+
+    def test_overwritten_code_is_decoded_again(self):
+        cpu = CPU.load_from_file(DEFAULT_FILE, Game())
+        cpu.execute()
+        cpu.memory[0x11] = 0x20
+        cpu.execute()
+        self.assertEqual(cpu.registers[PC], 0x20)
+
+    def test_invalid_move_type_is_illegal(self):
+        cpu = CPU.load_from_file(DEFAULT_FILE, Host())
+        # a move with the move type 00, the handler of the illegal instruction is at 0x12
+        cpu.memory[0x10:0x14] = bytes([0x00, 0x38, 0x00, 0x00])
+        cpu.memory[2] = 0x12
+        cpu.execute()
+        self.assertEqual(cpu.interruptions, 1)
+        self.assertEqual(cpu.registers[PC], 0x12)
+        self.assertNotIn(0x10, cpu.decode_cache)
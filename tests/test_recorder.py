@@ -0,0 +1,82 @@
+import contextlib
+import io
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+from pathlib import Path
+
+from cpu import CPU, SP
+from exception import TraceFormatError
+from game import Game, DEFAULT_FILE, main
+from recorder import TraceRecorder, read_trace, INSTRUCTION, WRITE, INTERRUPTION, COLOR
+from timeseries import StatisticsCollector, read_statistics
+
+
+class TestRecorder(TestCase):
+
+    def setUp(self) -> None:
+        self.directory = TemporaryDirectory()
+        self.path = Path(self.directory.name) / "match.trace"
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def play(self, compress: bool, *others) -> Game:
+        with TraceRecorder(self.path, compress=compress, buffer_size=64) as recorder:
+            game = Game(3, headless=True, recorder=[recorder, *others] if others else recorder)
+            player1 = CPU.load_from_file(DEFAULT_FILE, game, 0x7c00)
+            player2 = CPU.load_from_file(DEFAULT_FILE, game, 0x001f)
+            game.place_players(player1, player2)
+            # push R0 at the color address then jump back
+            game.board[0][0].memory[0x10:0x14] = bytes([0x01 << 3, 0x00, 0xd4, 0x10])
+            game.board[0][0].registers[SP] = 2
+            game.board[0][0].registers[0] = 0x1234
+            game.run()
+        return game
+
+    def test_events(self):
+        self.play(compress=False)
+        events = list(read_trace(self.path, chunk_size=7))
+        instructions = [event for event in events if event.kind == INSTRUCTION]
+        self.assertEqual(len(instructions), 3 * 256)
+        self.assertEqual([event.cycle for event in instructions[::256]], [1, 2, 3])
+        self.assertEqual(instructions[1].cpu, 1)
+        writes = [event for event in events if event.kind == WRITE]
+        self.assertEqual([(w.cpu, w.target, w.address, w.value) for w in writes], [(0, 0, 0, 0x12), (0, 0, 1, 0x34), (0, 0, 254, 0x12), (0, 0, 255, 0x34)])
+        colors = [event for event in events if event.kind == COLOR]
+        self.assertEqual(colors[-1].value, 0x1234)
+        self.assertEqual([event for event in events if event.kind == INTERRUPTION], [])
+
+    def test_with_other_recorders(self):
+        self.play(compress=False)
+        alone = list(read_trace(self.path))
+        statistics_path = Path(self.directory.name) / "match.stats"
+        with StatisticsCollector(statistics_path) as collector:
+            self.play(False, collector)
+        self.assertEqual(list(read_trace(self.path)), alone)
+        self.assertEqual(list(read_statistics(statistics_path)["cycle"]), [1, 2, 3])
+
+    def test_main_rejects_unused_options(self):
+        for argv in (["--compress"], ["--every", "2"], ["--serve", "4000", "--frames", "images"], ["--host", "0.0.0.0"]):
+            with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit) as context:
+                main(argv)
+            self.assertEqual(context.exception.code, 2)
+
+    def test_compressed(self):
+        self.play(compress=False)
+        raw = list(read_trace(self.path))
+        self.play(compress=True)
+        self.assertEqual(list(read_trace(self.path, chunk_size=5)), raw)
+
+    def test_compressed_in_tiny_chunks(self):
+        self.play(compress=False)
+        raw = list(read_trace(self.path))
+        self.play(compress=True)
+        for chunk_size in (1, 2, 3):
+            self.assertEqual(list(read_trace(self.path, chunk_size=chunk_size)), raw)
+
+    def test_truncated_compressed(self):
+        self.play(compress=True)
+        content = self.path.read_bytes()
+        self.path.write_bytes(content[:-4])
+        with self.assertRaises(TraceFormatError):
+            list(read_trace(self.path, chunk_size=3))
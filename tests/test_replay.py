@@ -0,0 +1,52 @@
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+from pathlib import Path
+
+from cpu import SP
+from game import Game
+from replay import ReplayWriter, ReplayPlayer
+
+
+def create_game(recorder=None) -> Game:
+    game = Game(12, headless=True, recorder=recorder)
+    game.player1_color = 0x0000
+    game.player2_color = 0x7fff
+    for x, y in [(0, 0), (5, 3), (15, 15)]:
+        cpu = game.board[y][x]
+        # add #1 to R0, push R0 then jump back
+        cpu.memory[0x10:0x16] = bytes([0x03 << 3, 0b100 << 5 | 1, 0x01 << 3, 0x00, 0xd4, 0x10])
+        cpu.registers[SP] = 0x80
+    return game
+
+
+def board_memory(board) -> list[bytes]:
+    return [bytes(cpu.memory) for array in board for cpu in array]
+
+
+class TestReplay(TestCase):
+
+    def setUp(self) -> None:
+        self.directory = TemporaryDirectory()
+        self.path = Path(self.directory.name) / "match.replay"
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_seek(self):
+        with ReplayWriter(self.path, keyframe_interval=4) as writer:
+            create_game(writer).run()
+
+        reference = create_game()
+        states = [board_memory(reference.board)]
+        for _ in range(12):
+            reference.cycle()
+            states.append(board_memory(reference.board))
+
+        with ReplayPlayer(self.path, view=False) as player:
+            self.assertEqual(player.last_cycle, 12)
+            self.assertEqual(player.player2_color, 0x7fff)
+            for cycle in [9, 3, 12, 0, 4, 7]:
+                player.seek(cycle)
+                self.assertEqual(board_memory(player.board), states[cycle])
+            self.assertEqual(list(player.play(5, 8)), [5, 6, 7, 8])
+            self.assertEqual(board_memory(player.board), states[8])
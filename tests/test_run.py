@@ -0,0 +1,56 @@
+from unittest import TestCase
+
+from cpu import CPU, SP
+from host import Host
+
+# move #0, r1 ; add #1, r1 ; cmp #5, r1 ; bne #4 ; push r1 ; jsr #24 ; jmp #14 ; jmp #24 at 24
+COUNTER = bytes([0x07, 0x01, 0x00, 0x00, 0x19, 0x81, 0x21, 0x85, 0x7c, 0x04, 0x08, 0x01, 0xdc, 0x24, 0xd4, 0x14,
+                 0x00, 0x00, 0x00, 0x00, 0xd4, 0x24])
+
+
+class TestRun(TestCase):
+
+    def create_cpu(self, program: bytes = COUNTER) -> CPU:
+        cpu = Host.load(program, 1)
+        cpu.registers[SP] = 0x80
+        return cpu
+
+    def test_same_state_as_execute(self):
+        for budget in range(1, 30):
+            stepped = self.create_cpu()
+            for _ in range(budget):
+                stepped.execute()
+            run = self.create_cpu()
+            result = run.run(budget)
+            self.assertEqual(result.instructions, budget)
+            self.assertEqual(result.reason, "budget")
+            self.assertEqual(run.registers, stepped.registers)
+            self.assertEqual(run.flags.value, stepped.flags.value)
+            self.assertEqual(bytes(run.memory), bytes(stepped.memory))
+
+    def test_stop_at(self):
+        cpu = self.create_cpu()
+        result = cpu.run(stop_at=0x24)
+        # move, 5 times add, cmp and bne, 4 jmp, then push and jsr
+        self.assertEqual(result.instructions, 22)
+        self.assertEqual(result.reason, "pc")
+        # the first execution of an instruction decodes it, cmp and bne are fused from the second loop
+        self.assertEqual(result.fused, 4)
+        self.assertEqual(cpu.registers[1], 5)
+        self.assertEqual(cpu.memory[0x7e:0x80], bytes([0x00, 0x05]))
+        self.assertEqual(cpu.registers[SP], 0x7c)
+
+    def test_timer_prevents_fusion(self):
+        cpu = self.create_cpu()
+        cpu.memory[0xD] = 2
+        cpu.memory[0xC] = 100
+        result = cpu.run(stop_at=0x24)
+        self.assertEqual(result.fused, 0)
+        self.assertEqual(cpu.current_cycle, 22)
+
+    def test_stop_on_interrupt(self):
+        # an illegal instruction
+        cpu = self.create_cpu(bytes([0xf8, 0x00]))
+        result = cpu.run(100, stop_on_interrupt=True)
+        self.assertEqual(result, (1, 1, 0, "interruption"))
+        self.assertEqual(cpu.interruptions, 1)
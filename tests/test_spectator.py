@@ -0,0 +1,91 @@
+import asyncio
+import threading
+from unittest import TestCase
+
+from game import Game
+from spectator import SpectatorServer, spectate
+
+
+def colors_of(game: Game) -> list[int]:
+    return [cpu.memory[0] << 8 | cpu.memory[1] for array in game.board for cpu in array]
+
+
+class TestSpectator(TestCase):
+
+    def setUp(self) -> None:
+        self.game = Game(10, headless=True)
+        self.game.player1_color = 0x7c00
+        self.game.player2_color = 0x001f
+
+    async def wait_for_clients(self, server: SpectatorServer, count: int):
+        while server.client_count < count:
+            await asyncio.sleep(0.01)
+
+    def paint(self, cycle: int):
+        self.game.current_cycle = cycle
+        cpu = self.game.board[cycle % 16][cycle % 7]
+        cpu.memory[0] = cycle
+        cpu.memory[1] = 0x1f
+
+    def test_diffs(self):
+        async def watch(server: SpectatorServer):
+            spectators = [spectate("127.0.0.1", server.port), spectate("127.0.0.1", server.port)]
+            frames = [asyncio.ensure_future(spectator.__anext__()) for spectator in spectators]
+            await self.wait_for_clients(server, 2)
+            server.publish(self.game)
+            for cycle in range(1, 4):
+                self.paint(cycle)
+                server.publish(self.game)
+            for spectator, frame in zip(spectators, frames):
+                await frame
+                cycle = 0
+                while cycle != 3:
+                    cycle, colors = await spectator.__anext__()
+                self.assertEqual(colors, colors_of(self.game))
+                await spectator.aclose()
+
+        with SpectatorServer(queue_size=8) as server:
+            asyncio.run(watch(server))
+
+    def test_slow_spectator(self):
+        async def watch(server: SpectatorServer):
+            spectator = spectate("127.0.0.1", server.port)
+            first = asyncio.ensure_future(spectator.__anext__())
+            await self.wait_for_clients(server, 1)
+            server.publish(self.game)
+            # the spectator does not read while the game goes on
+            for cycle in range(1, 200):
+                self.paint(cycle)
+                server.publish(self.game)
+            await first
+            cycle = 0
+            while cycle != 199:
+                cycle, colors = await spectator.__anext__()
+            self.assertEqual(colors, colors_of(self.game))
+            await spectator.aclose()
+
+        with SpectatorServer(queue_size=2) as server:
+            asyncio.run(watch(server))
+
+    def test_merged_publications(self):
+        async def watch(server: SpectatorServer):
+            spectator = spectate("127.0.0.1", server.port)
+            first = asyncio.ensure_future(spectator.__anext__())
+            await self.wait_for_clients(server, 1)
+            await first
+            # the loop of the server is busy while the game publishes 49 cycles
+            busy = threading.Event()
+            done = threading.Event()
+            server.loop.call_soon_threadsafe(lambda: busy.set() or done.wait())
+            busy.wait()
+            for cycle in range(1, 50):
+                self.paint(cycle)
+                server.publish(self.game)
+            done.set()
+            cycle, colors = await spectator.__anext__()
+            self.assertEqual(cycle, 49)
+            self.assertEqual(colors, colors_of(self.game))
+            await spectator.aclose()
+
+        with SpectatorServer() as server:
+            asyncio.run(watch(server))
@@ -0,0 +1,68 @@
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+from pathlib import Path
+
+from cpu import SP
+from recorder import TraceRecorder, read_trace
+from speculative import SpeculativeEngine
+from tests.helpers import TRAP_SELF, create_conflicts, create_game, state
+
+
+def interrupt_state(game) -> list:
+    return [(cpu.interruptions, cpu.pending) for array in game.board for cpu in array]
+
+
+class TestSpeculativeEngine(TestCase):
+
+    def test_matches_sequential(self):
+        sequential = create_game()
+        sequential.run()
+        engine = SpeculativeEngine(2)
+        speculative = create_game(engine)
+        speculative.run()
+        self.assertEqual(speculative.current_cycle, 20)
+        self.assertEqual(state(speculative), state(sequential))
+        # only the 4 cpus which are not idle are speculated, the writers wake the cpu on their right
+        # at each of their 7 writes, which runs in its turn in the main process
+        self.assertEqual(engine.committed, 4 * 20)
+        self.assertEqual(engine.executed_again, 2 * 7)
+
+    def test_conflicts_are_executed_again(self):
+        sequential = create_conflicts()
+        sequential.run()
+        engine = SpeculativeEngine(3)
+        speculative = create_conflicts(engine)
+        speculative.run()
+        self.assertEqual(state(speculative), state(sequential))
+        self.assertEqual(interrupt_state(speculative), interrupt_state(sequential))
+        # written by (3, 4) earlier in the same cycle
+        self.assertEqual(speculative.board[4][4].registers[1], 0xab)
+        self.assertGreater(engine.executed_again, 0)
+        self.assertGreater(engine.committed, engine.executed_again)
+
+    def test_interruptions_of_committed_cpus(self):
+        games = []
+        for engine in [None, SpeculativeEngine(2)]:
+            game = create_conflicts(engine)
+            # a trap to itself is committed from the worker with the interruption
+            game.board[12][12].memory[0x10:0x10 + len(TRAP_SELF)] = TRAP_SELF
+            game.board[12][12].memory[4] = 0x10
+            game.board[12][12].registers[SP] = 0x80
+            game.run()
+            games.append(game)
+        self.assertEqual(state(games[1]), state(games[0]))
+        self.assertEqual(interrupt_state(games[1]), interrupt_state(games[0]))
+        self.assertEqual(games[1].board[12][12].interruptions, 20)
+
+    def test_recorded_like_game_cycle(self):
+        traces = []
+        with TemporaryDirectory() as directory:
+            for name, engine in [("sequential", None), ("speculative", SpeculativeEngine(2))]:
+                path = Path(directory) / name
+                with TraceRecorder(path) as recorder:
+                    game = create_conflicts(engine)
+                    game.board[12][12].memory[0x10:0x10 + len(TRAP_SELF)] = TRAP_SELF
+                    game.recorder = recorder
+                    game.run()
+                traces.append(list(read_trace(path)))
+        self.assertEqual(traces[1], traces[0])
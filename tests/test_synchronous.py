@@ -0,0 +1,51 @@
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+from pathlib import Path
+
+from game import Game
+from recorder import TraceRecorder, read_trace
+from synchronous import SynchronousEngine
+from tiles import TileEngine
+from tests.helpers import WRITE_LEFT, WRITE_RIGHT, create_game, state
+
+
+class TestSynchronousEngine(TestCase):
+
+    def test_any_order(self):
+        in_order = create_game(SynchronousEngine())
+        in_order.run()
+        reversed_order = create_game(SynchronousEngine(list(reversed(range(256)))))
+        reversed_order.run()
+        self.assertEqual(state(in_order), state(reversed_order))
+
+    def test_same_as_synchronous_tiles(self):
+        in_process = create_game(SynchronousEngine())
+        in_process.run()
+        tiled = create_game(TileEngine(2, 2, synchronous=True))
+        tiled.run()
+        self.assertEqual(state(in_process), state(tiled))
+
+    def test_conflicting_writes(self):
+        game = Game(2, headless=True, engine=SynchronousEngine())
+        game.player1_color = 0x7c00
+        game.player2_color = 0x001f
+        game.board[4][3].memory[0x10:0x10 + len(WRITE_RIGHT)] = WRITE_RIGHT
+        game.board[4][5].memory[0x10:0x10 + len(WRITE_LEFT)] = WRITE_LEFT
+        game.run()
+        # both write the byte 5 of (4, 4) at the second cycle, the highest index wins
+        self.assertEqual(game.board[4][4].memory[5], 0xcd)
+
+    def test_recorded_like_game_cycle(self):
+        traces = []
+        with TemporaryDirectory() as directory:
+            for name, engine in [("sequential", None), ("synchronous", SynchronousEngine())]:
+                path = Path(directory) / name
+                with TraceRecorder(path) as recorder:
+                    game = create_game(engine)
+                    game.recorder = recorder
+                    game.run()
+                traces.append(list(read_trace(path)))
+        # no cpu reads what the others write in the cycle, both engines give the same events,
+        # the writes to other cpus come at the end of the cycle with the synchronous engine
+        self.assertEqual(sorted(traces[1]), sorted(traces[0]))
+        self.assertEqual(traces[1][-1].cycle, 20)
@@ -0,0 +1,98 @@
+from unittest import TestCase
+
+from batch import BatchEngine
+from game import DEFAULT_FILE, Game
+from cpu import CPU
+from termination import Elimination, IdleLoops, StableTerritory, UnassailableLead, count_winner
+from tests.helpers import PAINTER, create_game
+from tournament import PLAYER1_COLOR, PLAYER2_COLOR, create_match
+
+
+def create_idle_game(terminations) -> Game:
+    game = Game(500, headless=True, seed=1, terminations=terminations)
+    game.place_players(
+        CPU.load_from_file(DEFAULT_FILE, game, PLAYER1_COLOR),
+        CPU.load_from_file(DEFAULT_FILE, game, PLAYER2_COLOR),
+    )
+    return game
+
+
+class TestTermination(TestCase):
+
+    def test_count_winner(self):
+        self.assertEqual(count_winner([1, 1, 2, 0], 1, 2), 1)
+        self.assertEqual(count_winner([1, 2, 2, 0], 1, 2), 2)
+        self.assertEqual(count_winner([0, 0], 1, 2), 0)
+
+    def test_idle_loops(self):
+        full = create_idle_game([])
+        result = full.run()
+        game = create_idle_game([IdleLoops()])
+        self.assertEqual(game.run(), result)
+        self.assertEqual(game.current_cycle, 1)
+        # the cpus of create_game push in a loop
+        busy = create_game()
+        busy.terminations = [IdleLoops()]
+        busy.run()
+        self.assertEqual(busy.current_cycle, 20)
+
+    def test_unassailable_lead(self):
+        game = create_match(PAINTER, PAINTER, 0, 100)
+        game.terminations = [UnassailableLead(1)]
+        game.board[0][0].memory[0:2] = PLAYER2_COLOR.to_bytes(2, "big")
+        game.board[0][1].memory[0:2] = PLAYER2_COLOR.to_bytes(2, "big")
+        game.board[0][2].memory[0:2] = PLAYER2_COLOR.to_bytes(2, "big")
+        self.assertEqual(game.run(), 2)
+        # a lead of 2 cells, with 1 change per cycle
+        self.assertEqual(game.current_cycle, 99)
+        # the two painters move the difference by at most 8 in the last cycle
+        self.assertIsNone(UnassailableLead().check(game, [PLAYER1_COLOR] * 8 + [0] * 248))
+        self.assertEqual(UnassailableLead().check(game, [PLAYER1_COLOR] * 9 + [0] * 247), 1)
+
+    def test_lead_of_the_active_cpus(self):
+        def create(terminations) -> Game:
+            game = create_match(PAINTER, DEFAULT_FILE.read_bytes(), 0, 100)
+            game.terminations = terminations
+            # the first rows are of the first player, only the painter is not idle
+            for array in game.board[:3]:
+                for cpu in array:
+                    if cpu.memory[0] << 8 | cpu.memory[1] != PLAYER2_COLOR:
+                        cpu.memory[0:2] = PLAYER1_COLOR.to_bytes(2, "big")
+            return game
+
+        full = create([])
+        result = full.run()
+        self.assertEqual(full.current_cycle, 100)
+        game = create([UnassailableLead()])
+        self.assertEqual(game.run(), result)
+        # in the last 3 cycles, the painter and the cpus it could wake up move the difference by at most 4 * (1 + 2 + 4)
+        self.assertEqual(game.current_cycle, 97)
+
+    def test_elimination(self):
+        game = create_idle_game([Elimination()])
+        game.board[0][0].memory[0:2] = bytes(2)
+        for array in game.board:
+            for cpu in array:
+                if cpu.memory[0] << 8 | cpu.memory[1] == PLAYER2_COLOR:
+                    cpu.memory[0:2] = bytes(2)
+        self.assertEqual(game.run(), 1)
+        self.assertEqual(game.current_cycle, 1)
+
+    def test_stable_territory(self):
+        game = create_match(PAINTER, PAINTER, 0, 1000)
+        game.terminations = [StableTerritory(5)]
+        self.assertEqual(game.run(), 0)
+        # the painters have copied the second byte of their color at the fourth cycle
+        self.assertEqual(game.current_cycle, 4 + 5)
+
+    def test_batch_engine(self):
+        engine = BatchEngine(2)
+        games = [create_match(PAINTER, PAINTER, seed, 50) for seed in range(3)]
+        for game in games:
+            game.terminations.append(StableTerritory(3))
+            engine.submit(game)
+        sequential = [create_match(PAINTER, PAINTER, seed, 50) for seed in range(3)]
+        for game in sequential:
+            game.terminations.append(StableTerritory(3))
+        self.assertEqual(engine.run(), [game.run() for game in sequential])
+        self.assertEqual([game.current_cycle for game in games], [game.current_cycle for game in sequential])
@@ -0,0 +1,74 @@
+from unittest import TestCase
+
+from game import Game
+from synchronous import SynchronousEngine
+from tiles import TileEngine
+from heatmap import HeatmapRecorder
+from tests.helpers import create_conflicts, create_game, state
+
+# move #14, r0 / move r0, @10:11 (the target of the jmp of the cpu on the right) / jmp #10
+WAKE_RIGHT = bytes([0x07, 0x00, 0x00, 0x14, 0x06, 0x28, 0x10, 0x11, 0xd4, 0x10])
+# the same for the cpu on the left
+WAKE_LEFT = bytes([0x07, 0x00, 0x00, 0x14, 0x06, 0x28, 0x80, 0x11, 0xd4, 0x10])
+
+
+class TestTileEngine(TestCase):
+
+    def test_single_tile_matches_sequential(self):
+        sequential = create_game()
+        sequential.run()
+        tiled = create_game(TileEngine(1, 1))
+        tiled.run()
+        self.assertEqual(tiled.current_cycle, 20)
+        self.assertEqual(state(tiled), state(sequential))
+
+    def test_cross_tile_writes(self):
+        first = create_game(TileEngine(2, 2))
+        first.run()
+        second = create_game(TileEngine(2, 2))
+        second.run()
+        self.assertEqual(state(first), state(second))
+        # (7, 0) and (8, 0) are in different tiles
+        self.assertEqual(first.board[0][8].memory[0], first.board[0][7].registers[0] & 0xff)
+        self.assertEqual(first.board[0][7].registers[0], 7)
+
+    def test_recorder_is_rejected(self):
+        with self.assertRaises(ValueError):
+            Game(20, headless=True, recorder=HeatmapRecorder(), engine=TileEngine(1, 1))
+
+    def test_interruptions_are_copied_back(self):
+        sequential = create_conflicts()
+        sequential.run()
+        tiled = create_conflicts(TileEngine(1, 1))
+        tiled.run()
+        self.assertEqual(state(tiled), state(sequential))
+        interruptions = [cpu.interruptions for array in tiled.board for cpu in array]
+        self.assertEqual(interruptions, [cpu.interruptions for array in sequential.board for cpu in array])
+        self.assertGreater(sum(interruptions), 0)
+
+    def create_wakers(self, engine=None) -> Game:
+        game = Game(30, headless=True, engine=engine, board_size=24)
+        game.player1_color = 0x7c00
+        game.player2_color = 0x001f
+        # on the borders of the tiles of 3 x 2, before and after their target in the cycle, and out of the board
+        for x, y, program in [(7, 3, WAKE_RIGHT), (5, 11, WAKE_RIGHT), (15, 11, WAKE_RIGHT), (23, 5, WAKE_RIGHT),
+                              (16, 12, WAKE_LEFT), (10, 20, WAKE_LEFT)]:
+            game.board[y][x].memory[0x10:0x10 + len(program)] = program
+        return game
+
+    def test_idle_cpus_are_woken(self):
+        sequential = self.create_wakers()
+        sequential.run()
+        tiled = self.create_wakers(TileEngine(1, 1))
+        tiled.run()
+        self.assertEqual(state(tiled), state(sequential))
+        # the cpu on the right of (5, 11) left its loop
+        self.assertNotEqual(tiled.board[11][6].registers, tiled.board[11][9].registers)
+
+    def test_idle_cpus_are_woken_by_other_tiles(self):
+        synchronous = self.create_wakers(SynchronousEngine())
+        synchronous.run()
+        tiled = self.create_wakers(TileEngine(3, 2, synchronous=True))
+        tiled.run()
+        self.assertEqual(state(tiled), state(synchronous))
+        self.assertNotEqual(tiled.board[3][8].registers, tiled.board[3][9].registers)
@@ -0,0 +1,65 @@
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+from pathlib import Path
+
+import numpy as np
+
+from exception import TimeSeriesFormatError
+from game import Game
+from tests.helpers import WRITER
+from timeseries import COLUMNS, StatisticsCollector, read_chunks, read_statistics
+
+
+def play(collector: StatisticsCollector) -> Game:
+    game = Game(10, headless=True, recorder=collector)
+    game.player1_color = 0x7c00
+    game.player2_color = 0x0200
+    game.board[0][7].memory[0:2] = bytes([0x7c, 0x00])
+    # add #1, r0 / move r0, @10:00 writes 1, then 2... in the first byte of the color of the cell on the right
+    game.board[0][7].memory[0x10:0x10 + len(WRITER)] = WRITER
+    # an illegal instruction, the handler is the loop at 0x12
+    game.board[9][9].memory[0x10:0x14] = bytes([0xf8, 0x00, 0xd4, 0x12])
+    game.board[9][9].memory[2] = 0x12
+    game.run()
+    return game
+
+
+class TestStatisticsCollector(TestCase):
+
+    def setUp(self) -> None:
+        self.directory = TemporaryDirectory()
+        self.path = Path(self.directory.name)
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_binary_in_chunks(self):
+        with StatisticsCollector(self.path / "match.stats", chunk_size=4) as collector:
+            play(collector)
+            self.assertEqual(collector.columns.shape, (len(COLUMNS), 4))
+        self.assertEqual([len(chunk["cycle"]) for chunk in read_chunks(self.path / "match.stats")], [4, 4, 2])
+        statistics = read_statistics(self.path / "match.stats")
+        self.assertEqual(list(statistics["cycle"]), list(range(1, 11)))
+        self.assertTrue((statistics["player1"] == 1).all())
+        # the color of the cell on the right is 0200 from the second write, at the cycle 5, to the third one
+        self.assertEqual(list(statistics["player2"]), [0, 0, 0, 0, 1, 1, 1, 0, 0, 0])
+        # the illegal instruction interrupts at the first cycle and pushes the PC and the flags
+        self.assertEqual(list(statistics["writes"]), [4, 1, 0, 0, 1, 0, 0, 1, 0, 0])
+        self.assertEqual(list(statistics["interruptions"]), [1] + [0] * 9)
+        self.assertEqual(list(statistics["instructions"]), [255] + [256] * 9)
+        # the empty cells and the handler jump to their own instruction
+        self.assertEqual(list(statistics["active"]), [2] + [1] * 9)
+
+    def test_csv(self):
+        with StatisticsCollector(self.path / "match.csv") as collector:
+            play(collector)
+        lines = (self.path / "match.csv").read_text().splitlines()
+        self.assertEqual(lines[0], ",".join(COLUMNS))
+        self.assertEqual(len(lines), 11)
+        values = np.loadtxt(self.path / "match.csv", delimiter=",", skiprows=1, dtype=np.int64)
+        self.assertEqual(list(values[:, 0]), list(range(1, 11)))
+
+    def test_not_a_time_series(self):
+        (self.path / "other.stats").write_bytes(b"CWRP\x01\x00")
+        with self.assertRaises(TimeSeriesFormatError):
+            read_statistics(self.path / "other.stats")
@@ -0,0 +1,72 @@
+import pathlib
+import tempfile
+from unittest import TestCase
+
+from game import Game
+from tests.helpers import PAINTER, PUSHER, READER, WRITER
+from tournament import ENGINE_VERSION, MatchKey, ResultCache, Tournament, create_match, play_match, sign_test, warrior_hash
+
+WARRIORS = {"writer": WRITER, "pusher": PUSHER, "reader": READER}
+
+
+class TestTournament(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.directory.name) / "results.sqlite"
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_seeded_placement(self):
+        positions = []
+        for _ in range(2):
+            game = create_match(WRITER, PUSHER, 42, 10)
+            positions.append([(cpu.pos_x, cpu.pos_y) for array in game.board for cpu in array if cpu.memory[0x10] == 0x18])
+        self.assertEqual(positions[0], positions[1])
+        self.assertEqual(Game(seed=3).random.random(), Game(seed=3).random.random())
+
+    def test_only_new_pairings_are_played(self):
+        with ResultCache(self.path) as cache:
+            first = Tournament({"writer": WRITER, "pusher": PUSHER}, range(2), 10, cache)
+            results = first.run()
+            self.assertEqual(first.played, 4)
+        with ResultCache(self.path) as cache:
+            second = Tournament(WARRIORS, range(2), 10, cache)
+            all_results = second.run()
+            self.assertEqual({match: all_results[match] for match in results}, results)
+            # 6 pairings of 2 seeds, 2 pairings were already played
+            self.assertEqual(second.played, 8)
+            self.assertEqual(second.cached, 4)
+
+    def test_key(self):
+        with ResultCache(self.path) as cache:
+            key = MatchKey(warrior_hash(WRITER), warrior_hash(PUSHER), 1, 10)
+            cache.put(key, 2)
+            self.assertEqual(cache.get(key), 2)
+            self.assertIsNone(cache.get(key._replace(version=ENGINE_VERSION + 1)))
+            self.assertIsNone(cache.get(key._replace(max_cycles=11)))
+
+    def test_sign_test(self):
+        self.assertEqual(sign_test(0, 0), 1.0)
+        self.assertEqual(sign_test(3, 3), 1.0)
+        self.assertAlmostEqual(sign_test(5, 0), 2 / 32)
+        self.assertAlmostEqual(sign_test(1, 9), sign_test(9, 1))
+
+    def test_early_stopping(self):
+        tournament = Tournament({"painter": PAINTER, "pusher": PUSHER}, range(40), 10, confidence=0.95, batch=4)
+        evaluation = tournament.evaluate("painter", "pusher")
+        self.assertEqual(evaluation.winner, 1)
+        self.assertGreater(evaluation.saved, 0)
+        self.assertEqual(evaluation.saved + len(evaluation.results), 40)
+        self.assertEqual(tournament.saved, evaluation.saved)
+        self.assertEqual(tournament.played, len(evaluation.results))
+        for seed, result in evaluation.results.items():
+            self.assertEqual(play_match(PAINTER, PUSHER, seed, 10), result)
+
+    def test_no_winner(self):
+        tournament = Tournament({"writer": WRITER, "pusher": PUSHER}, range(6), 10, confidence=0.95, batch=3)
+        evaluation = tournament.evaluate("writer", "pusher")
+        self.assertEqual(evaluation.winner, 0)
+        self.assertEqual(evaluation.saved, 0)
+        self.assertEqual(evaluation.draws + evaluation.player1_wins + evaluation.player2_wins, 6)
@@ -0,0 +1,41 @@
+import contextlib
+import io
+from unittest import TestCase
+
+from game import Game
+from tests.helpers import WRITER
+from view import ThreadedView, View
+
+
+def create_game(frame_rate: float = None) -> Game:
+    game = Game(40, frame_rate=frame_rate)
+    game.player1_color = 0x7c00
+    game.player2_color = 0x001f
+    game.board[0][7].memory[0x10:0x10 + len(WRITER)] = WRITER
+    return game
+
+
+class TestThreadedView(TestCase):
+
+    def test_drops_frames_and_shows_the_last_one(self):
+        game = create_game(frame_rate=20)
+        self.assertIsInstance(game.view, ThreadedView)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            game.run()
+        view = game.view
+        self.assertIsNone(view.thread)
+        self.assertEqual(view.published, 40)
+        self.assertGreater(view.dropped, 0)
+        self.assertEqual(view.rendered + view.dropped, view.published)
+        final = io.StringIO()
+        with contextlib.redirect_stdout(final):
+            View(game).update()
+        self.assertTrue(output.getvalue().endswith(final.getvalue()))
+
+    def test_same_result_as_the_view(self):
+        threaded = create_game(frame_rate=1000)
+        synchronous = create_game()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(threaded.run(), synchronous.run())
+        self.assertEqual(threaded.view.snapshot(), synchronous.view.snapshot())
@@ -0,0 +1,376 @@
+"""Multiprocess engine running the board split in tiles
+
+The memories of every CPU live in a shared memory arena. Each tile of the board runs in its own
+process, which owns the CPUs of the tile: their registers, flags and their part of the arena.
+
+During a cycle a tile reads the memory of CPUs of other tiles from a snapshot of the arena taken
+at the end of the previous cycle, and the writes and traps aimed at other tiles (the targets of
+__get_relative_cpu) are sent to the halo queue of the owning tile. At the end of the cycle every tile
+applies what it received, sorted by the index of the CPU which sent it (then in the order it was sent),
+so the result does not depend on the scheduling of the processes.
+
+The writes and traps of a cycle go through a mailbox in shared memory: each tile packs all it sends in
+one batch in its own part of the mailbox, the tiles wait for each other once, then each one reads the
+records aimed at it. The processes only synchronize on barriers, three times a cycle.
+
+A tile does not execute its idle CPUs, which jump to their own instruction with the timer off (see
+termination.is_idle): their instruction changes nothing. An idle CPU is woken when it is written or
+interrupted, by a CPU of the tile or by the delivery of the end of the cycle, and runs again from its turn
+in the cycle. Most of a large board is idle, this is where a tile spends less than Game.cycle.
+
+Within a tile the order is the row-major order of Game.cycle, with a single tile the engine gives
+the same result as Game.cycle. In synchronous mode the CPUs of a tile are handled like CPUs of other
+tiles, which gives the result of the SynchronousEngine.
+
+The CPUs of the tiles have no tracer, a Game with a recorder does not accept this engine.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Union
+    from game import Game
+
+import heapq
+import multiprocessing
+import struct
+from multiprocessing.shared_memory import SharedMemory
+from threading import BrokenBarrierError
+
+from cpu import CPU, PC
+from termination import is_idle
+
+MEMORY_SIZE = 256
+WRITE = 0
+INTERRUPTION = 1
+# record of the mailbox: source, sequence, target, kind, first, second
+RECORD = struct.Struct("<IIIBBB")
+COUNT = struct.Struct("<I")
+# records a cpu can send in one instruction, a word written to another cpu and a trap
+RECORDS_PER_CPU = 4
+
+
+class TileEngine:
+    columns: int
+    rows: int
+    synchronous: bool
+
+    def __init__(self, columns: int = 2, rows: int = 2, synchronous: bool = False):
+        """
+        Args:
+            columns (int, optional): number of tiles along x. Defaults to 2.
+            rows (int, optional): number of tiles along y. Defaults to 2.
+            synchronous (bool, optional): run the tiles with the rules of the SynchronousEngine,
+            the result is then the same whatever the tiles. Defaults to False.
+        """
+        self.columns = columns
+        self.rows = rows
+        self.synchronous = synchronous
+        self.game = None
+        self.processes = []
+
+    def start(self, game: Game):
+        """Copy the board in the arena and start one process per tile"""
+        self.game = game
+        height = len(game.board)
+        width = len(game.board[0])
+        tile_count = self.columns * self.rows
+        tile_of = [
+            (y * self.rows // height) * self.columns + (x * self.columns // width)
+            for y in range(height) for x in range(width)
+        ]
+
+        self.live = SharedMemory(create=True, size=width * height * MEMORY_SIZE)
+        self.snapshot = SharedMemory(create=True, size=width * height * MEMORY_SIZE)
+        self.views = []
+        states = [[] for _ in range(tile_count)]
+        for index, cpu in enumerate(cpu for array in game.board for cpu in array):
+            start = index * MEMORY_SIZE
+            self.live.buf[start: start + MEMORY_SIZE] = bytes(cpu.memory)
+            states[tile_of[index]].append((index, cpu.registers, cpu.flags.value, cpu.current_cycle, cpu.interruptions, cpu.decode_cache))
+            # the game keeps reading the colors of the board from the arena
+            view = self.live.buf[start: start + MEMORY_SIZE]
+            self.views.append(view)
+            cpu.memory = view
+        self.snapshot.buf[:] = self.live.buf
+
+        # each tile has its part of the mailbox, large enough for what all its cpus can send in a cycle
+        box_size = COUNT.size + RECORD.size * RECORDS_PER_CPU * max(len(state) for state in states)
+        self.mail = SharedMemory(create=True, size=tile_count * box_size)
+
+        context = multiprocessing.get_context()
+        self.go = context.Barrier(tile_count + 1)
+        self.done = context.Barrier(tile_count + 1)
+        sent = context.Barrier(tile_count)
+        self.stopping = context.Value("b", 0)
+        self.results = context.Queue()
+        self.processes = [
+            context.Process(
+                target=_run_tile,
+                args=(tile, width, height, tile_of, self.live.name, self.snapshot.name, self.mail.name, box_size,
+                      states[tile], self.synchronous, self.go, sent, self.done, self.stopping, self.results),
+                daemon=True,
+            )
+            for tile in range(tile_count)
+        ]
+        for process in self.processes:
+            process.start()
+
+    def cycle(self):
+        """Let every tile run one cycle and wait for all of them"""
+        self.game.current_cycle += 1
+        self.go.wait()
+        self.done.wait()
+
+    def stop(self):
+        """Stop the processes and put the state of their CPUs back in the board"""
+        self.stopping.value = 1
+        error = None
+        try:
+            self.go.wait()
+        except BrokenBarrierError:
+            pass
+        cpus = [cpu for array in self.game.board for cpu in array]
+        for _ in self.processes:
+            tile, states = self.results.get()
+            if isinstance(states, BaseException):
+                # the other tiles only report the broken barriers
+                if error is None or isinstance(error, BrokenBarrierError):
+                    error = states
+                continue
+            for index, registers, flags, current_cycle, interruptions in states:
+                cpu = cpus[index]
+                cpu.registers = registers
+                cpu.flags.value = flags
+                cpu.current_cycle = current_cycle
+                cpu.interruptions = interruptions
+        for process in self.processes:
+            process.join()
+        self.processes = []
+
+        for index, cpu in enumerate(cpus):
+            cpu.memory = bytearray(self.views[index])
+        for view in self.views:
+            view.release()
+        self.views = []
+        self.live.close()
+        self.live.unlink()
+        self.snapshot.close()
+        self.snapshot.unlink()
+        self.mail.close()
+        self.mail.unlink()
+        if error is not None:
+            raise error
+
+
+class RemoteMemory:
+    """Memory of a CPU of another tile: reads come from the snapshot, writes go to the halo"""
+
+    def __init__(self, host: TileHost, index: int, snapshot: memoryview):
+        self.host = host
+        self.index = index
+        self.snapshot = snapshot
+
+    def __len__(self) -> int:
+        return MEMORY_SIZE
+
+    def __getitem__(self, key):
+        return self.snapshot[key]
+
+    def __setitem__(self, address: int, value: int):
+        if not 0 <= value <= 0xff:
+            raise ValueError("byte must be in range(0, 256)")
+        if not -MEMORY_SIZE <= address < MEMORY_SIZE:
+            raise IndexError("index out of range")
+        self.host.send(self.index, WRITE, address % MEMORY_SIZE, value)
+
+
+class RemoteCell:
+    """Stand-in for a CPU of another tile, as returned by __get_relative_cpu"""
+    # the writes are applied to the CPU by TileHost.deliver, through its write barrier
+    watchers = None
+
+    def __init__(self, host: TileHost, index: int, snapshot: memoryview, width: int):
+        self.index = index
+        self.pos_x = index % width
+        self.pos_y = index // width
+        self.memory = RemoteMemory(host, index, snapshot)
+        self.host = host
+
+    def interruption(self, interruption_vector: int):
+        self.host.send(self.index, INTERRUPTION, interruption_vector, 0)
+
+
+class TileHost:
+    """The game as seen by the CPUs of one tile"""
+    board: list[list[Union[CPU, RemoteCell]]]
+
+    def __init__(self, tile_of: list[int]):
+        self.board = []
+        self.tile_of = tile_of
+        self.outbox = []
+        self.source = 0
+        self.sequence = 0
+        # index of the cpu executed, the cpus of the tile which are not idle and those which run later in the cycle
+        self.position = -1
+        self.awake = set()
+        self.queue = []
+        # cpus of the tile whose memory was written in the cycle
+        self.written = set()
+
+    def send(self, target: int, kind: int, first: int, second: int):
+        self.sequence += 1
+        self.outbox.append((self.source, self.sequence, target, kind, first, second))
+
+    def wake(self, index: int):
+        """Run again an idle cpu of the tile, from its turn in this cycle when it has not passed yet"""
+        if index not in self.awake:
+            self.awake.add(index)
+            if index > self.position:
+                heapq.heappush(self.queue, index)
+
+    # the tracer of the cpus of the tile, to wake the idle cpus and find the memories to copy in the snapshot
+
+    def memory_write(self, origin: CPU, target: Union[CPU, RemoteCell], address: int, value: int):
+        if not isinstance(target, RemoteCell):
+            index = target.pos_y * len(self.board[0]) + target.pos_x
+            self.written.add(index)
+            self.wake(index)
+
+    def interruption(self, cpu: CPU, vector: int):
+        self.wake(cpu.pos_y * len(self.board[0]) + cpu.pos_x)
+
+    def trap(self, origin: CPU, target: Union[CPU, RemoteCell]):
+        pass
+
+    def execute(self, index: int, cpu: CPU, swap: bool):
+        """Execute the instruction of a cpu
+
+        Args:
+            index (int): index of the cpu in the board
+            cpu (CPU): the cpu
+            swap (bool): whenever the board holds a RemoteCell for the cpu itself,
+            which is replaced by the cpu for the time of the instruction
+        """
+        self.source = index
+        if swap:
+            array = self.board[cpu.pos_y]
+            cell = array[cpu.pos_x]
+            array[cpu.pos_x] = cpu
+            cpu.execute()
+            array[cpu.pos_x] = cell
+        else:
+            cpu.execute()
+
+    @staticmethod
+    def deliver(received: list[tuple], cpus: Union[dict[int, CPU], list[CPU]], recorder=None):
+        """Apply the writes and traps received at the end of a cycle
+
+        They are applied by index of the cpu which sent them, then in the order they were sent,
+        so when several cpus write the same byte the one with the highest index wins.
+        The recorder, when given, sees each write once it is applied, cpus then holds every cpu of the board.
+        """
+        received.sort()
+        for source, _, target, kind, first, second in received:
+            if kind == WRITE:
+                cpu = cpus[target]
+                cpu.write(first, second)
+                if recorder is not None:
+                    recorder.memory_write(cpus[source], cpu, first, second)
+            else:
+                cpus[target].interruption(first)
+
+
+def _run_tile(tile, width, height, tile_of, live_name, snapshot_name, mail_name, box_size, states, synchronous,
+              go, sent, done, stopping, results):
+    live = SharedMemory(live_name)
+    snapshot = SharedMemory(snapshot_name)
+    mail = SharedMemory(mail_name)
+    views = []
+    try:
+        host = TileHost(tile_of)
+        state_of = {index: state for index, *state in states}
+        own = []
+        for y in range(height):
+            array = []
+            for x in range(width):
+                index = y * width + x
+                start = index * MEMORY_SIZE
+                if index in state_of:
+                    view = live.buf[start: start + MEMORY_SIZE]
+                    cpu = CPU(host, view)
+                    cpu.pos_x = x
+                    cpu.pos_y = y
+                    cpu.registers, cpu.flags.value, cpu.current_cycle, cpu.interruptions, cpu.decode_cache = state_of[index]
+                    cpu.tracer = host
+                    own.append((index, cpu))
+                    views.append(view)
+                if synchronous or index not in state_of:
+                    view = snapshot.buf[start: start + MEMORY_SIZE]
+                    cpu = RemoteCell(host, index, view, width)
+                    views.append(view)
+                array.append(cpu)
+            host.board.append(array)
+        cpus = dict(own)
+        host.awake = {index for index, cpu in own if not is_idle(cpu)}
+        boxes = [other * box_size for other in range(max(tile_of) + 1) if other != tile]
+        box = tile * box_size
+        capacity = (box_size - COUNT.size) // RECORD.size
+
+        while True:
+            go.wait()
+            if stopping.value:
+                break
+            host.queue = queue = sorted(host.awake)
+            while queue:
+                index = host.position = heapq.heappop(queue)
+                cpu = cpus[index]
+                pc = cpu.registers[PC]
+                host.execute(index, cpu, synchronous)
+                if cpu.registers[PC] == pc and is_idle(cpu):
+                    host.awake.discard(index)
+            host.position = -1
+
+            # one batch for the other tiles, the records of the tile itself are kept
+            outbox = host.outbox
+            host.outbox = []
+            received = [record for record in outbox if tile_of[record[2]] == tile]
+            sending = [record for record in outbox if tile_of[record[2]] != tile]
+            if len(sending) > capacity:
+                raise RuntimeError("too many writes and traps to other tiles in a cycle")
+            COUNT.pack_into(mail.buf, box, len(sending))
+            mail.buf[box + COUNT.size: box + COUNT.size + len(sending) * RECORD.size] = b"".join(
+                RECORD.pack(*record) for record in sending
+            )
+            sent.wait()
+            for start in boxes:
+                count, = COUNT.unpack_from(mail.buf, start)
+                if count:
+                    data = bytes(mail.buf[start + COUNT.size: start + COUNT.size + count * RECORD.size])
+                    received.extend(record for record in RECORD.iter_unpack(data) if tile_of[record[2]] == tile)
+            TileHost.deliver(received, cpus)
+            for record in received:
+                host.wake(record[2])
+                if record[3] == WRITE:
+                    host.written.add(record[2])
+            # only the memories written in the cycle changed
+            for index in host.written:
+                start = index * MEMORY_SIZE
+                snapshot.buf[start: start + MEMORY_SIZE] = live.buf[start: start + MEMORY_SIZE]
+            host.written = set()
+            done.wait()
+
+        results.put((tile, [(index, cpu.registers, cpu.flags.value, cpu.current_cycle, cpu.interruptions) for index, cpu in own]))
+    except BaseException as error:
+        go.abort()
+        sent.abort()
+        done.abort()
+        results.put((tile, error))
+    finally:
+        host = None
+        for view in views:
+            view.release()
+        live.close()
+        snapshot.close()
+        mail.close()
@@ -0,0 +1,189 @@
+"""Statistics of every cycle of a match
+
+StatisticsCollector is a recorder of a Game. At the end of each cycle it adds a row to columnar NumPy arrays
+allocated once for chunk_size cycles: the cells of each player, the active cpus (those which did not jump to
+their own instruction), the instructions executed, the interruptions and the bytes written. A full chunk is
+sent to a writer, a generator which receives the chunks and appends them to a file, so the memory used does
+not depend on max_cycles.
+
+Binary layout (little endian):
+    header: magic, version, number of columns, then the name of each column (length, ascii)
+    chunks: number of rows, then each column of the chunk as 64 bit integers
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Generator, Iterator, Union
+    from pathlib import Path
+    from cpu import CPU
+    from game import Game
+
+import struct
+
+import numpy as np
+
+from cpu import ILLEGAL, PC
+from exception import TimeSeriesFormatError
+
+COLUMNS = ("cycle", "player1", "player2", "active", "instructions", "interruptions", "writes")
+MAGIC = b"CWST"
+VERSION = 1
+HEADER = struct.Struct("<4sBB")
+CHUNK = struct.Struct("<I")
+
+
+def csv_writer(file_path: Union[str, Path]) -> Generator[None, np.ndarray, None]:
+    """Write the chunks sent to the generator as CSV lines, the file is closed with the generator"""
+    with open(file_path, "w") as file:
+        file.write(",".join(COLUMNS) + "\n")
+        while True:
+            chunk = yield
+            np.savetxt(file, chunk.T, fmt="%d", delimiter=",")
+
+
+def binary_writer(file_path: Union[str, Path]) -> Generator[None, np.ndarray, None]:
+    """Write the chunks sent to the generator in the binary layout, the file is closed with the generator"""
+    with open(file_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(COLUMNS)))
+        for name in COLUMNS:
+            file.write(bytes([len(name)]) + name.encode("ascii"))
+        while True:
+            chunk = yield
+            file.write(CHUNK.pack(chunk.shape[1]) + chunk.astype("<i8").tobytes())
+
+
+def read_chunks(file_path: Union[str, Path]) -> Iterator[Dict[str, np.ndarray]]:
+    """Read a binary time series file one chunk at a time
+
+    Raises:
+        TimeSeriesFormatError: if the file is not a time series file or is truncated
+    """
+    with open(file_path, "rb") as file:
+        header = file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise TimeSeriesFormatError("truncated time series header")
+        magic, version, count = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise TimeSeriesFormatError("not a time series file")
+        if version != VERSION:
+            raise TimeSeriesFormatError(f"unsupported time series version {version}")
+        names = []
+        for _ in range(count):
+            length = file.read(1)
+            if not length:
+                raise TimeSeriesFormatError("truncated time series header")
+            names.append(file.read(length[0]).decode("ascii"))
+        while True:
+            size = file.read(CHUNK.size)
+            if not size:
+                return
+            if len(size) < CHUNK.size:
+                raise TimeSeriesFormatError("truncated time series chunk")
+            rows, = CHUNK.unpack(size)
+            data = file.read(rows * count * 8)
+            if len(data) < rows * count * 8:
+                raise TimeSeriesFormatError("truncated time series chunk")
+            values = np.frombuffer(data, dtype="<i8").reshape(count, rows)
+            yield dict(zip(names, values))
+
+
+def read_statistics(file_path: Union[str, Path]) -> Dict[str, np.ndarray]:
+    """Read a whole binary time series file, a column of every cycle by name"""
+    chunks = list(read_chunks(file_path))
+    if not chunks:
+        return {name: np.zeros(0, dtype=np.int64) for name in COLUMNS}
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+
+
+class StatisticsCollector:
+    chunk_size: int
+    # the rows of the current chunk, one column per name of COLUMNS
+    columns: np.ndarray
+    rows: int
+
+    def __init__(self, file_path: Union[str, Path], binary: bool = None, chunk_size: int = 1024):
+        """
+        Args:
+            file_path (Union[str, Path]): where the statistics are written
+            binary (bool, optional): write the binary layout instead of CSV, when the path does not end with .csv
+            if None. Defaults to None.
+            chunk_size (int, optional): number of cycles kept in memory before they are written. Defaults to 1024.
+        """
+        if binary is None:
+            binary = not str(file_path).endswith(".csv")
+        self.writer = binary_writer(file_path) if binary else csv_writer(file_path)
+        # run up to the first yield, so the header is written and the writer can receive chunks
+        next(self.writer)
+        self.chunk_size = chunk_size
+        self.columns = np.zeros((len(COLUMNS), chunk_size), dtype=np.int64)
+        self.rows = 0
+        self.cpus = []
+        self.game = None
+        self.interruptions = 0
+        self.illegal = 0
+        self.writes = 0
+
+    def __enter__(self) -> StatisticsCollector:
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def start(self, game: Game):
+        self.game = game
+        self.cpus = [cpu for array in game.board for cpu in array]
+
+    def begin_cycle(self, cycle: int):
+        self.interruptions = 0
+        self.illegal = 0
+        self.writes = 0
+
+    def instructions(self, pcs: list[int]):
+        """Add the row of the cycle, called at the end of each cycle with the PC of each cpu before it"""
+        game = self.game
+        player1_color = game.player1_color
+        player2_color = game.player2_color
+        player1 = 0
+        player2 = 0
+        active = 0
+        for cpu, pc in zip(self.cpus, pcs):
+            memory = cpu.memory
+            color = memory[0] << 8 | memory[1]
+            if color == player1_color:
+                player1 += 1
+            elif color == player2_color:
+                player2 += 1
+            if cpu.registers[PC] != pc:
+                active += 1
+        self.columns[:, self.rows] = (
+            game.current_cycle, player1, player2, active, len(pcs) - self.illegal, self.interruptions, self.writes
+        )
+        self.rows += 1
+        if self.rows == self.chunk_size:
+            self.flush()
+
+    def interruption(self, cpu: CPU, vector: int):
+        self.interruptions += 1
+        if vector == ILLEGAL:
+            self.illegal += 1
+
+    def memory_write(self, origin: CPU, target: CPU, address: int, value: int):
+        self.writes += 1
+
+    def trap(self, origin: CPU, target: CPU):
+        pass
+
+    def flush(self):
+        """Send the rows of the current chunk to the writer"""
+        if self.rows:
+            self.writer.send(self.columns[:, :self.rows])
+            self.rows = 0
+
+    def close(self):
+        if self.writer is None:
+            return
+        self.flush()
+        self.writer.close()
+        self.writer = None
@@ -0,0 +1,316 @@
+"""Tournaments between warriors, with the results of the matches kept on disk
+
+Every ordered pair of warriors is played once per seed. The result of a match only depends on the
+programs of both warriors, the seed of the placement, the number of cycles, the size of the board and
+the rules of the CPU, so it is stored in a SQLite file under those keys. Running the tournament again
+after adding a warrior only plays the new pairings.
+
+With a confidence, the seeds of a pairing are played by batches and the pairing stops as soon as a sign
+test on the decisive matches shows that one of the warriors is the best at that confidence. The threshold
+is divided by the number of batches (Bonferroni), so looking at the results after each batch does not make
+the test more optimistic.
+
+ENGINE_VERSION has to be increased whenever a change of the CPU or of the game changes the result
+of a match, the results stored with another version are then played again.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Iterable, List, Union
+
+import argparse
+import hashlib
+import itertools
+import math
+import pathlib
+import sqlite3
+from typing import NamedTuple
+
+from cpu import CPU
+from game import BOARD_SIZE, Game
+from termination import settled
+
+ENGINE_VERSION = 1
+DEFAULT_CACHE = "codewar-results.sqlite"
+PLAYER1_COLOR = 0x7c00
+PLAYER2_COLOR = 0x001f
+
+
+class MatchKey(NamedTuple):
+    player1: str
+    player2: str
+    seed: int
+    max_cycles: int
+    width: int = BOARD_SIZE
+    height: int = BOARD_SIZE
+    version: int = ENGINE_VERSION
+
+
+def warrior_hash(program: bytes) -> str:
+    """Hash of the content of a warrior file, object or raw binary"""
+    return hashlib.sha256(program).hexdigest()
+
+
+def play_match(player1: bytes, player2: bytes, seed: int, max_cycles: int = 1000) -> int:
+    """Play a match without view
+
+    Args:
+        player1 (bytes): content of the file of the first player
+        player2 (bytes): content of the file of the second player
+        seed (int): seed of the placement of the players
+        max_cycles (int, optional): number of cycles of the match. Defaults to 1000.
+
+    Returns:
+        int: 1 or 2 for the winning player, 0 for a draw
+    """
+    return create_match(player1, player2, seed, max_cycles).run()
+
+
+def create_match(player1: bytes, player2: bytes, seed: int, max_cycles: int = 1000) -> Game:
+    """Create the game of a match with the players placed, see play_match
+
+    The match stops as soon as its result is settled, which does not change the result
+    """
+    game = Game(max_cycles, headless=True, seed=seed, terminations=settled())
+    game.place_players(
+        CPU.load_from_bytes(player1, game, PLAYER1_COLOR),
+        CPU.load_from_bytes(player2, game, PLAYER2_COLOR),
+    )
+    return game
+
+
+def sign_test(wins: int, losses: int) -> float:
+    """Two-sided p-value of the sign test: probability of a result at least this uneven between equal warriors
+
+    Args:
+        wins (int): matches won by the first warrior
+        losses (int): matches won by the second warrior, the draws are left out
+
+    Returns:
+        float: the p-value
+    """
+    count = wins + losses
+    if count == 0:
+        return 1.0
+    tail = sum(math.comb(count, k) for k in range(max(wins, losses), count + 1))
+    return min(1.0, 2 * tail / 2 ** count)
+
+
+class PairingEvaluation(NamedTuple):
+    results: Dict[int, int]
+    saved: int
+    winner: int
+
+    @property
+    def player1_wins(self) -> int:
+        return sum(result == 1 for result in self.results.values())
+
+    @property
+    def player2_wins(self) -> int:
+        return sum(result == 2 for result in self.results.values())
+
+    @property
+    def draws(self) -> int:
+        return sum(result == 0 for result in self.results.values())
+
+
+class ResultCache:
+    path: Union[str, pathlib.Path]
+
+    def __init__(self, path: Union[str, pathlib.Path] = DEFAULT_CACHE):
+        """
+        Args:
+            path (Union[str, pathlib.Path], optional): the SQLite file, created when missing.
+            Defaults to codewar-results.sqlite in the working directory.
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "player1 TEXT, player2 TEXT, seed INTEGER, max_cycles INTEGER, width INTEGER, height INTEGER, "
+            "version INTEGER, result INTEGER, "
+            "PRIMARY KEY (player1, player2, seed, max_cycles, width, height, version))"
+        )
+        self.connection.commit()
+
+    def __enter__(self) -> ResultCache:
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def get(self, key: MatchKey) -> Union[int, None]:
+        """The stored result of a match, None when it was never played"""
+        row = self.connection.execute(
+            "SELECT result FROM results WHERE player1 = ? AND player2 = ? AND seed = ? AND max_cycles = ? "
+            "AND width = ? AND height = ? AND version = ?",
+            key,
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def put(self, key: MatchKey, result: int):
+        self.connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (*key, result))
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+class Tournament:
+    warriors: Dict[str, bytes]
+    seeds: List[int]
+    max_cycles: int
+    cache: Union[ResultCache, None]
+    played: int
+    cached: int
+    saved: int
+
+    def __init__(
+        self,
+        warriors: Dict[str, bytes],
+        seeds: Iterable[int] = (0,),
+        max_cycles: int = 1000,
+        cache: ResultCache = None,
+        confidence: float = None,
+        batch: int = 1,
+    ):
+        """
+        Args:
+            warriors (Dict[str, bytes]): content of the file of each warrior, by name
+            seeds (Iterable[int], optional): seeds played for each pairing. Defaults to (0,).
+            max_cycles (int, optional): number of cycles of each match. Defaults to 1000.
+            cache (ResultCache, optional): where the results are looked up and stored. Defaults to None.
+            confidence (float, optional): stop a pairing once one warrior is the best with this confidence,
+            every seed is played when None. Defaults to None.
+            batch (int, optional): matches played together by the BatchEngine, which needs NumPy,
+            1 plays them one by one with Game.run. Defaults to 1.
+        """
+        self.warriors = warriors
+        self.seeds = list(seeds)
+        self.max_cycles = max_cycles
+        self.cache = cache
+        self.confidence = confidence
+        self.batch = batch
+        self.hashes = {name: warrior_hash(program) for name, program in warriors.items()}
+        self.played = 0
+        self.cached = 0
+        self.saved = 0
+
+    def pairings(self) -> List[tuple[str, str]]:
+        """Every ordered pair of warriors, each warrior plays once as each player"""
+        return list(itertools.permutations(self.warriors, 2))
+
+    def key(self, player1: str, player2: str, seed: int) -> MatchKey:
+        return MatchKey(self.hashes[player1], self.hashes[player2], seed, self.max_cycles)
+
+    def run(self) -> Dict[tuple[str, str, int], int]:
+        """Play the matches which are not in the cache
+
+        Returns:
+            Dict[tuple[str, str, int], int]: the result of each match played or found, by players and seed
+        """
+        results = {}
+        for player1, player2 in self.pairings():
+            if self.confidence is None:
+                pairing = self.play(player1, player2, self.seeds)
+            else:
+                pairing = self.evaluate(player1, player2).results
+            for seed, result in pairing.items():
+                results[player1, player2, seed] = result
+        return results
+
+    def evaluate(self, player1: str, player2: str) -> PairingEvaluation:
+        """Play the seeds of a pairing by batches until one warrior is the best with the confidence of the tournament
+
+        Returns:
+            PairingEvaluation: the results by seed, the number of seeds left out and the best warrior,
+            1 or 2, or 0 when every seed was played without reaching the confidence
+        """
+        confidence = 0.95 if self.confidence is None else self.confidence
+        looks = max(1, math.ceil(len(self.seeds) / self.batch))
+        threshold = (1 - confidence) / looks
+        results = {}
+        winner = 0
+        for start in range(0, len(self.seeds), self.batch):
+            results.update(self.play(player1, player2, self.seeds[start: start + self.batch]))
+            wins = sum(result == 1 for result in results.values())
+            losses = sum(result == 2 for result in results.values())
+            if sign_test(wins, losses) <= threshold:
+                winner = 1 if wins > losses else 2
+                break
+        saved = len(self.seeds) - len(results)
+        self.saved += saved
+        return PairingEvaluation(results, saved, winner)
+
+    def play(self, player1: str, player2: str, seeds: Iterable[int]) -> Dict[int, int]:
+        """Play the matches of a pairing which are not in the cache
+
+        Returns:
+            Dict[int, int]: the result of each match by seed
+        """
+        results = {}
+        missing = []
+        for seed in seeds:
+            result = None if self.cache is None else self.cache.get(self.key(player1, player2, seed))
+            if result is None:
+                missing.append(seed)
+            else:
+                results[seed] = result
+                self.cached += 1
+        if not missing:
+            return results
+        program1 = self.warriors[player1]
+        program2 = self.warriors[player2]
+        if self.batch > 1:
+            from batch import BatchEngine
+
+            engine = BatchEngine(min(self.batch, len(missing)))
+            for seed in missing:
+                engine.submit(create_match(program1, program2, seed, self.max_cycles))
+            played = engine.run()
+        else:
+            played = [play_match(program1, program2, seed, self.max_cycles) for seed in missing]
+        for seed, result in zip(missing, played):
+            results[seed] = result
+            self.played += 1
+            if self.cache is not None:
+                self.cache.put(self.key(player1, player2, seed), result)
+        return results
+
+    @staticmethod
+    def standings(results: Dict[tuple[str, str, int], int]) -> List[tuple[str, int]]:
+        """Points of each warrior, 2 for a win and 1 for a draw, best first"""
+        points = {}
+        for (player1, player2, _), result in results.items():
+            points.setdefault(player1, 0)
+            points.setdefault(player2, 0)
+            if result == 0:
+                points[player1] += 1
+                points[player2] += 1
+            else:
+                points[player1 if result == 1 else player2] += 2
+        return sorted(points.items(), key=lambda item: -item[1])
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser("tournament", description="Play every pairing of the warriors")
+    parser.add_argument("warriors", help="object or binary files of the warriors", nargs="+")
+    parser.add_argument("-s", "--seeds", help="number of seeds per pairing", type=int, default=1)
+    parser.add_argument("-c", "--cycles", help="number of cycles per match", type=int, default=1000)
+    parser.add_argument("--cache", help="SQLite file of the results", type=str, default=DEFAULT_CACHE)
+    parser.add_argument("--confidence", help="stop a pairing once a warrior is the best with this confidence", type=float, default=None)
+    parser.add_argument("-b", "--batch", help="matches played together, needs NumPy", type=int, default=1)
+    args = parser.parse_args(argv)
+    warriors = {path: pathlib.Path(path).read_bytes() for path in args.warriors}
+    with ResultCache(args.cache) as cache:
+        tournament = Tournament(warriors, range(args.seeds), args.cycles, cache, args.confidence, args.batch)
+        results = tournament.run()
+    for name, points in Tournament.standings(results):
+        print(f"{points:5} {name}")
+    print(f"{tournament.played} matchs joués, {tournament.cached} trouvés dans le cache, {tournament.saved} évités")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,20 @@
-from cpu import CPU
-from game import DEFAULT_FILE, Game
+import argparse
+import pathlib
 
-cpu = CPU.load_from_file(DEFAULT_FILE, Game())
+from game import DEFAULT_FILE
+from host import Host
 
 
-cpu.run()
\ No newline at end of file
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser("run", description="Run a warrior alone with CPU.run")
+    parser.add_argument("file", help="object or binary file of the warrior, the default program when missing", nargs="?", default=DEFAULT_FILE)
+    parser.add_argument("-b", "--budget", help="number of instructions to execute", type=int, default=100000)
+    parser.add_argument("--stop-at", help="stop before the instruction at this address, in hexadecimal", type=lambda value: int(value, 16), default=None)
+    parser.add_argument("-i", "--stop-on-interrupt", help="stop after the first interruption", action="store_true")
+    args = parser.parse_args(argv)
+    cpu = Host.load(pathlib.Path(args.file).read_bytes())
+    print(cpu.run(budget=args.budget, stop_at=args.stop_at, stop_on_interrupt=args.stop_on_interrupt))
+
+
+if __name__ == "__main__":
+    main()
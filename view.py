@@ -3,8 +3,10 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
+    from typing import List, Union
     from game import Game
 
+import threading
 
 RESET = '\033[0m'
 
@@ -21,13 +23,20 @@ class View:
         self.print_board()
         self.print_player_colors()
 
-    def print_board(self):
+    def stop(self):
+        pass
+
+    def snapshot(self) -> List[List[int]]:
+        """The colors of the board, line by line"""
+        return [[cpu.memory[0] << 8 | cpu.memory[1] for cpu in array] for array in self.game.board]
+
+    def print_board(self, colors: List[List[int]] = None):
+        """Print the colors of the board, or the colors of a snapshot"""
         print("Plateau de jeu:")
         print("+-----------------------------+")
 
-        for array in self.game.board:
-            for cpu in array:
-                color = cpu.memory[0] << 8 | cpu.memory[1]
+        for array in self.snapshot() if colors is None else colors:
+            for color in array:
                 print(f"|{self.get_color_escape(*self.convert_5bit_to_8bit(color))}  B  {RESET}", end="")
             print("|")
 
@@ -52,3 +61,79 @@ class View:
         blue_8bit = (blue_5bit << 3) | (blue_5bit >> 2)
 
         return red_8bit, green_8bit, blue_8bit
+
+
+class ThreadedView(View):
+    """A view printing the board from its own thread, at most frame_rate times per second
+
+    update only puts a snapshot of the colors in a mailbox holding the latest one, the simulation does not
+    wait for the terminal. A snapshot replaced before it was printed is dropped. stop prints the last one.
+    """
+    frame_rate: float
+    published: int
+    rendered: int
+    dropped: int
+
+    def __init__(self, game: Game, frame_rate: float = 30):
+        """
+        Args:
+            game (Game): the game to show
+            frame_rate (float, optional): boards printed per second, at most. Defaults to 30.
+        """
+        super().__init__(game)
+        self.frame_rate = frame_rate
+        self.published = 0
+        self.rendered = 0
+        self.dropped = 0
+        self.latest = None
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def initialize(self):
+        super().initialize()
+        self.start()
+
+    def start(self):
+        if self.thread is None:
+            self.stopping.clear()
+            self.thread = threading.Thread(target=self.__render_loop, name="view", daemon=True)
+            self.thread.start()
+
+    def update(self):
+        colors = self.snapshot()
+        with self.lock:
+            if self.latest is not None:
+                self.dropped += 1
+            self.latest = colors
+        self.published += 1
+        if self.thread is None:
+            self.start()
+
+    def stop(self):
+        """Stop the thread once it printed the last snapshot"""
+        if self.thread is None:
+            return
+        self.stopping.set()
+        self.thread.join()
+        self.thread = None
+
+    def take(self) -> Union[List[List[int]], None]:
+        """The latest snapshot not printed yet, None when there is none"""
+        with self.lock:
+            colors = self.latest
+            self.latest = None
+        return colors
+
+    def __render_loop(self):
+        interval = 1 / self.frame_rate
+        while not self.stopping.wait(interval):
+            self.__render(self.take())
+        self.__render(self.take())
+
+    def __render(self, colors: Union[List[List[int]], None]):
+        if colors is None:
+            return
+        self.print_board(colors)
+        self.print_player_colors()
+        self.rendered += 1